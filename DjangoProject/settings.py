@@ -53,6 +53,7 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_EXPOSE_HEADERS = ['X-Missing-Routes']
 
 ROOT_URLCONF = 'DjangoProject.urls'
 
@@ -129,3 +130,85 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# busapi 실시간 API 설정
+# station_realtime: 노선별 도착정보를 동시에 호출할 때 전체 응답 마감 시간(초) / 동시 호출 수
+STATION_REALTIME_DEADLINE = 6.0
+STATION_REALTIME_MAX_WORKERS = 16
+
+# apis.data.go.kr/6410000 공용 HTTP 클라이언트 (busapi/upstream.py 의 DEFAULT_CONFIG 를 덮어씀)
+BUSAPI_UPSTREAM = {
+    'pool_maxsize': 32,
+    'retries': 2,
+    'backoff_factor': 0.2,
+    # [connect, read] 초. read timeout 은 재시도하지 않으므로 호출 하나는 대략 connect * 3 + read 안에 끝남
+    # (bus_arrival 은 STATION_REALTIME_DEADLINE 6초보다 짧게)
+    'default_timeout': [1, 5],
+    'timeouts': {
+        'bus_location': [1, 5],
+        'route_info': [1, 3],
+        'bus_arrival': [1, 4],
+    },
+}
+
+# 노선 실시간 위치(getBusLocationListv2) 캐시 TTL(초)
+# 워커 간에도 공유하려면 CACHES 를 Redis/Memcached 등 공유 backend 로 설정
+BUS_LOCATION_CACHE_TTL = 5
+
+# routes.json 에 없는 노선의 routeName 을 upstream 에서 받아 보관하는 시간(초)
+ROUTE_INFO_CACHE_TTL = 24 * 60 * 60
+
+# manage.py poll_realtime: 실시간 위치를 미리 조회해 둘 노선 (비어 있으면 routes.json 전체) / 주기(초)
+REALTIME_HOT_ROUTES = ['234001736']
+REALTIME_POLL_INTERVAL = 10.0
+# poll_realtime 스냅샷 유효 시간(초), 파일 저장소 경로 (None 이면 Django cache 만 사용)
+REALTIME_SNAPSHOT_MAX_AGE = 30
+REALTIME_SNAPSHOT_DIR = None
+
+# 실시간 위치 응답을 bus_arrival_past 에 적재 (busapi/ingest.py)
+BUSAPI_INGEST = {
+    'enabled': False,
+    'batch_size': 5000,
+    'flush_interval': 2.0,
+    'max_buffer': 100000,
+}
+
+# 증분 학습 (manage.py train_model --incremental): 이어서 추가할 트리 수,
+# 새 데이터 RMSE(좌석 수)가 이 값을 넘거나 트리가 MAX_TREES 를 넘으면 슬롯 집계로 처음부터 재학습
+BUSAPI_TRAIN_INCREMENTAL_ROUNDS = 30
+BUSAPI_TRAIN_DRIFT_THRESHOLD = 3.0
+BUSAPI_TRAIN_MAX_TREES = 600
+
+# /api/train/ 백그라운드 학습 작업 상태 파일 위치 (None 이면 busapi/train_jobs/),
+# 이 시간(초)보다 오래 끝나지 않은 작업의 lock 은 무시하고 새 학습을 허용
+BUSAPI_TRAIN_JOB_DIR = None
+BUSAPI_TRAIN_JOB_TIMEOUT = 6 * 60 * 60
+
+# 모델 버전 저장소 위치 (None 이면 busapi/model_registry/), 남겨 둘 이전 버전 수
+# 롤백: python manage.py rollback_model [--to VERSION]
+BUSAPI_MODEL_REGISTRY_DIR = None
+BUSAPI_MODEL_REGISTRY_KEEP = 10
+
+# 노선 feature 방식: 'onehot' (routeid_<id> 컬럼) / 'code' (route_code 정수 컬럼 하나)
+# 비교: python manage.py bench_route_encoding [--replicate N]
+BUSAPI_ROUTE_ENCODING = 'onehot'
+
+# bus_arrival_past 날짜별 파티션 (manage.py arrival_partitions): 미리 만들 파티션 일수,
+# 보관 일수 (None 이면 삭제 안 함. 파티션 변환은 --convert 로 한 번)
+BUSAPI_ARRIVAL_PARTITION_AHEAD = 7
+BUSAPI_ARRIVAL_RETENTION_DAYS = None
+
+# 학습용 이력 스냅샷 위치 (None 이면 busapi/history_snapshot/)
+# python manage.py export_history_snapshot → python manage.py train_model --from-snapshot
+BUSAPI_HISTORY_SNAPSHOT_DIR = None
+
+# 정적 노선 데이터 스냅샷 위치 (None 이면 busapi/data/compiled/), 워커가 새 버전을 확인하는 간격(초)
+# python manage.py compile_static_data (없으면 busapi/data/*.json 을 직접 읽음)
+BUSAPI_STATIC_SNAPSHOT_DIR = None
+BUSAPI_STATIC_DATA_CHECK_INTERVAL = 5.0
+
+# 경로 추천 (recommend-route): 시간표가 없어서 정류장 한 칸 소요 시간(분)과 환승 한 번 시간(분)으로 추정, 최대 환승 횟수
+BUSAPI_ROUTE_MINUTES_PER_STOP = 2.0
+BUSAPI_ROUTE_TRANSFER_MINUTES = 5.0
+BUSAPI_ROUTE_MAX_TRANSFERS = 2
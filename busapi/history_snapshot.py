@@ -0,0 +1,123 @@
+# history_snapshot.py
+"""
+bus_arrival_past 의 날짜별 컬럼 파일 스냅샷 (학습할 때마다 DB 전체를 다시 읽지 않기 위해)
+
+    history_snapshot/
+        manifest.json                 # routes(노선 코드표), days(날짜별 행 수), high_water_mark
+        days/
+            20251201/
+                routeid.npy           # int32  노선 코드 (manifest["routes"] 의 인덱스)
+                remainseatcnt1.npy    # int16
+                station_num.npy       # int16
+                time_min.npy          # int16  시*60+분
+
+- 내보내기(ml_train.export_history_snapshot)는 마지막으로 내보낸 날(덜 쌓였을 수 있음)부터 다시 쓰고
+  그 이전 날짜 디렉토리는 건드리지 않는다.
+- 날짜 디렉토리는 임시 디렉토리에 다 쓴 뒤 rename, manifest 는 맨 마지막에 tmp + os.replace
+- 읽을 때는 np.load(mmap_mode="r") 로 열어서 파일을 메모리로 복사하지 않는다.
+
+저장 위치: settings.BUSAPI_HISTORY_SNAPSHOT_DIR (기본 busapi/history_snapshot/)
+"""
+
+import datetime
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+
+MANIFEST_FILE = "manifest.json"
+COLUMNS = {
+    "routeid": np.int32,
+    "remainseatcnt1": np.int16,
+    "station_num": np.int16,
+    "time_min": np.int16,
+}
+
+
+def snapshot_dir(path=None) -> Path:
+    return Path(
+        path
+        or getattr(settings, "BUSAPI_HISTORY_SNAPSHOT_DIR", None)
+        or Path(settings.BASE_DIR) / "busapi" / "history_snapshot"
+    )
+
+
+def _day_dir(root: Path, day: str) -> Path:
+    return root / "days" / day
+
+
+def read_manifest(root: Path) -> dict:
+    try:
+        manifest = json.loads((root / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        manifest = {}
+    manifest.setdefault("routes", [])
+    manifest.setdefault("days", {})
+    manifest.setdefault("high_water_mark", None)
+    return manifest
+
+
+def write_manifest(root: Path, manifest: dict):
+    path = root / MANIFEST_FILE
+    tmp = path.with_name(f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def high_water_mark(manifest: dict):
+    """스냅샷에 들어 있는 가장 최근 timestamp (naive datetime, 비어 있으면 None)"""
+    value = manifest.get("high_water_mark")
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def write_day(root: Path, day: str, columns: dict) -> int:
+    """하루치 컬럼 배열을 days/<day>/ 에 쓰고 (있으면 교체) 행 수를 돌려준다."""
+    days_dir = root / "days"
+    days_dir.mkdir(parents=True, exist_ok=True)
+    tmp = days_dir / f".tmp-{day}-{uuid.uuid4().hex}"
+    tmp.mkdir()
+    try:
+        for name, dtype in COLUMNS.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(columns[name], dtype=dtype))
+
+        target = _day_dir(root, day)
+        if target.exists():
+            # 디렉토리는 os.replace 로 덮어쓸 수 없으므로 기존 것을 옆으로 치운 뒤 교체
+            old = days_dir / f".old-{day}-{uuid.uuid4().hex}"
+            os.rename(target, old)
+            os.rename(tmp, target)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.rename(tmp, target)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return len(columns["routeid"])
+
+
+def open_day(root: Path, day: str) -> dict:
+    """하루치 컬럼 (읽기 전용 memmap)"""
+    return {
+        name: np.load(_day_dir(root, day) / f"{name}.npy", mmap_mode="r")
+        for name in COLUMNS
+    }
+
+
+def iter_days(root: Path, manifest: dict):
+    """(날짜, 컬럼 memmap dict) 를 날짜 순서대로"""
+    for day in sorted(manifest["days"]):
+        if manifest["days"][day]:
+            yield day, open_day(root, day)
+
+
+def clear(root: Path):
+    """스냅샷 전체 삭제 (--rebuild)"""
+    shutil.rmtree(root / "days", ignore_errors=True)
+    try:
+        (root / MANIFEST_FILE).unlink()
+    except FileNotFoundError:
+        pass
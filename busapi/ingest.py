@@ -0,0 +1,241 @@
+# ingest.py
+"""
+실시간 위치 응답(getBusLocationListv2) → bus_arrival_past 적재
+
+- 요청 처리 스레드에서는 정규화해서 메모리 버퍼에 넣기만 한다. (DB 접근 없음)
+- 백그라운드 스레드가 모아서 한 번에 적재
+    PostgreSQL : COPY → 임시 테이블 → INSERT ... SELECT ... ON CONFLICT DO NOTHING
+    그 외      : executemany INSERT ... ON CONFLICT DO NOTHING
+- 중복 제거 키: (routeid, vehid1, station_num, timestamp) = UNIQUE 제약 bus_past_unique_key
+  여러 워커가 같은 행을 동시에 적재해도 하나만 들어간다.
+  같은 버스가 같은 정류장에 머무는 동안 반복 조회돼도 정류장이 바뀔 때만 한 행으로 기록한다.
+
+settings.BUSAPI_INGEST["enabled"] 가 True 일 때만 동작한다.
+"""
+
+import io
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import bus_arrival_past
+
+
+DEFAULT_CONFIG = {
+    "enabled": False,
+    "batch_size": 5000,       # 한 번에 적재할 최대 행 수
+    "flush_interval": 2.0,    # 버퍼가 덜 찼어도 이 간격(초)마다 적재
+    "max_buffer": 100000,     # 버퍼 상한 (넘치면 오래된 행부터 버림)
+}
+
+_TRACK_LIMIT = 50000  # 마지막 위치를 기억할 (routeid, vehid) 수
+
+_buffer = deque()
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher = None
+
+# (routeid, vehid1) → 마지막으로 기록한 station_num
+_last_station = OrderedDict()
+
+stats = {"queued": 0, "written": 0, "dropped": 0, "flushes": 0, "errors": 0}
+
+
+def get_config() -> dict:
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, "BUSAPI_INGEST", {}))
+    return config
+
+
+def parse_query_time(query_time: str):
+    """ "2025-12-03 19:24:45.979" → datetime (실패하면 None) """
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(query_time, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_locations(routeid: str, query_time: str, loc_list) -> list:
+    """위치 목록 → bus_arrival_past 행 튜플 (routeid, timestamp, remainseatcnt1, vehid1, station_num)"""
+    timestamp = parse_query_time(query_time)
+    if timestamp is None:
+        return []
+
+    rows = []
+    for item in loc_list:
+        vehid = _to_int(item.get("vehId"))
+        station_num = _to_int(item.get("stationSeq"))
+        remainseat = _to_int(item.get("remainSeatCnt"))
+        if vehid is None or station_num is None or remainseat is None or remainseat < 0:
+            continue
+        rows.append(
+            (str(item.get("routeId") or routeid), timestamp, remainseat, vehid, station_num)
+        )
+    return rows
+
+
+def submit_locations(routeid: str, query_time: str, loc_list):
+    """
+    upstream 응답을 버퍼에 넣는다. (요청 스레드에서 호출, DB 접근 없음)
+    정류장이 바뀐 버스만 새 행으로 기록한다.
+    """
+    config = get_config()
+    if not config["enabled"]:
+        return
+
+    rows = normalize_locations(routeid, query_time, loc_list)
+    if not rows:
+        return
+
+    with _lock:
+        for row in rows:
+            key = (row[0], row[3])
+            if _last_station.get(key) == row[4]:
+                continue
+            _last_station[key] = row[4]
+            _last_station.move_to_end(key)
+            if len(_last_station) > _TRACK_LIMIT:
+                _last_station.popitem(last=False)
+
+            if len(_buffer) >= config["max_buffer"]:
+                _buffer.popleft()
+                stats["dropped"] += 1
+            _buffer.append(row)
+            stats["queued"] += 1
+
+        full = len(_buffer) >= config["batch_size"]
+
+    _ensure_flusher()
+    if full:
+        _wakeup.set()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_flush_loop, name="bus-ingest", daemon=True)
+        _flusher.start()
+
+
+def _drain(limit: int) -> list:
+    with _lock:
+        n = min(limit, len(_buffer))
+        return [_buffer.popleft() for _ in range(n)]
+
+
+def _flush_loop():
+    while True:
+        config = get_config()
+        _wakeup.wait(timeout=config["flush_interval"])
+        _wakeup.clear()
+        try:
+            flush(config["batch_size"])
+        except Exception as e:
+            stats["errors"] += 1
+            print("bus ingest flush error:", e)
+        finally:
+            connection.close()  # 스레드 전용 DB 커넥션 정리
+
+
+def flush(batch_size=None) -> int:
+    """버퍼에 쌓인 행을 모두 적재하고, 새로 들어간 행 수를 돌려준다."""
+    batch_size = batch_size or get_config()["batch_size"]
+    written = 0
+    while True:
+        rows = _drain(batch_size)
+        if not rows:
+            return written
+
+        # 같은 배치 안의 중복 제거
+        rows = list(dict.fromkeys(rows))
+        started = time.monotonic()
+        try:
+            n = write_rows(rows)
+        except Exception:
+            # 실패한 배치는 버퍼 앞에 되돌려서 다음 주기에 다시 시도
+            with _lock:
+                _buffer.extendleft(reversed(rows))
+            raise
+
+        written += n
+        stats["written"] += n
+        stats["flushes"] += 1
+        print(
+            f"[ingest] {len(rows)} rows → {n} new "
+            f"({len(rows) / max(time.monotonic() - started, 1e-6):.0f} rows/s)"
+        )
+
+
+def write_rows(rows) -> int:
+    """(routeid, timestamp, remainseatcnt1, vehid1, station_num) 행들을 중복 없이 적재"""
+    if connection.vendor == "postgresql":
+        return _copy_rows_postgres(rows)
+    return _insert_rows(rows)
+
+
+_COLUMNS = ("routeid", "timestamp", "remainseatcnt1", "vehid1", "station_num")
+_KEY_COLUMNS = ("routeid", "vehid1", "station_num", "timestamp")
+
+
+def _copy_rows_postgres(rows) -> int:
+    qn = connection.ops.quote_name
+    table = qn(bus_arrival_past._meta.db_table)
+    cols = ", ".join(qn(c) for c in _COLUMNS)
+    key = ", ".join(qn(c) for c in _KEY_COLUMNS)
+
+    data = io.StringIO()
+    for routeid, ts, remainseat, vehid, station_num in rows:
+        data.write(f"{routeid}\t{ts.isoformat(sep=' ')}\t{remainseat}\t{vehid}\t{station_num}\n")
+    data.seek(0)
+
+    # ON COMMIT DELETE ROWS: 트랜잭션이 끝나면 임시 테이블은 자동으로 비워진다
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS bus_ingest_stage ON COMMIT DELETE ROWS "
+            f"AS SELECT {cols} FROM {table} WITH NO DATA"
+        )
+        raw = cursor.cursor
+        copy_sql = f"COPY bus_ingest_stage ({cols}) FROM STDIN"
+        if hasattr(raw, "copy_expert"):     # psycopg2
+            raw.copy_expert(copy_sql, data)
+        else:                               # psycopg 3
+            with raw.copy(copy_sql) as copy:
+                copy.write(data.getvalue())
+
+        cursor.execute(
+            f"INSERT INTO {table} ({cols}) SELECT {cols} FROM bus_ingest_stage "
+            f"ON CONFLICT ({key}) DO NOTHING"
+        )
+        return cursor.rowcount
+
+
+def _insert_rows(rows) -> int:
+    qn = connection.ops.quote_name
+    table = qn(bus_arrival_past._meta.db_table)
+    cols = ", ".join(qn(c) for c in _COLUMNS)
+    key = ", ".join(qn(c) for c in _KEY_COLUMNS)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({cols}) VALUES (%s, %s, %s, %s, %s) "
+            f"ON CONFLICT ({key}) DO NOTHING",
+            rows,
+        )
+        return cursor.rowcount
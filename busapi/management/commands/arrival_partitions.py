@@ -0,0 +1,249 @@
+# management/commands/arrival_partitions.py
+"""
+bus_arrival_past 를 운행일(timestamp 의 날짜) 단위로 파티션 나누기 + 보관 기간 정리
+
+    python manage.py arrival_partitions --convert          # (PostgreSQL) 일반 테이블 → 날짜별 RANGE 파티션 테이블
+    python manage.py arrival_partitions                    # 오늘부터 --ahead 일치 파티션 미리 생성
+    python manage.py arrival_partitions --retain-days 90   # 90일보다 오래된 데이터 삭제
+    python manage.py arrival_partitions --dry-run ...      # 실행할 SQL 만 출력
+
+- 파티션 이름: <테이블>_pYYYYMMDD, 범위 밖 값(과거/NULL)은 <테이블>_default 로
+- 파티션 키가 PK 에 포함돼야 해서 PK 는 (id, timestamp) 가 된다.
+- --convert 는 한 트랜잭션에서 새 테이블로 복사하고 이름을 바꾼다 (그동안 테이블 잠김).
+  원래 테이블은 <테이블>_unpartitioned 로 남겨 두니 확인 후 직접 DROP.
+- 파티션 테이블이면 보관 기간 정리는 DROP TABLE (파티션 단위), 아니면 batch DELETE
+"""
+
+import datetime
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from busapi import ml_train
+from busapi.models import bus_arrival_past
+
+
+DELETE_BATCH_SIZE = 10000
+
+
+def _table() -> str:
+    return bus_arrival_past._meta.db_table
+
+
+def _partition_name(day: datetime.date) -> str:
+    return f"{_table()}_p{day:%Y%m%d}"
+
+
+def _is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [_table()])
+        row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def _partition_days() -> dict:
+    """{날짜: 파티션 이름} (default 파티션 제외)"""
+    pattern = re.compile(re.escape(_table()) + r"_p(\d{8})$")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [_table()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    days = {}
+    for name in names:
+        m = pattern.match(name)
+        if m:
+            days[datetime.datetime.strptime(m.group(1), "%Y%m%d").date()] = name
+    return days
+
+
+class Command(BaseCommand):
+    help = "bus_arrival_past 날짜별 파티션 관리 / 보관 기간 정리"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true",
+                            help="(PostgreSQL) 테이블을 날짜별 RANGE 파티션 테이블로 변환")
+        parser.add_argument("--ahead", type=int,
+                            default=getattr(settings, "BUSAPI_ARRIVAL_PARTITION_AHEAD", 7),
+                            help="오늘부터 미리 만들어 둘 파티션 일수")
+        parser.add_argument("--retain-days", type=int,
+                            default=getattr(settings, "BUSAPI_ARRIVAL_RETENTION_DAYS", None),
+                            help="이 일수보다 오래된 데이터 삭제 (기본: 삭제 안 함)")
+        parser.add_argument("--dry-run", action="store_true", help="실행하지 않고 SQL 만 출력")
+
+    def _execute(self, sql, params=()):
+        if self.dry_run:
+            self.stdout.write(sql.rstrip() + ";" + (f"  -- {list(params)}" if params else ""))
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def handle(self, *args, **options):
+        self.dry_run = options["dry_run"]
+        today = timezone.localdate()
+
+        if options["convert"]:
+            if connection.vendor != "postgresql":
+                raise CommandError("파티션 변환은 PostgreSQL 에서만 지원합니다.")
+            if _is_partitioned():
+                raise CommandError(f"{_table()} 는 이미 파티션 테이블입니다.")
+            self._convert(today, options["ahead"])
+        elif _is_partitioned():
+            self._create_ahead(today, options["ahead"])
+
+        if options["retain_days"] is not None:
+            cutoff = today - datetime.timedelta(days=options["retain_days"])
+            if _is_partitioned():
+                self._drop_partitions(cutoff)
+            else:
+                self._delete_rows(cutoff)
+
+    # -----------------------------
+    #  변환
+    # -----------------------------
+    def _create_partition(self, day: datetime.date, parent: str, if_not_exists=False):
+        qn = connection.ops.quote_name
+        self._execute(
+            f"CREATE TABLE {'IF NOT EXISTS ' if if_not_exists else ''}{qn(_partition_name(day))} "
+            f"PARTITION OF {qn(parent)} FOR VALUES FROM (%s) TO (%s)",
+            [day, day + datetime.timedelta(days=1)],
+        )
+
+    def _convert(self, today: datetime.date, ahead: int):
+        qn = connection.ops.quote_name
+        table = _table()
+        new_table = f"{table}_partitioned"
+        old_table = f"{table}_unpartitioned"
+        ts = qn("timestamp")
+
+        with transaction.atomic():
+            self._execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT MIN({ts})::date, pg_get_serial_sequence(%s, 'id'), "
+                    "(SELECT attidentity FROM pg_attribute "
+                    " WHERE attrelid = %s::regclass AND attname = 'id') "
+                    f"FROM {qn(table)}",
+                    [table, table],
+                )
+                first_day, sequence, identity = cursor.fetchone()
+
+            self._execute(
+                f"CREATE TABLE {qn(new_table)} "
+                f"(LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+                f"PARTITION BY RANGE ({ts})"
+            )
+            self._execute(f"ALTER TABLE {qn(new_table)} ADD PRIMARY KEY (id, {ts})")
+
+            last_day = today + datetime.timedelta(days=ahead)
+            day = min(first_day or today, today)
+            while day <= last_day:
+                self._create_partition(day, new_table)
+                day += datetime.timedelta(days=1)
+            self._execute(
+                f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(new_table)} DEFAULT"
+            )
+
+            self._execute(
+                f"INSERT INTO {qn(new_table)} OVERRIDING SYSTEM VALUE SELECT * FROM {qn(table)}"
+            )
+            if identity:
+                # 새 identity 시퀀스를 기존 id 다음부터
+                self._execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {qn(new_table)}), false)",
+                    [new_table],
+                )
+            elif sequence:
+                # serial 시퀀스는 원래 테이블 소유라 그대로 두면 _unpartitioned 를 DROP 할 때 같이 지워진다
+                self._execute(f"ALTER SEQUENCE {sequence} OWNED BY {qn(new_table)}.id")
+
+            # 인덱스 이름은 스키마 안에서 유일해야 해서 원래 테이블 인덱스부터 이름을 바꾼다
+            # (UNIQUE 제약의 인덱스 이름을 바꾸면 제약 이름도 같이 바뀐다)
+            meta = bus_arrival_past._meta
+            self._execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+            for index in [*meta.indexes, *meta.constraints]:
+                self._execute(
+                    f"ALTER INDEX IF EXISTS {qn(index.name)} RENAME TO {qn(index.name + '_unpart')}"
+                )
+            self._execute(f"ALTER TABLE {qn(new_table)} RENAME TO {qn(table)}")
+
+            # 파티션 테이블에 만든 인덱스/제약은 모든 파티션(이후 생길 파티션 포함)에 적용된다
+            with connection.schema_editor(collect_sql=self.dry_run) as editor:
+                for index in meta.indexes:
+                    if self.dry_run:
+                        self.stdout.write(str(index.create_sql(bus_arrival_past, editor)) + ";")
+                    else:
+                        editor.add_index(bus_arrival_past, index)
+                for constraint in meta.constraints:
+                    if self.dry_run:
+                        self.stdout.write(str(constraint.create_sql(bus_arrival_past, editor)) + ";")
+                    else:
+                        editor.add_constraint(bus_arrival_past, constraint)
+
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{table}: 파티션 테이블로 변환 (원래 테이블은 {old_table})"
+            + (" [dry-run]" if self.dry_run else "")
+        )
+
+    # -----------------------------
+    #  파티션 유지 관리
+    # -----------------------------
+    def _create_ahead(self, today: datetime.date, ahead: int):
+        existing = _partition_days()
+        created = 0
+        for offset in range(ahead + 1):
+            day = today + datetime.timedelta(days=offset)
+            if day not in existing:
+                self._create_partition(day, _table(), if_not_exists=True)
+                created += 1
+        self.stdout.write(f"파티션 {created}개 생성 (~{today + datetime.timedelta(days=ahead)})")
+
+    def _drop_partitions(self, cutoff: datetime.date):
+        qn = connection.ops.quote_name
+        dropped = 0
+        for day, name in sorted(_partition_days().items()):
+            if day + datetime.timedelta(days=1) <= cutoff:
+                self._execute(f"DROP TABLE {qn(name)}")
+                dropped += 1
+
+        # default 파티션에 들어간 cutoff 이전 행
+        deleted = self._delete_rows(cutoff, report=False)
+        self.stdout.write(f"{cutoff} 이전: 파티션 {dropped}개 삭제, 행 {deleted}개 삭제")
+
+    def _delete_rows(self, cutoff: datetime.date, report=True) -> int:
+        cutoff_at = datetime.datetime.combine(cutoff, datetime.time.min)
+        older = bus_arrival_past.objects.filter(
+            RawSQL(f"{ml_train._timestamp_column()} < %s", [cutoff_at], output_field=BooleanField())
+        )
+
+        if self.dry_run:
+            sql, params = older.values("id").query.sql_with_params()
+            self.stdout.write(f"DELETE ... WHERE id IN ({sql} LIMIT {DELETE_BATCH_SIZE});  -- {list(params)}")
+            return 0
+
+        # 한 번에 지우면 긴 트랜잭션/락이 생기므로 batch 로 나눠서 삭제 (bus_past_ts_idx 사용)
+        deleted = 0
+        while True:
+            ids = list(older.values_list("id", flat=True)[:DELETE_BATCH_SIZE])
+            if not ids:
+                break
+            deleted += bus_arrival_past.objects.filter(id__in=ids).delete()[0]
+
+        if report:
+            self.stdout.write(f"{cutoff} 이전 행 {deleted}개 삭제")
+        return deleted
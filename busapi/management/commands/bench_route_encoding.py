@@ -0,0 +1,94 @@
+# management/commands/bench_route_encoding.py
+"""
+노선 feature 방식(one-hot / 정수 코드) 비교 벤치마크. 모델은 저장하지 않는다.
+
+    python manage.py bench_route_encoding
+    python manage.py bench_route_encoding --replicate 6   # 노선 수를 6배로 늘린 가상 데이터로
+
+항목: 학습 시간, train RMSE, feature 수, pickle 크기, 컴파일 트리 크기,
+      노선 1개 × 슬롯 1개 예측 지연 (xgboost / numpy 트리)
+"""
+
+import io
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from busapi import tree_engine
+from busapi.ml_predict import SLOT_CENTERS, predict_rows
+from busapi.ml_train import (
+    FULL_ROUNDS,
+    _fit,
+    build_route_station_index,
+    feature_spec,
+    load_slot_table_from_db,
+)
+
+
+def _replicate(agg: pd.DataFrame, times: int) -> pd.DataFrame:
+    """노선을 복제해서 노선 수를 times 배로 (복제본은 좌석 수를 조금씩 바꿈)"""
+    parts = [agg]
+    for k in range(1, times):
+        copy = agg.copy()
+        copy["routeid"] = copy["routeid"] + f"-{k}"
+        copy["y"] = (copy["y"] + (k % 5) * 2 - 4).clip(0, 45)
+        parts.append(copy)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _timeit(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = "routeid one-hot vs 정수 코드 학습/예측 벤치마크"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--replicate", type=int, default=1, help="노선 수 배수 (가상 데이터)")
+        parser.add_argument("--repeat", type=int, default=200, help="예측 지연 측정 반복 수")
+
+    def handle(self, *args, **options):
+        agg = load_slot_table_from_db()
+        if options["replicate"] > 1:
+            agg = _replicate(agg, options["replicate"])
+        route_stations = build_route_station_index(agg)
+        self.stdout.write(f"{len(agg)} slot rows, {len(route_stations)} routes")
+
+        rid = next(iter(route_stations))
+        stations = route_stations[rid]
+        centers = [SLOT_CENTERS[3]] * len(stations)
+
+        header = f"{'encoding':<8} {'features':>8} {'train s':>8} {'rmse':>7} {'pkl KB':>8} {'npz KB':>8} {'xgb ms':>8} {'numpy ms':>8}"
+        self.stdout.write(header)
+        for encoding in ("onehot", "code"):
+            spec = feature_spec(agg["routeid"], encoding)
+
+            started = time.perf_counter()
+            model, rmse = _fit(agg, FULL_ROUNDS, spec)
+            train_s = time.perf_counter() - started
+
+            payload = {"model": model, **spec, "route_stations": route_stations}
+            buf = io.BytesIO()
+            joblib.dump(payload, buf)
+
+            arrays = tree_engine.compile_booster(model.get_booster())
+            compiled = tree_engine.CompiledModel(
+                arrays, spec["feature_cols"], spec["routeid_columns"], route_stations,
+                "bench", route_codes=spec.get("route_codes"),
+            )
+            npz_kb = sum(np.asarray(a).nbytes for a in arrays.values()) / 1024
+
+            xgb_ms = _timeit(lambda: predict_rows(payload, [rid] * len(stations), stations, centers), options["repeat"])
+            np_ms = _timeit(lambda: predict_rows(compiled, [rid] * len(stations), stations, centers), options["repeat"])
+
+            self.stdout.write(
+                f"{encoding:<8} {len(spec['feature_cols']):>8} {train_s:>8.2f} {rmse:>7.3f} "
+                f"{len(buf.getvalue()) / 1024:>8.0f} {npz_kb:>8.0f} {xgb_ms:>8.2f} {np_ms:>8.2f}"
+            )
@@ -0,0 +1,90 @@
+# management/commands/bench_startup.py
+"""
+워커 cold start 벤치마크: 새 파이썬 프로세스에서 django.setup() + URLconf import 에 걸리는 시간
+
+    python manage.py bench_startup                  # 5회 중앙값
+    python manage.py bench_startup --repeat 10 --top 15
+
+항목: 전체 시간(django.setup ~ URLconf import), import 된 무거운 모듈 (numpy, pandas, xgboost, aiohttp ...),
+      -X importtime 기준 누적 import 시간이 긴 busapi / 무거운 모듈 (--top)
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+HEAVY_MODULES = ("numpy", "pandas", "sklearn", "xgboost", "joblib", "aiohttp")
+
+_CHILD = """
+import sys, time
+started = time.perf_counter()
+import django
+django.setup()
+import importlib
+importlib.import_module({urlconf!r})
+elapsed = time.perf_counter() - started
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed:.6f}} {{','.join(heavy)}}")
+"""
+
+
+def _run_child(urlconf: str, importtime: bool = False):
+    code = _CHILD.format(urlconf=urlconf, heavy=HEAVY_MODULES)
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    result = subprocess.run(
+        cmd, capture_output=True, text=True, check=True,
+        cwd=settings.BASE_DIR,
+        # 같은 설정 모듈 / sys.path 로 실행
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p)),
+    )
+    return result.stdout.strip().splitlines()[-1], result.stderr
+
+
+def _parse_importtime(stderr: str):
+    """-X importtime 출력 → [(누적 μs, 모듈)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "워커 cold start (django.setup + URLconf import) 시간 측정"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="측정 횟수 (중앙값 출력)")
+        parser.add_argument("--top", type=int, default=10, help="누적 import 시간 상위 모듈 수 (0 이면 생략)")
+
+    def handle(self, *args, **options):
+        urlconf = settings.ROOT_URLCONF
+        times = []
+        heavy = ""
+        for _ in range(options["repeat"]):
+            line, _ = _run_child(urlconf)
+            elapsed, _, heavy = line.partition(" ")
+            times.append(float(elapsed))
+
+        self.stdout.write(
+            f"cold start ({urlconf}): median {statistics.median(times) * 1000:.0f} ms, "
+            f"min {min(times) * 1000:.0f} ms ({len(times)} runs)"
+        )
+        self.stdout.write(f"heavy modules imported: {heavy or '-'}")
+
+        if options["top"] > 0:
+            _, stderr = _run_child(urlconf, importtime=True)
+            rows = _parse_importtime(stderr)
+            # busapi 모듈과 무거운 패키지만 (누적 시간이 긴 순서)
+            relevant = [
+                (us, name) for us, name in rows
+                if name.startswith("busapi") or name in HEAVY_MODULES
+            ]
+            for us, name in sorted(relevant, reverse=True)[: options["top"]]:
+                self.stdout.write(f"  {us / 1000:8.1f} ms  {name}")
@@ -0,0 +1,59 @@
+# management/commands/compile_static_data.py
+"""
+busapi/data/*.json → memory-map 용 정적 데이터 스냅샷 (busapi/static_snapshot.py)
+
+    python manage.py compile_static_data            # JSON 이 바뀌었으면 새 버전을 만들고 CURRENT 교체
+    python manage.py compile_static_data --list     # 버전 목록
+    python manage.py compile_static_data --to VERSION
+
+실행 중인 워커는 BUSAPI_STATIC_DATA_CHECK_INTERVAL 안에 새 버전으로 바뀐다. (재시작 불필요)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from busapi import static_snapshot
+
+
+class Command(BaseCommand):
+    help = "정적 노선/정류장 JSON 을 memory-map 스냅샷으로 컴파일"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data-dir", default="", help="원본 JSON 디렉토리 (기본: busapi/data)")
+        parser.add_argument("--force", action="store_true", help="같은 버전이 있어도 다시 컴파일")
+        parser.add_argument("--list", action="store_true", help="버전 목록만 출력")
+        parser.add_argument("--to", default="", help="이미 만든 버전으로 CURRENT 변경 (롤백)")
+
+    def handle(self, *args, **options):
+        current = static_snapshot.current_version()
+
+        if options["list"]:
+            for version in static_snapshot.list_versions():
+                meta = static_snapshot.open_snapshot(version).meta
+                mark = "*" if version == current else " "
+                self.stdout.write(
+                    f"{mark} {version}  stations={meta['stations']} routes={meta['routes']} "
+                    f"stops={meta['stops']} bytes={meta['bytes']}"
+                )
+            return
+
+        if options["to"]:
+            if options["to"] not in static_snapshot.list_versions():
+                raise CommandError(f"static snapshot version not found: {options['to']}")
+            static_snapshot.promote(options["to"])
+            self.stdout.write(f"{current} → {options['to']}")
+            return
+
+        try:
+            version, created = static_snapshot.compile_snapshot(
+                options["data_dir"] or None, force=options["force"]
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        meta = static_snapshot.open_snapshot(version).meta
+        self.stdout.write(
+            f"{'compiled' if created else 'unchanged'} {version}: "
+            f"{meta['stations']} stations, {meta['routes']} routes, {meta['stops']} stops, "
+            f"{meta['strings']} strings, {meta['bytes'] / 1024:.0f} KB"
+            + (f" ({current} → {version})" if current != version else "")
+        )
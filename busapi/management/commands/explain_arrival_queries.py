@@ -0,0 +1,103 @@
+# management/commands/explain_arrival_queries.py
+"""
+bus_arrival_past 조회 쿼리들이 인덱스를 타는지 EXPLAIN 으로 확인한다.
+
+    python manage.py explain_arrival_queries            # 실패가 있으면 종료 코드 1
+    python manage.py explain_arrival_queries --verbose  # 실행 계획 전체 출력
+    python manage.py explain_arrival_queries --analyze  # 테이블 통계(ANALYZE) 갱신 후 확인
+
+통계가 없으면 플래너가 엉뚱한 계획을 고를 수 있으니 처음엔 --analyze 로 ANALYZE 부터.
+PostgreSQL 은 테이블이 작으면 인덱스가 있어도 seq scan 을 고를 수 있어서,
+그 경우 enable_seqscan = off 로 한 번 더 확인하고 "(seqscan off)" 로 표시한다.
+"""
+
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from busapi import ml_train
+from busapi.models import bus_arrival_past
+
+
+def _uses_index(plan: str, index_names) -> bool:
+    # PostgreSQL: "Index Scan using <name>", "Index Only Scan using <name>", "Bitmap Index Scan on <name>"
+    # SQLite: "SEARCH ... USING INDEX <name>", "USING COVERING INDEX <name>"
+    return any(name in plan for name in index_names)
+
+
+def _explain(sql: str, params) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(connection.ops.explain_query_prefix() + " " + sql, params)
+        return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+
+
+class Command(BaseCommand):
+    help = "bus_arrival_past 조회 쿼리의 실행 계획(인덱스 사용 여부) 확인"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routeid", default="", help="확인에 쓸 노선 (기본: 테이블의 첫 노선)")
+        parser.add_argument("--verbose", action="store_true", help="실행 계획 전체 출력")
+        parser.add_argument("--analyze", action="store_true", help="먼저 ANALYZE 로 테이블 통계 갱신")
+
+    def _checks(self, routeid, since, until):
+        """(이름, 사용해야 하는 인덱스 (중 하나), SQL, params)"""
+        route_stations = (
+            bus_arrival_past.objects.filter(routeid=routeid)
+            .values_list("station_num", flat=True)
+            .distinct()
+        )
+        route_window = ml_train.filter_timestamp_range(
+            bus_arrival_past.objects.filter(routeid=routeid), since, until
+        ).values_list("station_num", "remainseatcnt1")
+
+        qn = connection.ops.quote_name
+        hwm_sql = f"SELECT MAX({ml_train._timestamp_column()}) FROM {qn(bus_arrival_past._meta.db_table)}"
+
+        checks = [
+            ("route stations", ("bus_past_route_station_idx",), *route_stations.query.sql_with_params()),
+            ("route window", ("bus_past_route_ts_idx",), *route_window.query.sql_with_params()),
+            ("high-water mark", ("bus_past_ts_idx",), hwm_sql, ()),
+            # 노선 수가 적으면 (routeid, timestamp) 인덱스를 노선별로 건너뛰며 범위 검색하기도 한다
+            ("incremental slots", ("bus_past_ts_idx", "bus_past_route_ts_idx"),
+             *ml_train.slot_table_queryset(since=since).query.sql_with_params()),
+        ]
+        return checks
+
+    def handle(self, *args, **options):
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(bus_arrival_past._meta.db_table)}")
+
+        routeid = options["routeid"] or (
+            bus_arrival_past.objects.values_list("routeid", flat=True).first()
+        )
+        until = ml_train.get_high_water_mark()
+        if routeid is None or until is None:
+            raise CommandError("bus_arrival_past 에 행이 없습니다.")
+        since = until - datetime.timedelta(days=1)
+
+        failed = []
+        for name, index_names, sql, params in self._checks(routeid, since, until):
+            plan = _explain(sql, params)
+            note = ""
+            if not _uses_index(plan, index_names) and connection.vendor == "postgresql":
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                    plan = _explain(sql, params)
+                note = " (seqscan off)"
+
+            ok = _uses_index(plan, index_names)
+            if not ok:
+                failed.append(name)
+            self.stdout.write(f"{'OK  ' if ok else 'FAIL'} {name:<18} {' | '.join(index_names)}{note}")
+            if options["verbose"] or not ok:
+                for line in plan.splitlines():
+                    self.stdout.write(f"       {line}")
+
+        if failed:
+            raise CommandError(
+                f"인덱스를 쓰지 않는 쿼리: {', '.join(failed)} "
+                "(python manage.py migrate busapi 로 인덱스가 만들어졌는지 확인)"
+            )
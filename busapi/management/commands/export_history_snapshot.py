@@ -0,0 +1,34 @@
+# management/commands/export_history_snapshot.py
+"""
+bus_arrival_past → 날짜별 컬럼 스냅샷 (busapi/history_snapshot.py)
+
+    python manage.py export_history_snapshot            # 새로 쌓인 날짜만 추가
+    python manage.py export_history_snapshot --rebuild  # 처음부터 다시
+    python manage.py train_model --from-snapshot        # 스냅샷 + 그 이후 DB 행으로 학습
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from busapi.ml_train import export_history_snapshot
+
+
+class Command(BaseCommand):
+    help = "학습용 이력 스냅샷(날짜별 .npy) 내보내기"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="", help="스냅샷 디렉토리 (기본: settings.BUSAPI_HISTORY_SNAPSHOT_DIR)")
+        parser.add_argument("--rebuild", action="store_true", help="기존 스냅샷을 지우고 전체를 다시 내보내기")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        manifest = export_history_snapshot(options["path"] or None, rebuild=options["rebuild"])
+        exported = manifest["exported_days"]
+        self.stdout.write(
+            f"{len(exported)} days / {manifest['exported_rows']} rows exported "
+            f"({exported[0] if exported else '-'} ~ {exported[-1] if exported else '-'}), "
+            f"total {len(manifest['days'])} days / {sum(manifest['days'].values())} rows, "
+            f"high-water mark {manifest['high_water_mark']} "
+            f"[{time.perf_counter() - started:.1f}s]"
+        )
@@ -0,0 +1,79 @@
+# management/commands/poll_realtime.py
+"""
+hot 노선의 실시간 버스 위치를 일정 주기로 polling 해서 스냅샷 저장소에 올린다.
+
+    python manage.py poll_realtime                       # settings.REALTIME_HOT_ROUTES (없으면 routes.json 전체)
+    python manage.py poll_realtime --routes 234001736,218000005 --interval 10
+    python manage.py poll_realtime --once
+
+bus_realtime / station_realtime 은 스냅샷이 신선하면 upstream 대신 스냅샷을 읽는다.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from busapi import static_data
+from busapi.realtime import (
+    fetch_bus_locations,
+    get_route_name,
+    normalize_bus_locations,
+    publish_snapshot,
+)
+
+
+class Command(BaseCommand):
+    help = "hot 노선 실시간 위치를 주기적으로 조회해서 스냅샷 저장소에 저장"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--routes",
+            default="",
+            help="콤마로 구분한 routeId 목록 (기본: settings.REALTIME_HOT_ROUTES)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=getattr(settings, "REALTIME_POLL_INTERVAL", 10.0),
+            help="polling 주기(초)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="한 번만 조회하고 종료",
+        )
+
+    def handle(self, *args, **options):
+        routes = [r for r in options["routes"].split(",") if r]
+        if not routes:
+            routes = list(getattr(settings, "REALTIME_HOT_ROUTES", []) or static_data.ROUTES.keys())
+
+        interval = options["interval"]
+        self.stdout.write(f"polling {len(routes)} routes every {interval}s")
+
+        with ThreadPoolExecutor(max_workers=min(len(routes), 16) or 1) as executor:
+            while True:
+                started = time.monotonic()
+                published = sum(executor.map(self.poll_route, routes))
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"[poll] {published}/{len(routes)} routes in {elapsed:.2f}s"
+                )
+
+                if options["once"]:
+                    break
+                time.sleep(max(interval - elapsed, 0))
+
+    def poll_route(self, routeid: str) -> bool:
+        result = fetch_bus_locations(routeid)
+        if result is None:
+            return False
+
+        query_time, loc_list = result
+        records = normalize_bus_locations(
+            routeid, query_time, loc_list, get_route_name(routeid)
+        )
+        publish_snapshot(routeid, query_time, loc_list, records)
+        return True
@@ -0,0 +1,46 @@
+# management/commands/rollback_model.py
+"""
+model registry 의 서비스 버전(CURRENT)을 이전 버전으로 되돌린다.
+
+    python manage.py rollback_model --list            # 버전 목록
+    python manage.py rollback_model                   # 현재 바로 이전 버전으로
+    python manage.py rollback_model --to 20251203-041500-3fa9c1e2b7d0
+
+각 워커는 다음 요청에서 CURRENT 변경을 보고 해당 버전을 warm-up 한 뒤 전환한다.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from busapi import model_registry
+
+
+class Command(BaseCommand):
+    help = "좌석 예측 모델을 이전 버전으로 롤백"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", default="", help="되돌릴 버전 이름 (기본: 현재 바로 이전 버전)")
+        parser.add_argument("--list", action="store_true", help="버전 목록만 출력")
+
+    def handle(self, *args, **options):
+        current = model_registry.current_version()
+
+        if options["list"]:
+            for version in model_registry.list_versions():
+                meta = model_registry.read_meta(version)
+                mark = "*" if version == current else " "
+                self.stdout.write(
+                    f"{mark} {version}  rmse={meta.get('rmse')}  rows={meta.get('rows')}  mode={meta.get('mode')}"
+                )
+            return
+
+        target = options["to"] or model_registry.previous_version(current)
+        if not target:
+            raise CommandError("되돌릴 이전 버전이 없습니다.")
+        if target == current:
+            raise CommandError(f"이미 {target} 버전이 서비스 중입니다.")
+
+        try:
+            model_registry.promote(target)
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"{current} → {target}")
@@ -0,0 +1,54 @@
+# management/commands/train_model.py
+"""
+좌석 예측 모델 학습 (cron 등에서 실행)
+
+    python manage.py train_model                 # 전체 학습
+    python manage.py train_model --incremental   # 지난 학습 이후 들어온 행만 집계해서 이어서 학습
+    python manage.py train_model --from-snapshot # export_history_snapshot 스냅샷 + 이후 DB 행으로 전체 학습
+    python manage.py train_model --no-db-aggregate  # 원본 행을 청크로 읽어서 pandas 로 집계 (SQL 집계 결과 비교용)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from busapi.ml_train import train_model_and_save, train_model_incremental
+
+
+class Command(BaseCommand):
+    help = "좌석 예측 모델(bus_model.pkl) 학습"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="high-water mark 이후의 새 행만 반영해서 이어서 학습",
+        )
+        parser.add_argument(
+            "--from-snapshot",
+            action="store_true",
+            help="DB 대신 이력 스냅샷에서 집계 (스냅샷 이후 행만 DB 에서)",
+        )
+        parser.add_argument(
+            "--no-db-aggregate",
+            dest="aggregate_in_db",
+            action="store_false",
+            help="슬롯 집계를 SQL 대신 원본 행을 읽어서 pandas 로 (전체 학습만)",
+        )
+        parser.add_argument(
+            "--model-path",
+            default="bus_model.pkl",
+            help="busapi/ 아래 모델 파일 이름",
+        )
+
+    def handle(self, *args, **options):
+        if not options["aggregate_in_db"] and (options["incremental"] or options["from_snapshot"]):
+            raise CommandError("--no-db-aggregate 는 --incremental / --from-snapshot 과 같이 쓸 수 없습니다.")
+
+        if options["incremental"]:
+            rmse = train_model_incremental(options["model_path"])
+        else:
+            rmse = train_model_and_save(
+                options["model_path"],
+                aggregate_in_db=options["aggregate_in_db"],
+                from_snapshot=options["from_snapshot"],
+            )
+        self.stdout.write(f"RMSE {rmse:.3f}")
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:35
+#
+# 이미 테이블이 있는 DB 에서는 처음 한 번: python manage.py migrate busapi --fake-initial
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='bus_arrival_past',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('routeid', models.CharField(max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('remainseatcnt1', models.IntegerField()),
+                ('vehid1', models.IntegerField()),
+                ('station_num', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'bus_arrival_past_3302_with_synthetic',
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_location', models.CharField(max_length=200)),
+                ('to_location', models.CharField(max_length=200)),
+                ('detail', models.CharField(max_length=200)),
+                ('type', models.CharField(choices=[('bus', 'bus'), ('stop', 'stop')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_routes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'saved_routes',
+            },
+        ),
+        migrations.CreateModel(
+            name='Favorite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100)),
+                ('type', models.CharField(choices=[('bus', 'bus'), ('stop', 'stop')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorites', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'favorites',
+                'unique_together': {('user', 'label', 'type')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bus_arrival_past',
+            index=models.Index(fields=['routeid', 'station_num'], name='bus_past_route_station_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bus_arrival_past',
+            index=models.Index(fields=['routeid', 'timestamp'], name='bus_past_route_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bus_arrival_past',
+            index=models.Index(fields=['timestamp'], name='bus_past_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:30
+#
+# 제약 조건을 걸기 전에 이미 들어 있는 중복 행은 id 가 가장 작은 것만 남기고 지운다.
+
+from django.db import migrations, models
+
+
+DELETE_DUPLICATES = """
+DELETE FROM bus_arrival_past_3302_with_synthetic
+WHERE EXISTS (
+    SELECT 1 FROM bus_arrival_past_3302_with_synthetic d
+    WHERE d.routeid = bus_arrival_past_3302_with_synthetic.routeid
+      AND d.vehid1 = bus_arrival_past_3302_with_synthetic.vehid1
+      AND d.station_num = bus_arrival_past_3302_with_synthetic.station_num
+      AND d."timestamp" = bus_arrival_past_3302_with_synthetic."timestamp"
+      AND d.id < bus_arrival_past_3302_with_synthetic.id
+)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('busapi', '0002_arrival_history_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_DUPLICATES, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='bus_arrival_past',
+            constraint=models.UniqueConstraint(fields=('routeid', 'vehid1', 'station_num', 'timestamp'), name='bus_past_unique_key'),
+        ),
+    ]
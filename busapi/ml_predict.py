@@ -1,63 +1,484 @@
 # ml_predict.py
 
+import hashlib
+import json
+import os
+import threading
 from pathlib import Path
-import joblib
-import pandas as pd
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, Tuple
 
 from django.conf import settings
-from .models import bus_arrival_past
 
+from . import model_registry, tree_engine
 
-def _load_model_payload(model_path="bus_model.pkl"):
-    path = Path(settings.BASE_DIR) / "busapi" / model_path
+# joblib / pandas / xgboost 는 컴파일된 트리(bus_model_trees.npz)가 없을 때만 import 한다.
+
+
+# -----------------------------
+#  프로세스 단위 모델 캐시 (hot reload)
+# -----------------------------
+# 파일 경로 → {"data", "version", "signature", "path"}
+#   - 요청마다 joblib.load 하지 않고, 프로세스당 한 번만 로드해서 재사용
+#   - 파일 mtime/size 가 바뀌면 내용 해시를 다시 계산해서 새 버전으로 교체
+_ARTIFACT_CACHE: Dict[str, dict] = {}
+_ARTIFACT_LOCK = threading.Lock()
+
+TABLE_SUFFIX = "_table.npz"
+
+
+def _model_abspath(model_path: str) -> Path:
+    if model_path == model_registry.MODEL_FILE:
+        path = _serving_model_file()
+        if path is not None:
+            return path
+    return Path(settings.BASE_DIR) / "busapi" / model_path
+
+
+def _table_abspath(model_path: str) -> Path:
+    """bus_model.pkl → bus_model_table.npz (같은 디렉토리)"""
+    path = _model_abspath(model_path)
+    return path.with_name(path.stem + TABLE_SUFFIX)
+
+
+def _file_signature(path: Path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _file_version(path: Path) -> str:
+    """파일 내용 해시(sha256 앞 12자리) → 워커 간 모델 버전 비교용"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def _get_artifact(path: Path, loader) -> dict:
+    """
+    path 에 있는 파일을 loader 로 읽어서 캐시한 엔트리를 돌려준다.
+    - 파일이 그대로면 stat 한 번으로 끝 (다시 읽지 않음)
+    - 파일이 바뀌었으면 lock 안에서 새로 로드한 뒤 통째로 교체
+      (교체 전까지 다른 요청은 기존 데이터로 계속 응답)
+    - 새 파일 로드에 실패하면 (쓰는 도중 등) 기존 데이터를 유지
+    """
+    key = str(path)
+    entry = _ARTIFACT_CACHE.get(key)
+
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        if entry is not None:
+            return entry
+        raise
+
+    if entry is not None and entry["signature"] == signature:
+        return entry
+
+    # 다른 스레드가 새 파일을 로드하는 중이면 기다리지 않고 기존 데이터로 응답
+    if not _ARTIFACT_LOCK.acquire(blocking=entry is None):
+        return entry
+
+    try:
+        entry = _ARTIFACT_CACHE.get(key)
+        if entry is not None and entry["signature"] == signature:
+            return entry
+
+        try:
+            version = _file_version(path)
+            if entry is not None and entry["version"] == version:
+                # touch 등으로 mtime 만 바뀐 경우 → 다시 읽을 필요 없음
+                new_entry = dict(entry, signature=signature)
+            else:
+                new_entry = {
+                    "data": loader(path),
+                    "version": version,
+                    "signature": signature,
+                    "path": key,
+                }
+        except Exception as e:
+            if entry is None:
+                raise
+            print("artifact reload failed, keep serving", entry["version"], e)
+            return entry
+
+        if entry is None or entry["version"] != new_entry["version"]:
+            print("artifact loaded:", new_entry["version"], path)
+
+        _ARTIFACT_CACHE[key] = new_entry
+        return new_entry
+    finally:
+        _ARTIFACT_LOCK.release()
+
+
+# -----------------------------
+#  model registry 버전 전환 (워커별 warm-up)
+# -----------------------------
+# registry 의 CURRENT 가 바뀌면, 그걸 처음 본 요청 스레드가 새 버전의 모델·예측 테이블을
+# 로드하고 예측을 한 번 돌려본 뒤에 서비스 버전을 바꾼다. 그동안 다른 요청은 이전 버전으로 응답.
+_serving = {"version": None, "failed": None}
+_SWITCH_LOCK = threading.Lock()
+
+
+def _warm_up(model_file: Path):
+    try:
+        payload = _get_artifact(
+            tree_engine.compiled_path_for(model_file), tree_engine.load_compiled
+        )["data"]
+    except FileNotFoundError:
+        payload = _get_artifact(model_file, _joblib_load)["data"]
+    try:
+        _get_artifact(model_file.with_name(model_file.stem + TABLE_SUFFIX), _load_prediction_table)
+    except FileNotFoundError:
+        pass
+
+    # 첫 predict 호출 비용(booster 초기화 등)을 요청 전에 치르도록 한 행 예측
+    for rid, stations in _route_stations_of(payload).items():
+        if stations:
+            predict_rows(payload, [rid], stations[:1], SLOT_CENTERS[:1])
+            break
+
+
+def _serving_model_file():
+    """이 워커가 서비스 중인 registry 모델 파일 (registry 를 안 쓰면 None)"""
+    target = model_registry.current_version()
+    serving = _serving["version"]
+    if target is None or target == serving or target == _serving["failed"]:
+        return model_registry.model_file(serving) if serving else None
+
+    # 서비스 중인 버전이 있으면 다른 스레드가 전환 중일 때 기다리지 않는다
+    if not _SWITCH_LOCK.acquire(blocking=serving is None):
+        return model_registry.model_file(serving)
+    try:
+        if _serving["version"] != target:
+            try:
+                _warm_up(model_registry.model_file(target))
+            except Exception as e:
+                if _serving["version"] is None:
+                    raise
+                _serving["failed"] = target
+                print("model warm-up failed, keep serving", _serving["version"], e)
+            else:
+                print("model version switched:", _serving["version"], "→", target)
+                previous, _serving["version"] = _serving["version"], target
+                if previous is not None:
+                    # 이전 버전 모델/테이블은 더 쓰지 않으므로 캐시에서 내린다
+                    prefix = str(model_registry.version_dir(previous))
+                    for key in [k for k in _ARTIFACT_CACHE if k.startswith(prefix)]:
+                        _ARTIFACT_CACHE.pop(key, None)
+        return model_registry.model_file(_serving["version"])
+    finally:
+        _SWITCH_LOCK.release()
+
+
+def _joblib_load(path: Path):
+    import joblib
     return joblib.load(path)
 
 
+def get_model_entry(model_path="bus_model.pkl") -> dict:
+    return _get_artifact(_model_abspath(model_path), _joblib_load)
+
+
+def get_compiled_model(model_path="bus_model.pkl"):
+    """numpy 트리 모델 (없으면 None → pickle 된 XGBRegressor 사용)"""
+    try:
+        return _get_artifact(
+            tree_engine.compiled_path_for(_model_abspath(model_path)),
+            tree_engine.load_compiled,
+        )["data"]
+    except FileNotFoundError:
+        return None
+
+
+def _predictor_for(model_file: Path):
+    """(예측에 쓸 모델, 모델 버전): 컴파일된 트리가 있으면 그것, 없으면 payload dict"""
+    try:
+        compiled = _get_artifact(tree_engine.compiled_path_for(model_file), tree_engine.load_compiled)["data"]
+        return compiled, compiled.model_version
+    except FileNotFoundError:
+        entry = _get_artifact(model_file, _joblib_load)
+        return entry["data"], entry["version"]
+
+
+def _load_predictor(model_path="bus_model.pkl"):
+    """예측에 쓸 모델: 컴파일된 트리가 있으면 그것, 없으면 payload dict"""
+    return _predictor_for(_model_abspath(model_path))[0]
+
+
+def _load_model_payload(model_path="bus_model.pkl"):
+    return get_model_entry(model_path)["data"]
+
+
+# -----------------------------
+#  노선 → 정류장 번호 인덱스
+# -----------------------------
+# 예측할 정류장 목록을 매번 bus_arrival_past 에서 DISTINCT 로 뽑지 않고 메모리에서 찾는다.
+#   1) 학습 시점에 payload["route_stations"] 로 저장된 목록
+#   2) 없으면 (예전 payload / 학습에 없던 노선) routes.json 의 sta_order
+ROUTES_JSON_PATH = Path(settings.BASE_DIR) / "busapi" / "data" / "routes.json"
+
+
+def _load_route_sta_orders(path: Path) -> Dict[str, List[int]]:
+    with open(path, encoding="utf-8") as f:
+        routes = json.load(f)
+    return {
+        str(rid): sorted({int(stop["sta_order"]) for stop in stops if stop.get("sta_order") is not None})
+        for rid, stops in routes.items()
+    }
+
+
+def _route_stations_of(payload) -> Dict[str, List[int]]:
+    if isinstance(payload, tree_engine.CompiledModel):
+        return payload.route_stations
+    return payload.get("route_stations", {})
+
+
+def get_route_station_nums(routeid: str, payload=None) -> List[int]:
+    routeid = str(routeid)
+    if payload is not None:
+        stations = _route_stations_of(payload).get(routeid)
+        if stations:
+            return stations
+
+    try:
+        sta_orders = _get_artifact(ROUTES_JSON_PATH, _load_route_sta_orders)["data"]
+    except FileNotFoundError:
+        return []
+    return sta_orders.get(routeid, [])
+
+
 def _slot_index_to_center_min(slot_index: int) -> int:
     return 345 + slot_index * 30 + 15  # 5:45 + slot*30 + 15
 
 
-def predict_remaining_seats(routeid: str, slot_index: int) -> List[Dict]:
-    payload = _load_model_payload()
-    model = payload["model"]
-    routeid_columns = payload["routeid_columns"]
-    feature_cols = payload["feature_cols"]
-
-    slot_center_min = _slot_index_to_center_min(slot_index)
-
-    station_nums = (
-        bus_arrival_past.objects.filter(routeid=str(routeid))
-        .values_list("station_num", flat=True)
-        .distinct()
-    )
-    station_nums = sorted(int(s) for s in station_nums)
-
-    rows = []
-    for s in station_nums:
-        row = {
-            "station_num": s,
-            "slot_center_min": slot_center_min,
-        }
+SLOT_COUNT = 7  # 5:45 ~ 9:15, 30분 단위 (ml_train.add_time_slots 와 동일)
+SLOT_CENTERS = [_slot_index_to_center_min(i) for i in range(SLOT_COUNT)]
+
+
+# -----------------------------
+#  사전 계산된 예측 테이블
+# -----------------------------
+# 학습 직후 (노선 × 슬롯 × 정류장) 전체 예측값을 bus_model_table.npz 로 저장해두고,
+# 요청 시에는 pandas / xgboost 없이 조회만 한다.
+#
+# npz 구성
+#   route_ids       : (R,)        노선 ID 문자열
+#   station_offsets : (R+1,)      노선별 station_nums 구간 [offsets[i], offsets[i+1])
+#   station_nums    : (S,)        노선별 정류장 번호 (오름차순)
+#   seats           : (S*SLOTS,)  노선별 [slot][station] 예측 좌석수 (0~45)
+#   slot_centers    : (SLOTS,)    slot_center_min
+#   model_version   : ()          이 테이블을 만든 bus_model.pkl 버전
+
+
+def _load_prediction_table(path: Path) -> dict:
+    """npz → {"routes": {routeid: (station_nums, [slot별 예측 리스트])}, "model_version"}"""
+    with np.load(path, allow_pickle=False) as npz:
+        route_ids = npz["route_ids"]
+        offsets = npz["station_offsets"]
+        station_nums = npz["station_nums"]
+        seats = npz["seats"]
+        n_slots = len(npz["slot_centers"])
+        model_version = str(npz["model_version"])
+
+    routes = {}
+    for i, rid in enumerate(route_ids):
+        lo, hi = int(offsets[i]), int(offsets[i + 1])
+        stations = station_nums[lo:hi].tolist()
+        grid = seats[lo * n_slots:hi * n_slots].reshape(n_slots, hi - lo)
+        routes[str(rid)] = (stations, grid.tolist())
+
+    return {"routes": routes, "model_version": model_version}
+
+
+def _table_for(model_file: Path):
+    try:
+        return _get_artifact(
+            model_file.with_name(model_file.stem + TABLE_SUFFIX), _load_prediction_table
+        )["data"]
+    except FileNotFoundError:
+        return None
+
+
+def get_prediction_table(model_path="bus_model.pkl"):
+    """예측 테이블이 없으면 None (→ 모델로 직접 예측)"""
+    return _table_for(_model_abspath(model_path))
+
+
+def save_prediction_table(route_ids, station_lists, seat_grids, model_version,
+                          model_path="bus_model.pkl") -> Path:
+    """
+    route_ids[i] 노선의 정류장 목록 station_lists[i] 와
+    (슬롯 × 정류장) 예측 배열 seat_grids[i] 를 npz 한 파일로 저장한다.
+    """
+    n_slots = SLOT_COUNT
+    offsets = np.zeros(len(route_ids) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(s) for s in station_lists])
+
+    if station_lists:
+        station_nums = np.concatenate(
+            [np.asarray(s, dtype=np.int16) for s in station_lists]
+        )
+        seats = np.concatenate(
+            [np.asarray(g, dtype=np.uint8).reshape(n_slots, -1).ravel() for g in seat_grids]
+        )
+    else:
+        station_nums = np.zeros(0, dtype=np.int16)
+        seats = np.zeros(0, dtype=np.uint8)
+
+    path = _table_abspath(model_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            route_ids=np.asarray([str(r) for r in route_ids]),
+            station_offsets=offsets,
+            station_nums=station_nums,
+            seats=seats,
+            slot_centers=np.asarray(SLOT_CENTERS, dtype=np.int16),
+            model_version=np.asarray(model_version),
+        )
+    # 쓰는 도중인 파일을 워커가 읽지 않도록 rename 으로 교체
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_active_model_version(model_path="bus_model.pkl") -> str:
+    model_file = _model_abspath(model_path)
+    table = _table_for(model_file)
+    if table is not None:
+        return table["model_version"]
+    return _predictor_for(model_file)[1]
+
+
+def route_encoding_of(payload) -> str:
+    """
+    노선 feature 방식
+      "onehot" : routeid_<id> 0/1 컬럼 (노선 수만큼 feature 증가, 예전 payload 는 모두 이 방식)
+      "code"   : route_code 정수 컬럼 하나 (payload["route_codes"]: routeid → 코드)
+    """
+    return payload.get("route_encoding", "onehot")
+
+
+def build_feature_frame(payload, routeids, station_nums, slot_center_mins):
+    """학습/예측에 쓰는 feature DataFrame (컬럼 순서는 payload["feature_cols"])"""
+    import pandas as pd
+
+    features = {
+        "station_num": np.asarray(station_nums, dtype=np.int64),
+        "slot_center_min": np.asarray(slot_center_mins, dtype=np.int64),
+    }
+    if route_encoding_of(payload) == "code":
+        # 학습에 없던 노선은 NaN (xgboost 결측값 방향으로 분기)
+        codes = payload["route_codes"]
+        features["route_code"] = np.asarray(
+            [codes.get(str(r), np.nan) for r in routeids], dtype=np.float64
+        )
+    else:
         # one-hot routeid
-        for col in routeid_columns:
-            row[col] = 1 if col == f"routeid_{routeid}" else 0
+        route_cols = np.asarray([f"routeid_{r}" for r in routeids], dtype=object)
+        for col in payload["routeid_columns"]:
+            features[col] = (route_cols == col).astype(np.int64)
+
+    return pd.DataFrame(features)[payload["feature_cols"]]
+
 
-        rows.append(row)
+def predict_rows(payload, routeids, station_nums, slot_center_mins) -> np.ndarray:
+    """
+    (routeid, station_num, slot_center_min) 행들을 한 번의 model.predict 로 예측한다.
+    세 인자는 같은 길이의 시퀀스. 결과는 0~45 로 자른 정수 배열.
+    payload 가 CompiledModel 이면 numpy 평가기로, 아니면 XGBRegressor 로 예측.
+    """
+    if len(station_nums) == 0:
+        return np.zeros(0, dtype=np.int64)
 
-    df_pred = pd.DataFrame(rows)
-    y_pred = model.predict(df_pred[feature_cols])
+    if isinstance(payload, tree_engine.CompiledModel):
+        y_pred = payload.predict(routeids, station_nums, slot_center_mins)
+    else:
+        y_pred = payload["model"].predict(
+            build_feature_frame(payload, routeids, station_nums, slot_center_mins)
+        )
+    return np.clip(np.rint(y_pred), 0, 45).astype(np.int64)
 
-    results = []
-    for s, pred in zip(station_nums, y_pred):
-        pred = round(pred)
-        pred = max(0, min(pred, 45))   # 0~45 제한
 
-        results.append({
+def _prediction_rows(routeid, slot_index, station_nums, preds) -> List[Dict]:
+    return [
+        {
             "routeid": routeid,
             "station_num": s,
             "slot_index": slot_index,
-            "remainseat_pred": pred,
-        })
+            "remainseat_pred": int(pred),
+        }
+        for s, pred in zip(station_nums, preds)
+    ]
+
+
+def predict_remaining_seats(routeid: str, slot_index: int) -> List[Dict]:
+    return predict_remaining_seats_batch([routeid], [slot_index])[routeid][slot_index]
+
+
+def predict_remaining_seats_batch(routeids: List[str], slot_indices: List[int]) -> Dict[str, Dict[int, List[Dict]]]:
+    return predict_with_version(routeids, slot_indices)[0]
+
+
+def predict_with_version(routeids: List[str], slot_indices: List[int]) -> Tuple[Dict[str, Dict[int, List[Dict]]], str]:
+    """
+    여러 노선 × 여러 슬롯을 한 번에 예측한다.
+    결과: ({routeid: {slot_index: [predict_remaining_seats 와 같은 형식의 행들]}}, 모델 버전)
+
+    - 예측 테이블에 있는 (노선, 슬롯) 은 조회만 하고
+    - 나머지는 한 개의 feature 행렬로 모아서 model.predict 를 한 번만 호출
+    - 서비스 중인 모델 파일은 처음에 한 번만 정한다. (도중에 버전이 바뀌어도 테이블·모델·버전이 섞이지 않음)
+    """
+    routeids = list(dict.fromkeys(routeids))
+    slot_indices = list(dict.fromkeys(slot_indices))
+
+    model_file = _model_abspath(model_registry.MODEL_FILE)
+    table = _table_for(model_file)
+    table_routes = table["routes"] if table is not None else {}
+    model_version = table["model_version"] if table is not None else None
+
+    results: Dict[str, Dict[int, List[Dict]]] = {}
+    misses = []  # (routeid, slot_index)
+
+    for routeid in routeids:
+        by_slot = results.setdefault(routeid, {})
+        route = table_routes.get(str(routeid))
+        for slot_index in slot_indices:
+            if route is not None and 0 <= slot_index < SLOT_COUNT:
+                stations, grid = route
+                by_slot[slot_index] = _prediction_rows(routeid, slot_index, stations, grid[slot_index])
+            else:
+                misses.append((routeid, slot_index))
+
+    if not misses and model_version is not None:
+        return results, model_version
+
+    # 테이블에 없는 노선/슬롯 → 모델로 직접 예측 (한 번에)
+    payload, payload_version = _predictor_for(model_file)
+    if model_version is None:
+        model_version = payload_version
+    if not misses:
+        return results, model_version
+
+    route_cache = {}
+    row_routeids, row_stations, row_centers = [], [], []
+    for routeid, slot_index in misses:
+        if routeid not in route_cache:
+            route_cache[routeid] = get_route_station_nums(routeid, payload)
+        station_nums = route_cache[routeid]
+        row_routeids.extend([str(routeid)] * len(station_nums))
+        row_stations.extend(station_nums)
+        row_centers.extend([_slot_index_to_center_min(slot_index)] * len(station_nums))
+
+    y_pred = predict_rows(payload, row_routeids, row_stations, row_centers)
+
+    pos = 0
+    for routeid, slot_index in misses:
+        station_nums = route_cache[routeid]
+        preds = y_pred[pos:pos + len(station_nums)]
+        pos += len(station_nums)
+        results[routeid][slot_index] = _prediction_rows(routeid, slot_index, station_nums, preds)
 
-    return results
\ No newline at end of file
+    return results, model_version
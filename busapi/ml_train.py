@@ -1,39 +1,135 @@
 #bus_model.pkl : 예측 모델 의미
 # ml_train.py
 
+import datetime
 import os
 from pathlib import Path
 from math import sqrt
 import joblib
+import numpy as np
 import pandas as pd
 from django.conf import settings
+from django.db import connection
+from django.db.models import (
+    Avg, BooleanField, Count, F, IntegerField, Max, Sum,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, ExtractHour, ExtractMinute
+from django.utils import timezone
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_squared_error
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from . import history_snapshot, model_registry, tree_engine
 from .models import bus_arrival_past
+from .ml_predict import (
+    SLOT_CENTERS,
+    _file_version,
+    build_feature_frame,
+    predict_rows,
+    route_encoding_of,
+    save_prediction_table,
+)
+
+
+LOAD_CHUNK_SIZE = 20000  # 서버 측 커서로 한 번에 가져올 행 수
+
 
+def _peak_rss_mb():
+    """프로세스 최대 RSS (MB). resource 모듈이 없는 환경(Windows)에서는 None"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Linux: KB 단위
 
-def load_from_db() -> pd.DataFrame:
-    qs = bus_arrival_past.objects.values(
+
+def _compact_chunk(rows, route_codes: dict, with_day: bool = False):
+    """
+    values_list 청크 → (routeid 코드, 잔여좌석, 정류장 번호, 분 단위 시각) numpy 배열
+    timestamp 는 time_min 으로만 쓰이므로 변환 후 버린다.
+    with_day=True 면 날짜(YYYYMMDD 정수) 배열을 다섯 번째로 같이 돌려준다. (스냅샷 내보내기용)
+    """
+    routeids, timestamps, seats, stations = zip(*rows)
+
+    ts = pd.to_datetime(pd.Series(timestamps), errors="coerce")
+    seats = pd.to_numeric(pd.Series(seats), errors="coerce")
+    stations = pd.to_numeric(pd.Series(stations), errors="coerce")
+
+    mask = (ts.notna() & seats.notna() & stations.notna()).to_numpy()
+    codes = np.fromiter(
+        (route_codes.setdefault(str(r), len(route_codes)) for r in routeids),
+        dtype=np.int32,
+        count=len(routeids),
+    )
+    time_min = (ts.dt.hour * 60 + ts.dt.minute).to_numpy()
+
+    columns = (
+        codes[mask],
+        seats.to_numpy()[mask].astype(np.int16),
+        stations.to_numpy()[mask].astype(np.int16),
+        time_min[mask].astype(np.int16),
+    )
+    if with_day:
+        day = (ts.dt.year * 10000 + ts.dt.month * 100 + ts.dt.day).to_numpy()
+        columns += (day[mask].astype(np.int32),)
+    return columns
+
+
+def load_from_db(chunk_size: int = LOAD_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    bus_arrival_past 전체를 chunk_size 행씩 스트리밍으로 읽어서 작은 타입의 컬럼으로 모은다.
+    (행마다 dict 를 만들지 않으므로 테이블이 커져도 메모리 사용량이 행 수 × 몇 바이트 수준)
+
+    컬럼: routeid(category), remainseatcnt1(int16), station_num(int16), time_min(int16)
+    """
+    qs = bus_arrival_past.objects.values_list(
         "routeid", "timestamp", "remainseatcnt1", "station_num"
     )
-    df = pd.DataFrame.from_records(qs)
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
-    df["remainseatcnt1"] = pd.to_numeric(df["remainseatcnt1"], errors="coerce")
-    df["station_num"] = pd.to_numeric(df["station_num"], errors="coerce")
-    df["routeid"] = df["routeid"].astype(str)
+    route_codes = {}
+    parts = []
+    chunk = []
+    # PostgreSQL 에서는 서버 측 커서(named cursor)로 chunk_size 씩 가져온다
+    for row in qs.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            parts.append(_compact_chunk(chunk, route_codes))
+            chunk = []
+    if chunk:
+        parts.append(_compact_chunk(chunk, route_codes))
 
-    df = df.dropna(subset=["timestamp", "remainseatcnt1", "station_num", "routeid"])
+    if parts:
+        codes, seats, stations, time_min = (np.concatenate(cols) for cols in zip(*parts))
+    else:
+        codes = np.empty(0, dtype=np.int32)
+        seats = stations = time_min = np.empty(0, dtype=np.int16)
 
-    df["time_min"] = df["timestamp"].dt.hour * 60 + df["timestamp"].dt.minute
+    return _raw_frame(codes, sorted(route_codes, key=route_codes.get), seats, stations, time_min)
 
-    return df
+
+def _raw_frame(codes, routes, seats, stations, time_min) -> pd.DataFrame:
+    """routes: 코드 순서의 노선 id 목록"""
+    # 코드는 처음 나온 순서로 붙였으므로, groupby 결과가 문자열 정렬 순서가 되도록 다시 정렬
+    routeid = pd.Categorical.from_codes(codes, categories=routes).reorder_categories(sorted(routes))
+    return pd.DataFrame({
+        "routeid": routeid,
+        "remainseatcnt1": seats,
+        "station_num": stations,
+        "time_min": time_min,
+    })
+
+
+SLOT_START_MIN = 5 * 60 + 45  # 5:45
+SLOT_END_MIN = 9 * 60 + 15    # 9:15
+SLOT_MINUTES = 30
 
 
 def add_time_slots(df: pd.DataFrame) -> pd.DataFrame:
-    start_min = 5 * 60 + 45  # 5:45
-    end_min = 9 * 60 + 15
+    start_min = SLOT_START_MIN
+    end_min = SLOT_END_MIN
 
     df = df[(df["time_min"] >= start_min) & (df["time_min"] < end_min)].copy()
 
@@ -46,50 +142,606 @@ def add_time_slots(df: pd.DataFrame) -> pd.DataFrame:
 
 def build_slot_level_table(df: pd.DataFrame) -> pd.DataFrame:
     agg = (
-        df.groupby(["routeid", "station_num", "slot_center_min"], as_index=False)
+        df.groupby(["routeid", "station_num", "slot_center_min"], as_index=False, observed=True)
           .agg(y=("remainseatcnt1", "mean"))
     )
+    agg["routeid"] = agg["routeid"].astype(str)
+    return agg
+
+
+def _timestamp_column() -> str:
+    qn = connection.ops.quote_name
+    return f"{qn(bus_arrival_past._meta.db_table)}.{qn('timestamp')}"
+
+
+def _naive_utc(value):
+    # 기준 시각은 naive UTC 로 통일 (모델 payload / 스냅샷 manifest 에 저장해서 서로 비교함)
+    # 0001 로 만든 DB 의 컬럼은 timestamptz (USE_TZ) 이고 DB 세션 시간대가 UTC 라 naive 값은 UTC 로 해석된다.
+    # timestamp / timestamptz 비교 연산자는 같은 btree 연산자 族이라 인덱스(bus_past_ts_idx)도 그대로 탄다.
+    if value is not None and timezone.is_aware(value):
+        return timezone.make_naive(value, datetime.timezone.utc)
+    return value
+
+
+def filter_timestamp_range(qs, since=None, until=None):
+    """since < timestamp <= until (캐스팅하지 않은 컬럼 그대로 비교)"""
+    column = _timestamp_column()
+    if since is not None:
+        qs = qs.filter(RawSQL(f"{column} > %s", [_naive_utc(since)], output_field=BooleanField()))
+    if until is not None:
+        qs = qs.filter(RawSQL(f"{column} <= %s", [_naive_utc(until)], output_field=BooleanField()))
+    return qs
+
+
+def get_high_water_mark():
+    """bus_arrival_past 의 가장 최근 timestamp (행이 없으면 None)"""
+    return _naive_utc(bus_arrival_past.objects.aggregate(hwm=Max("timestamp"))["hwm"])
+
+
+def slot_table_queryset(since=None, until=None):
+    """load_slot_table_from_db 가 실행하는 집계 쿼리 (explain_arrival_queries 에서도 사용)"""
+    time_min = Cast(
+        ExtractHour("timestamp") * 60 + ExtractMinute("timestamp"), output_field=IntegerField()
+    )
+    slot_center_min = (
+        (F("time_min") - SLOT_START_MIN) / SLOT_MINUTES * SLOT_MINUTES
+        + SLOT_START_MIN + SLOT_MINUTES // 2
+    )
+    qs = filter_timestamp_range(bus_arrival_past.objects.all(), since, until)
+    qs = (
+        qs.annotate(time_min=time_min)
+        .filter(time_min__gte=SLOT_START_MIN, time_min__lt=SLOT_END_MIN)
+        .annotate(slot_center_min=slot_center_min)
+        .values("routeid", "station_num", "slot_center_min")
+        .annotate(y=Avg("remainseatcnt1"), y_sum=Sum("remainseatcnt1"), n=Count("id"))
+        .order_by("routeid", "station_num", "slot_center_min")
+    )
+    return qs
+
+
+def load_slot_table_from_db(since=None, until=None) -> pd.DataFrame:
+    """
+    add_time_slots + build_slot_level_table 을 DB 에서 한 번에 (WHERE + GROUP BY)
+    원본 행은 DB 밖으로 나오지 않고, (노선, 정류장, 슬롯) 별 평균 몇천 행만 가져온다.
+    since < timestamp <= until 범위만 집계 (None 이면 제한 없음)
+
+    컬럼: routeid, station_num, slot_center_min, y(평균 잔여좌석), y_sum, n(원본 행 수)
+    """
+    qs = slot_table_queryset(since, until)
+    agg = pd.DataFrame.from_records(
+        qs.iterator(),
+        columns=["routeid", "station_num", "slot_center_min", "y", "y_sum", "n"],
+    )
+    agg["routeid"] = agg["routeid"].astype(str)
+    for col in ("station_num", "slot_center_min", "y_sum", "n"):
+        agg[col] = agg[col].astype(np.int64)
+    agg["y"] = agg["y"].astype(float)
     return agg
 
 
-def train_model_and_save(model_path="bus_model.pkl") -> float:
-    df = load_from_db()
-    df = add_time_slots(df)
-    agg = build_slot_level_table(df)
+def export_history_snapshot(path=None, rebuild=False, chunk_size: int = LOAD_CHUNK_SIZE) -> dict:
+    """
+    bus_arrival_past → 날짜별 컬럼 스냅샷 (history_snapshot)
+    이미 내보낸 날짜는 다시 쓰지 않고, 마지막 날(그때는 덜 쌓였을 수 있음)부터 high-water mark 까지만 읽는다.
+    rebuild=True 면 스냅샷을 지우고 처음부터 (지난 날짜에 행이 추가/수정된 경우)
+
+    반환: 갱신된 manifest (+ "exported_days", "exported_rows")
+    """
+    root = history_snapshot.snapshot_dir(path)
+    if rebuild:
+        history_snapshot.clear(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    manifest = history_snapshot.read_manifest(root)
+    route_codes = {rid: i for i, rid in enumerate(manifest["routes"])}
+    days = dict(manifest["days"])
+
+    high_water_mark = get_high_water_mark()
+    if high_water_mark is None:
+        return dict(manifest, exported_days=[], exported_rows=0)
+
+    column = _timestamp_column()
+    qs = bus_arrival_past.objects.all()
+    if days:
+        resume = datetime.datetime.strptime(max(days), "%Y%m%d")
+        qs = qs.filter(RawSQL(f"{column} >= %s", [resume], output_field=BooleanField()))
+    # timestamp 순서로 읽으면 날짜가 바뀔 때마다 앞 날짜를 바로 파일로 내보낼 수 있다 (bus_past_ts_idx)
+    qs = (
+        filter_timestamp_range(qs, until=high_water_mark)
+        .order_by(RawSQL(column, []).asc())
+        .values_list("routeid", "timestamp", "remainseatcnt1", "station_num")
+    )
+
+    pending = {}  # 날짜 → [컬럼 튜플, ...] (아직 다 안 읽은 날짜)
+    exported = []
+
+    def flush(before=None):
+        for day in sorted(pending):
+            if before is not None and day >= before:
+                break
+            parts = pending.pop(day)
+            columns = dict(zip(
+                ("routeid", "remainseatcnt1", "station_num", "time_min"),
+                (np.concatenate(cols) for cols in zip(*parts)),
+            ))
+            key = str(day)
+            days[key] = history_snapshot.write_day(root, key, columns)
+            exported.append(key)
+
+    def add_chunk(rows):
+        *cols, day = _compact_chunk(rows, route_codes, with_day=True)
+        bounds = np.flatnonzero(np.diff(day)) + 1
+        for part in np.split(np.arange(len(day)), bounds):
+            if len(part):
+                pending.setdefault(int(day[part[0]]), []).append(tuple(c[part] for c in cols))
+        if len(day):
+            flush(before=int(day[-1]))
+
+    chunk = []
+    for row in qs.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            add_chunk(chunk)
+            chunk = []
+    if chunk:
+        add_chunk(chunk)
+    flush()
+
+    manifest.update(
+        routes=sorted(route_codes, key=route_codes.get),
+        days=dict(sorted(days.items())),
+        high_water_mark=high_water_mark.isoformat(),
+    )
+    history_snapshot.write_manifest(root, manifest)
+    return dict(
+        manifest,
+        exported_days=exported,
+        exported_rows=sum(days[d] for d in exported),
+    )
+
+
+def load_from_snapshot(path=None) -> pd.DataFrame:
+    """
+    load_from_db 와 같은 DataFrame 을 스냅샷에서 만든다. (DB 접속 없음)
+    각 날짜 파일은 memmap 으로 열고, 합칠 때 한 번만 메모리로 복사된다.
+    """
+    root = history_snapshot.snapshot_dir(path)
+    manifest = history_snapshot.read_manifest(root)
+    parts = [
+        tuple(day[name] for name in ("routeid", "remainseatcnt1", "station_num", "time_min"))
+        for _, day in history_snapshot.iter_days(root, manifest)
+    ]
+    if parts:
+        codes, seats, stations, time_min = (np.concatenate(cols) for cols in zip(*parts))
+    else:
+        codes = np.empty(0, dtype=np.int32)
+        seats = stations = time_min = np.empty(0, dtype=np.int16)
+    return _raw_frame(codes, manifest["routes"], seats, stations, time_min)
 
-    # 🔥 routeid One-hot
-    routeid_dummies = pd.get_dummies(agg["routeid"], prefix="routeid")
 
-    df_train = pd.concat([agg, routeid_dummies], axis=1)
+def load_slot_table_from_snapshot(path=None) -> pd.DataFrame:
+    """
+    load_slot_table_from_db 와 같은 슬롯 집계를 스냅샷에서 계산한다.
+    날짜별 memmap 에서 바로 (노선, 정류장, 슬롯) 키별 합계/개수를 구하므로 원본 행 전체를 메모리에 올리지 않는다.
+    """
+    root = history_snapshot.snapshot_dir(path)
+    manifest = history_snapshot.read_manifest(root)
 
-    feature_cols = ["station_num", "slot_center_min"] + list(routeid_dummies.columns)
+    def reduce(keys, sums, counts):
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        return (
+            uniq,
+            np.bincount(inverse, weights=sums, minlength=len(uniq)),
+            np.bincount(inverse, weights=counts, minlength=len(uniq)),
+        )
 
-    X = df_train[feature_cols]
-    y = df_train["y"]
+    parts = []
+    for _, day in history_snapshot.iter_days(root, manifest):
+        time_min = day["time_min"]
+        mask = (time_min >= SLOT_START_MIN) & (time_min < SLOT_END_MIN) & (day["station_num"] >= 0)
+        slot = (time_min[mask].astype(np.int64) - SLOT_START_MIN) // SLOT_MINUTES
+        # 키 = 노선 코드 | 정류장 번호(16bit) | 슬롯 번호(8bit)
+        keys = (
+            (day["routeid"][mask].astype(np.int64) << 24)
+            | (day["station_num"][mask].astype(np.int64) << 8)
+            | slot
+        )
+        seats = day["remainseatcnt1"][mask].astype(np.float64)
+        parts.append(reduce(keys, seats, np.ones(len(keys))))
 
-    model = XGBRegressor(
-        n_estimators=300,
-        max_depth=4,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        objective="reg:squarederror",
-        tree_method="hist",
-        random_state=42,
+    if parts:
+        keys, y_sum, n = reduce(*(np.concatenate(cols) for cols in zip(*parts)))
+    else:
+        keys, y_sum, n = np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    routes = np.asarray(manifest["routes"], dtype=object)
+    agg = pd.DataFrame({
+        "routeid": routes[keys >> 24].astype(str) if len(keys) else np.empty(0, dtype=str),
+        "station_num": ((keys >> 8) & 0xFFFF).astype(np.int64),
+        "slot_center_min": (keys & 0xFF) * SLOT_MINUTES + SLOT_START_MIN + SLOT_MINUTES // 2,
+        "y_sum": y_sum.astype(np.int64),
+        "n": n.astype(np.int64),
+    })
+    agg.insert(3, "y", agg["y_sum"] / agg["n"])
+    return agg.sort_values(["routeid", "station_num", "slot_center_min"]).reset_index(drop=True)
+
+
+def merge_slot_tables(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """슬롯 집계 두 개를 (y_sum, n) 기준으로 합쳐서 평균을 다시 계산"""
+    keys = ["routeid", "station_num", "slot_center_min"]
+    merged = (
+        pd.concat([old[keys + ["y_sum", "n"]], new[keys + ["y_sum", "n"]]])
+          .groupby(keys, as_index=False)
+          .sum()
+    )
+    merged["y"] = merged["y_sum"] / merged["n"]
+    return merged
+
+
+def build_route_station_index(agg: pd.DataFrame) -> dict:
+    """학습 데이터에 나온 노선별 정류장 번호 목록 (예측 시 DISTINCT 쿼리 대신 사용)"""
+    return {
+        str(rid): sorted(int(s) for s in g.unique())
+        for rid, g in agg.groupby("routeid")["station_num"]
+    }
+
+
+def materialize_prediction_table(payload, model_version: str,
+                                 model_path="bus_model.pkl"):
+    """
+    학습에 쓰인 (노선, 정류장) 전체 × 7개 슬롯을 한 번의 predict 로 계산해서
+    bus_model_table.npz 로 저장한다. (/api/predict-seat/ 는 이 테이블만 조회)
+    """
+    route_stations = payload["route_stations"]
+    route_ids = sorted(route_stations)
+
+    routeids, station_nums, slot_centers = [], [], []
+    for rid in route_ids:
+        stations = route_stations[rid]
+        for center in SLOT_CENTERS:
+            routeids.extend([rid] * len(stations))
+            station_nums.extend(stations)
+            slot_centers.extend([center] * len(stations))
+
+    y_pred = predict_rows(payload, routeids, station_nums, slot_centers)
+
+    seat_grids = []
+    pos = 0
+    for rid in route_ids:
+        size = len(route_stations[rid]) * len(SLOT_CENTERS)
+        seat_grids.append(y_pred[pos:pos + size])
+        pos += size
+
+    return save_prediction_table(
+        route_ids,
+        [route_stations[rid] for rid in route_ids],
+        seat_grids,
+        model_version,
+        model_path=model_path,
+    )
+
+
+MODEL_PARAMS = dict(
+    max_depth=4,
+    learning_rate=0.05,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    objective="reg:squarederror",
+    tree_method="hist",
+    random_state=42,
+)
+FULL_ROUNDS = 300
+
+# 증분 학습 설정 (settings 에서 조정)
+INCREMENTAL_ROUNDS = getattr(settings, "BUSAPI_TRAIN_INCREMENTAL_ROUNDS", 30)  # 이어서 추가할 트리 수
+DRIFT_THRESHOLD = getattr(settings, "BUSAPI_TRAIN_DRIFT_THRESHOLD", 3.0)       # 새 데이터 RMSE(좌석) 가 넘으면 전체 재학습
+MAX_TREES = getattr(settings, "BUSAPI_TRAIN_MAX_TREES", 600)                   # 트리가 이만큼 쌓이면 전체 재학습
+
+
+# 노선 feature 방식 (ml_predict.route_encoding_of 참고): "onehot" / "code"
+ROUTE_ENCODING = getattr(settings, "BUSAPI_ROUTE_ENCODING", "onehot")
+
+
+def feature_spec(routeids, encoding=None) -> dict:
+    """학습에 나온 노선들로 payload 의 feature 관련 키를 만든다."""
+    encoding = encoding or ROUTE_ENCODING
+    routes = sorted({str(r) for r in routeids})
+    if encoding == "code":
+        return {
+            "route_encoding": "code",
+            "route_codes": {r: i for i, r in enumerate(routes)},
+            "routeid_columns": [],
+            "feature_cols": ["station_num", "slot_center_min", "route_code"],
+        }
+    if encoding != "onehot":
+        raise ValueError(f"unknown route encoding: {encoding}")
+
+    # 🔥 routeid One-hot (pd.get_dummies 와 같은 컬럼 순서)
+    routeid_columns = [f"routeid_{r}" for r in routes]
+    return {
+        "route_encoding": "onehot",
+        "routeid_columns": routeid_columns,
+        "feature_cols": ["station_num", "slot_center_min"] + routeid_columns,
+    }
+
+
+def _payload_spec(payload) -> dict:
+    spec = {
+        "route_encoding": route_encoding_of(payload),
+        "routeid_columns": payload["routeid_columns"],
+        "feature_cols": payload["feature_cols"],
+    }
+    if "route_codes" in payload:
+        spec["route_codes"] = payload["route_codes"]
+    return spec
+
+
+def _spec_routes(spec) -> set:
+    if spec["route_encoding"] == "code":
+        return set(spec["route_codes"])
+    return {c[len("routeid_"):] for c in spec["routeid_columns"]}
+
+
+def _training_matrix(agg: pd.DataFrame, spec: dict):
+    X = build_feature_frame(spec, agg["routeid"], agg["station_num"], agg["slot_center_min"])
+    return X, agg["y"]
+
+
+def _fit(agg: pd.DataFrame, n_estimators: int, spec: dict, base_model=None):
+    """base_model 이 있으면 그 booster 에 n_estimators 개 트리를 이어서 학습 (warm start)"""
+    X, y = _training_matrix(agg, spec)
+
+    model = XGBRegressor(n_estimators=n_estimators, **MODEL_PARAMS)
+    model.fit(
+        X, y,
+        xgb_model=base_model.get_booster() if base_model is not None else None,
     )
-    model.fit(X, y)
 
     y_pred = model.predict(X)
     rmse = sqrt(mean_squared_error(y, y_pred))
-    print(f"[train RMSE] {rmse:.3f}")
+    return model, rmse
+
+
+def export_compiled_model(payload, model_file: Path, model_version: str):
+    """
+    booster 를 numpy 트리 배열(bus_model_trees.npz)로 내보낸다. (웹 서버는 xgboost 없이 예측)
+    학습된 (노선, 정류장, 슬롯) 전체에 대해 XGBRegressor.predict 와 비교해서
+    오차가 PARITY_TOLERANCE 를 넘으면 내보내지 않는다. (→ 서버는 기존 xgboost 경로 사용)
+    """
+    try:
+        arrays = tree_engine.compile_booster(payload["model"].get_booster())
+    except ValueError as e:
+        print("[compiled model] not exported:", e)
+        return None
+    compiled = tree_engine.CompiledModel(
+        arrays,
+        payload["feature_cols"],
+        payload["routeid_columns"],
+        payload["route_stations"],
+        model_version,
+        route_codes=payload.get("route_codes"),
+    )
+
+    routeids, station_nums, slot_centers = [], [], []
+    for rid, stations in payload["route_stations"].items():
+        for center in SLOT_CENTERS:
+            routeids.extend([rid] * len(stations))
+            station_nums.extend(stations)
+            slot_centers.extend([center] * len(stations))
+    X = build_feature_frame(payload, routeids, station_nums, slot_centers)
+
+    diff = tree_engine.check_parity(payload["model"], compiled, X)
+    print(f"[compiled model] {compiled.n_trees} trees, depth {compiled.depth}, max |diff| {diff:.2e}")
+    if diff > tree_engine.PARITY_TOLERANCE:
+        print("[compiled model] parity check failed, not exported")
+        return None
+
+    return tree_engine.save_compiled(
+        tree_engine.compiled_path_for(model_file), arrays, payload, model_version
+    )
+
+
+def _save_payload(payload, model_path="bus_model.pkl", report=None):
+    """
+    기본 모델(bus_model.pkl)은 model registry 에 새 버전으로 올리고 승격한다.
+    그 밖의 경로는 그 파일에 바로 저장 (tmp 파일에 쓴 뒤 rename).
+    """
+    report = report or {}
+    if model_path != model_registry.MODEL_FILE:
+        model_abspath = Path(settings.BASE_DIR) / "busapi" / model_path
+        tmp_path = model_abspath.with_name(model_abspath.name + ".tmp")
+        joblib.dump(payload, tmp_path)
+        os.replace(tmp_path, model_abspath)
+
+        content_version = _file_version(model_abspath)
+        table_path = materialize_prediction_table(
+            payload, content_version, model_path=str(model_abspath)
+        )
+        print(f"[prediction table] {table_path}")
+        export_compiled_model(payload, model_abspath, content_version)
+        print(f"[memory] peak RSS {_peak_rss_mb() or 0:.0f} MB")
+        return None
+
+    with model_registry.staging() as staging_dir:
+        model_file = staging_dir / model_registry.MODEL_FILE
+        joblib.dump(payload, model_file)
+        content_version = _file_version(model_file)
+        materialize_prediction_table(payload, content_version, model_path=str(model_file))
+        export_compiled_model(payload, model_file, content_version)
+
+        meta = {
+            "rmse": report.get("rmse"),
+            "rows": report.get("rows"),
+            "slot_rows": report.get("slot_rows"),
+            "mode": report.get("mode"),
+            "feature_cols": payload["feature_cols"],
+            "n_trees": payload["model"].get_booster().num_boosted_rounds(),
+            "high_water_mark": payload.get("high_water_mark"),
+        }
+        version = model_registry.commit(staging_dir, content_version, meta)
+
+    model_registry.promote(version)
+    model_registry.prune()
+    report["version"] = version
+    print(f"[model registry] {model_registry.version_dir(version)}")
+    print(f"[memory] peak RSS {_peak_rss_mb() or 0:.0f} MB")
+    return version
+
+
+def train_model_and_save(model_path="bus_model.pkl", aggregate_in_db=True, report=None,
+                         route_encoding=None, from_snapshot=False) -> float:
+    """
+    aggregate_in_db=True  : 슬롯 필터/평균을 SQL 로 계산 (load_slot_table_from_db)
+    aggregate_in_db=False : 원본 행을 모두 읽어서 pandas 로 계산 (load_from_db)
+    from_snapshot=True    : 날짜별 스냅샷(export_history_snapshot)에서 집계하고,
+                            스냅샷 이후 들어온 행만 DB 에서 집계해서 합친다.
+
+    aggregate_in_db=True / from_snapshot=True 로 학습한 모델에는 슬롯 집계(slot_stats)와 high-water mark 가
+    같이 저장돼서 다음번에 train_model_incremental 로 이어서 학습할 수 있다.
+    report 에 dict 를 넘기면 학습 요약(mode, rows, slot_rows, rmse)을 채워 준다.
+    route_encoding: "onehot" / "code" (기본 settings.BUSAPI_ROUTE_ENCODING)
+    """
+    report = {} if report is None else report
+    report["mode"] = "full"
+    high_water_mark = None
+    snapshot_hwm = None
+    if from_snapshot:
+        snapshot_hwm = history_snapshot.high_water_mark(
+            history_snapshot.read_manifest(history_snapshot.snapshot_dir())
+        )
+        if snapshot_hwm is None:
+            print("[train data] history snapshot is empty → DB aggregate")
+
+    if snapshot_hwm is not None:
+        high_water_mark = get_high_water_mark()
+        agg = load_slot_table_from_snapshot()
+        tail = load_slot_table_from_db(since=snapshot_hwm, until=high_water_mark)
+        if not tail.empty:
+            agg = merge_slot_tables(agg, tail)
+        report["rows"] = int(agg["n"].sum())
+        print(
+            f"[train data] {len(agg)} slot rows from {report['rows']} raw rows "
+            f"(snapshot ~{snapshot_hwm} + {int(tail['n'].sum())} rows from DB)"
+        )
+    elif aggregate_in_db:
+        high_water_mark = get_high_water_mark()
+        agg = load_slot_table_from_db(until=high_water_mark)
+        report["rows"] = int(agg["n"].sum())
+        print(f"[train data] {len(agg)} slot rows from {report['rows']} raw rows (DB aggregate)")
+    else:
+        df = load_from_db()
+        print(
+            f"[train data] {len(df)} rows, "
+            f"{df.memory_usage(deep=True).sum() / 2**20:.1f} MB, "
+            f"peak RSS {_peak_rss_mb() or 0:.0f} MB"
+        )
+        report["rows"] = len(df)
+        df = add_time_slots(df)
+        agg = build_slot_level_table(df)
+
+    return _train_full(agg, high_water_mark, model_path, report, route_encoding)
+
+
+def _train_full(agg, high_water_mark, model_path, report, route_encoding=None) -> float:
+    spec = feature_spec(agg["routeid"], route_encoding)
+    model, rmse = _fit(agg, FULL_ROUNDS, spec)
+    print(f"[train RMSE] {rmse:.3f} ({spec['route_encoding']}, {len(spec['feature_cols'])} features)")
+    report.update(slot_rows=len(agg), rmse=rmse, route_encoding=spec["route_encoding"])
 
     payload = {
         "model": model,
-        "feature_cols": feature_cols,
-        "routeid_columns": list(routeid_dummies.columns),
+        **spec,
+        "route_stations": build_route_station_index(agg),
     }
+    if high_water_mark is not None:
+        payload["slot_stats"] = agg[
+            ["routeid", "station_num", "slot_center_min", "y_sum", "n"]
+        ].reset_index(drop=True)
+        payload["high_water_mark"] = high_water_mark
+
+    _save_payload(payload, model_path, report)
+    return rmse
+
 
-    model_abspath = Path(settings.BASE_DIR) / "busapi" / model_path
-    joblib.dump(payload, model_abspath)
+def _drift_rmse(payload, new_agg: pd.DataFrame) -> float:
+    """기존 모델이 새로 들어온 슬롯 평균을 얼마나 틀리는지 (행 수 가중 RMSE)"""
+    X, _ = _training_matrix(new_agg, _payload_spec(payload))
+    y_pred = payload["model"].predict(X)
+    err = (new_agg["y"].to_numpy() - y_pred) ** 2
+    return float(np.sqrt(np.average(err, weights=new_agg["n"].to_numpy())))
 
+
+def train_model_incremental(model_path="bus_model.pkl", report=None) -> float:
+    """
+    이전 학습 이후(high-water mark 이후) 들어온 행만 DB 에서 집계해서 기존 슬롯 집계에 합치고,
+      - 새 노선이 생겼거나 / 새 데이터 RMSE 가 DRIFT_THRESHOLD 를 넘거나 / 트리가 MAX_TREES 를 넘으면
+        합친 슬롯 집계로 처음부터 재학습 (원본 전체를 다시 읽지 않음)
+      - 아니면 기존 booster 에 INCREMENTAL_ROUNDS 개 트리를 이어서 학습
+    어느 쪽이든 기존 모델의 노선 feature 방식(route_encoding)을 유지한다.
+    슬롯 집계는 (노선 × 정류장 × 7 슬롯) 크기라 누적 데이터 양과 상관없이 빠르다.
+    이어서 학습할 정보가 없는 모델이면 train_model_and_save 로 전체 학습.
+    report 는 train_model_and_save 와 같고, rows 는 이번에 새로 반영한 행 수.
+    """
+    report = {} if report is None else report
+    model_abspath = model_registry.active_model_file(model_path)
+    payload = joblib.load(model_abspath) if model_abspath.exists() else None
+    if not payload or "slot_stats" not in payload:
+        print("[incremental] no slot stats in current model → full training")
+        # 지금 모델의 노선 feature 방식은 그대로 (없으면 settings 기본값)
+        encoding = route_encoding_of(payload) if payload else None
+        return train_model_and_save(model_path, report=report, route_encoding=encoding)
+
+    since = payload["high_water_mark"]
+    high_water_mark = get_high_water_mark()
+    new_agg = load_slot_table_from_db(since=since, until=high_water_mark)
+    merged = merge_slot_tables(payload["slot_stats"], new_agg)
+    report.update(mode="incremental", rows=int(new_agg["n"].sum()), slot_rows=len(merged))
+
+    spec = _payload_spec(payload)
+
+    if new_agg.empty:
+        X, y = _training_matrix(merged, spec)
+        rmse = sqrt(mean_squared_error(y, payload["model"].predict(X)))
+        print(f"[incremental] no new rows since {since} (RMSE {rmse:.3f})")
+        report.update(mode="unchanged", rmse=rmse)
+        return rmse
+
+    print(f"[incremental] {int(new_agg['n'].sum())} new rows since {since} → {len(new_agg)} slot rows")
+
+    new_routes = set(new_agg["routeid"]) - _spec_routes(spec)
+    drift = _drift_rmse(payload, new_agg) if not new_routes else None
+    n_trees = payload["model"].get_booster().num_boosted_rounds()
+
+    if new_routes:
+        reason = f"new routes {sorted(new_routes)}"
+    elif drift > DRIFT_THRESHOLD:
+        reason = f"drift RMSE {drift:.3f} > {DRIFT_THRESHOLD}"
+    elif n_trees + INCREMENTAL_ROUNDS > MAX_TREES:
+        reason = f"{n_trees} trees"
+    else:
+        reason = None
+
+    if reason is not None:
+        print(f"[incremental] full retrain on slot stats ({reason})")
+        report["mode"] = "incremental-full"
+        return _train_full(merged, high_water_mark, model_path, report, spec["route_encoding"])
+
+    model, rmse = _fit(merged, INCREMENTAL_ROUNDS, spec, base_model=payload["model"])
+    print(
+        f"[incremental] drift RMSE {drift:.3f}, "
+        f"+{INCREMENTAL_ROUNDS} trees ({n_trees} → {n_trees + INCREMENTAL_ROUNDS}), "
+        f"train RMSE {rmse:.3f}"
+    )
+    report["rmse"] = rmse
+
+    payload = {
+        "model": model,
+        **spec,
+        "route_stations": build_route_station_index(merged),
+        "slot_stats": merged[
+            ["routeid", "station_num", "slot_center_min", "y_sum", "n"]
+        ].reset_index(drop=True),
+        "high_water_mark": high_water_mark,
+    }
+    _save_payload(payload, model_path, report)
     return rmse
@@ -0,0 +1,132 @@
+# model_registry.py
+"""
+좌석 예측 모델 버전 저장소
+
+    model_registry/
+        CURRENT                       # 서비스 중인 버전 이름 (한 줄)
+        versions/
+            20251203-041500-3fa9c1e2b7d0/
+                bus_model.pkl
+                bus_model_table.npz
+                meta.json             # rmse, rows, feature_cols, created_at, ...
+
+- 새 버전은 임시 디렉토리에 다 쓴 뒤 rename 으로 versions/ 에 올리고 (쓰는 도중인 파일을 읽을 일 없음)
+- CURRENT 를 tmp 파일 + os.replace 로 바꾸는 것이 승격(promote). 버전 디렉토리 안 파일은 다시 쓰지 않는다.
+- 각 워커는 요청 때 CURRENT 가 바뀐 걸 보면 새 모델을 로드·warm-up 한 뒤에 교체 (ml_predict)
+- 롤백: python manage.py rollback_model [--to VERSION]
+
+저장 위치: settings.BUSAPI_MODEL_REGISTRY_DIR (기본 busapi/model_registry/)
+CURRENT 가 없으면 예전처럼 busapi/bus_model.pkl 을 사용한다.
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from .version_store import VersionStore
+
+
+MODEL_FILE = "bus_model.pkl"
+META_FILE = "meta.json"
+
+# 승격 후에도 남겨 둘 이전 버전 수 (롤백 대상)
+KEEP_VERSIONS = getattr(settings, "BUSAPI_MODEL_REGISTRY_KEEP", 10)
+
+
+
+def registry_dir() -> Path:
+    return Path(
+        getattr(settings, "BUSAPI_MODEL_REGISTRY_DIR", None)
+        or Path(settings.BASE_DIR) / "busapi" / "model_registry"
+    )
+
+
+_store = VersionStore(registry_dir, subdir="versions")
+
+
+def versions_dir() -> Path:
+    return _store.versions_dir()
+
+
+def version_dir(version: str) -> Path:
+    return _store.version_dir(version)
+
+
+def model_file(version: str) -> Path:
+    return version_dir(version) / MODEL_FILE
+
+
+def current_version():
+    """CURRENT 에 적힌 버전 (없으면 None)"""
+    return _store.current_version()
+
+
+def active_model_file(model_path=MODEL_FILE) -> Path:
+    """서비스 중인 모델 파일 경로 (registry 가 비어 있으면 busapi/<model_path>)"""
+    if model_path == MODEL_FILE:
+        version = current_version()
+        if version is not None:
+            return model_file(version)
+    return Path(settings.BASE_DIR) / "busapi" / model_path
+
+
+def read_meta(version: str) -> dict:
+    try:
+        return json.loads((version_dir(version) / META_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"version": version}
+
+
+def list_versions() -> list:
+    """버전 이름 오름차순 (= 만든 순서)"""
+    return _store.list_versions()
+
+
+@contextlib.contextmanager
+def staging():
+    """새 버전 파일을 쓸 임시 디렉토리. commit() 하지 않고 빠져나가면 지운다."""
+    versions_dir().mkdir(parents=True, exist_ok=True)
+    path = versions_dir() / f".staging-{uuid.uuid4().hex}"
+    path.mkdir()
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def commit(staging_path: Path, content_version: str, meta: dict) -> str:
+    """staging 디렉토리를 versions/<버전> 으로 rename 하고 버전 이름을 돌려준다."""
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{content_version}"
+    meta = dict(meta, version=version, model_version=content_version, created_at=time.time())
+    (staging_path / META_FILE).write_text(
+        json.dumps(meta, ensure_ascii=False, indent=2, default=str), encoding="utf-8"
+    )
+    os.rename(staging_path, version_dir(version))
+    return version
+
+
+def promote(version: str):
+    """CURRENT 를 version 으로 원자적으로 교체"""
+    if not model_file(version).exists():
+        raise FileNotFoundError(f"model version not found: {version}")
+
+    _store.promote(version)
+    print(f"[model registry] promoted {version}")
+
+
+def previous_version(version=None):
+    """version(기본: 현재) 바로 이전에 만들어진 버전 (없으면 None)"""
+    version = version or current_version()
+    older = [v for v in list_versions() if version is None or v < version]
+    return older[-1] if older else None
+
+
+def prune(keep: int = KEEP_VERSIONS):
+    """최근 keep 개 + 현재 버전만 남기고 오래된 버전 삭제"""
+    _store.prune(keep)
@@ -4,13 +4,28 @@ from django.contrib.auth.models import User
 ##DB 연결
 class bus_arrival_past(models.Model):
     routeid = models.CharField(max_length=20)
-    timestamp = models.IntegerField()
+    timestamp = models.DateTimeField()  # 실제 컬럼: timestamp (운행 시각)
     remainseatcnt1 = models.IntegerField()
     vehid1 = models.IntegerField()
     station_num = models.IntegerField()
 
     class Meta:
         db_table = "bus_arrival_past_3302_with_synthetic"
+        indexes = [
+            # 노선별 정류장 목록 / 노선 + 정류장 조회
+            models.Index(fields=["routeid", "station_num"], name="bus_past_route_station_idx"),
+            # 노선별 기간 조회
+            models.Index(fields=["routeid", "timestamp"], name="bus_past_route_ts_idx"),
+            # 전체 노선 기간 조회 (증분 학습 high-water mark, 보관 기간 정리)
+            models.Index(fields=["timestamp"], name="bus_past_ts_idx"),
+        ]
+        constraints = [
+            # 실시간 적재 중복 제거 키 (ingest.py 의 ON CONFLICT DO NOTHING)
+            # 파티션 키(timestamp)를 포함해서 파티션 테이블에서도 유지된다
+            models.UniqueConstraint(
+                fields=["routeid", "vehid1", "station_num", "timestamp"], name="bus_past_unique_key"
+            ),
+        ]
 
 
 class Favorite(models.Model):
@@ -0,0 +1,640 @@
+# realtime.py
+"""
+노선 실시간 버스 위치 (getBusLocationListv2) 조회 + 짧은 TTL 캐시
+
+같은 노선을 여러 사용자가 동시에 polling 해도 upstream 호출은 TTL 당 한 번만 나가도록
+  1) 프로세스 내 캐시 + single-flight (같은 노선 동시 miss 는 한 요청만 upstream 호출)
+  2) Django cache (Redis/Memcached 등 공유 backend 면 워커 간에도 공유)
+     + cache.add 락으로 워커 간 동시 miss 도 한 워커만 호출
+
+노선 번호(routeName) 는 routes.json 기반 로컬 메타데이터에서 찾는다. (get_route_name)
+
+manage.py poll_realtime 이 돌고 있으면, hot 노선은 스냅샷 저장소에서 바로 읽는다.
+(publish_snapshot / get_snapshot)
+"""
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import ingest, static_data, upstream
+
+
+BUS_LOCATION_CACHE_TTL = getattr(settings, "BUS_LOCATION_CACHE_TTL", 5)  # 초
+
+# 다른 워커가 upstream 호출 중일 때 결과를 기다리는 최대 시간(초)
+BUS_LOCATION_LOCK_WAIT = getattr(settings, "BUS_LOCATION_LOCK_WAIT", 2.0)
+
+# routes.json 에 없는 노선의 이름을 upstream 에서 받아와 보관하는 시간(초)
+ROUTE_INFO_CACHE_TTL = getattr(settings, "ROUTE_INFO_CACHE_TTL", 24 * 60 * 60)
+ROUTE_INFO_NEGATIVE_TTL = 10 * 60  # upstream 에서도 못 찾은 경우
+
+# poll_realtime 스냅샷을 신선하다고 보는 최대 나이(초) / 파일 저장소 경로(없으면 cache 만 사용)
+REALTIME_SNAPSHOT_MAX_AGE = getattr(settings, "REALTIME_SNAPSHOT_MAX_AGE", 30)
+REALTIME_SNAPSHOT_DIR = getattr(settings, "REALTIME_SNAPSHOT_DIR", None)
+
+_CACHE_PREFIX = "busapi:bus_location:"
+_ROUTE_NAME_PREFIX = "busapi:route_name:"
+_SNAPSHOT_PREFIX = "busapi:snapshot:"
+
+
+def fetch_bus_locations(routeid: str):
+    """
+    upstream 을 직접 호출한다. (캐시 없음)
+    성공: (query_time, loc_list) / 실패: None
+    """
+    try:
+        data = upstream.get_json("bus_location", {"routeId": routeid})
+    except Exception as e:
+        print("buslocationservice API error:", e)
+        return None
+
+    result = parse_bus_locations(data)
+    ingest.submit_locations(routeid, *result)  # 학습 데이터 적재 (BUSAPI_INGEST 켜져 있을 때)
+    return result
+
+
+def parse_bus_locations(data: dict):
+    """getBusLocationListv2 응답 JSON → (query_time, loc_list)"""
+    # ✅ 공식 예시: 최상단에 msgHeader / msgBody 가 바로 있음
+    # 혹시 다른 버전(response 래퍼)도 대응하고 싶으면 분기 처리
+    if "response" in data:
+        # 다른 API들과 같은 패턴일 수도 있어서 방어적으로 처리
+        resp = data.get("response", {})
+        header = resp.get("msgHeader", {}) or {}
+        body = resp.get("msgBody", {}) or {}
+    else:
+        header = data.get("msgHeader", {}) or {}
+        body = data.get("msgBody", {}) or {}
+
+    query_time = header.get("queryTime", "")
+    loc_list = body.get("busLocationList", []) or []
+
+    # 한 대만 있으면 dict, 여러 대면 list → 항상 list 로 맞추기
+    if isinstance(loc_list, dict):
+        loc_list = [loc_list]
+
+    return query_time, loc_list
+
+
+def crowded_level_of(crowded_raw, remainseat) -> int:
+    """API 혼잡도(1~4) 가 없으면 좌석수로 추정"""
+    try:
+        crowded_level = int(crowded_raw)
+        if crowded_level not in (1, 2, 3, 4):
+            raise ValueError
+    except Exception:
+        # 좌석수 기반 추정
+        if remainseat is None:
+            crowded_level = 2
+        else:
+            if remainseat >= 35:
+                crowded_level = 1
+            elif remainseat >= 25:
+                crowded_level = 2
+            elif remainseat >= 10:
+                crowded_level = 3
+            else:
+                crowded_level = 4
+    return crowded_level
+
+
+def normalize_bus_locations(routeid: str, query_time: str, loc_list, route_name: str,
+                            service_date=None) -> list:
+    """getBusLocationListv2 결과 → bus_realtime GET 응답 행 리스트"""
+    out = []
+    for item in loc_list:
+        try:
+            station_seq = int(item.get("stationSeq"))
+        except Exception:
+            station_seq = None
+
+        remain_raw = item.get("remainSeatCnt")
+        try:
+            remainseat = (
+                int(remain_raw)
+                if remain_raw not in (None, "", " ", -1)
+                else None
+            )
+        except Exception:
+            remainseat = None
+
+        service_date_out = service_date or (
+            query_time.split(" ")[0] if query_time else ""
+        )
+
+        out.append(
+            {
+                "service_date": service_date_out,
+                "arrival_time": query_time,
+                "vehid1": str(item.get("vehId") or ""),
+                "station_num": str(station_seq) if station_seq is not None else "",
+                "remainseat_at_arrival": remainseat,
+                "routeid": str(item.get("routeId") or routeid),
+                "routename": route_name,
+                "stationid": str(item.get("stationId") or ""),
+                "crowded_level": crowded_level_of(item.get("crowded"), remainseat),
+            }
+        )
+    return out
+
+
+def match_station_locations(stations, query_time: str, loc_list) -> list:
+    """
+    bus_realtime POST 용: 요청한 정류장 목록마다 그 정류장에 있는 버스를 붙인다.
+    결과: [{ "stationId", "staOrder", "raw": {vehId1, locationNo1, ...} 또는 None }, ...]
+    """
+    # (stationId, stationSeq) 기준으로 인덱싱
+    index = {}
+    for item in loc_list:
+        s_id = str(item.get("stationId"))
+        try:
+            s_seq = int(item.get("stationSeq"))
+        except Exception:
+            continue
+        key = (s_id, s_seq)
+        index.setdefault(key, []).append(item)
+
+    total_stops = len(stations) if stations else 1
+
+    results = []
+
+    for s in stations:
+        station_id = s.get("stationId")
+        sta_order = s.get("staOrder")
+
+        if not station_id or sta_order is None:
+            results.append(
+                {
+                    "stationId": station_id,
+                    "staOrder": sta_order,
+                    "raw": None,
+                }
+            )
+            continue
+
+        key = (str(station_id), int(sta_order))
+        items_here = index.get(key)
+        raw = None
+
+        if items_here:
+            item0 = items_here[0]
+            try:
+                seq = int(item0.get("stationSeq") or sta_order)
+            except Exception:
+                seq = int(sta_order)
+
+            # BusSearch 에서 쓰던 locationNo1 형식 맞추기:
+            #   totalStops - 1 - locationNo1 = 타임라인 index
+            # → 우리가 그냥 "해당 정류장 index" 에 꽂히도록 역산
+            location_no1 = max(total_stops - 1 - (seq - 1), 0)
+
+            remain_raw = item0.get("remainSeatCnt")
+            try:
+                remain_seat = (
+                    int(remain_raw)
+                    if remain_raw not in (None, "", " ", -1)
+                    else None
+                )
+            except Exception:
+                remain_seat = None
+
+            raw = {
+                "vehId1": str(item0.get("vehId") or ""),
+                "locationNo1": location_no1,
+                "remainSeatCnt1": remain_seat,
+                "crowded1": item0.get("crowded"),
+                "queryTime": query_time,
+            }
+
+        results.append(
+            {
+                "stationId": station_id,
+                "staOrder": sta_order,
+                "raw": raw,
+            }
+        )
+
+    return results
+
+
+def parse_station_arrival(arrival_json: dict, stationid: str, routeid: str, routename: str,
+                          sta_order, service_date=None):
+    """getBusArrivalItemv2 응답 → station_realtime 응답 행 (도착 예정 버스 없으면 None)"""
+    resp = arrival_json.get("response", {})
+    header = resp.get("msgHeader", {}) or {}
+    body_item = resp.get("msgBody", {}).get("busArrivalItem")
+
+    if not body_item:
+        return None
+
+    query_time = header.get("queryTime", "")
+
+    vehid1 = str(
+        body_item.get("vehId1")
+        or body_item.get("vehid1")
+        or ""
+    )
+
+    remain_raw = body_item.get("remainSeatCnt1")
+    try:
+        remainseat = (
+            int(remain_raw)
+            if remain_raw not in (None, "", " ")
+            else None
+        )
+    except Exception:
+        remainseat = None
+
+    crowded_level = crowded_level_of(body_item.get("crowded1"), remainseat)
+
+    return {
+        "service_date": service_date
+        or (query_time.split(" ")[0] if query_time else ""),
+        "arrival_time": query_time,
+        "vehid1": vehid1,
+        "station_num": str(sta_order),
+        "remainseat_at_arrival": remainseat,
+        "routeid": routeid,
+        "routename": routename,
+        "stationid": stationid,
+        "crowded_level": crowded_level,
+    }
+
+
+# -----------------------------
+#  poll_realtime 스냅샷 저장소
+# -----------------------------
+# 스냅샷: {"routeid", "query_time", "fetched_at", "items"(원본 loc_list), "records"(정규화 결과)}
+#   - Django cache 에 저장 (공유 backend 면 모든 워커가 같은 스냅샷을 읽음)
+#   - REALTIME_SNAPSHOT_DIR 가 있으면 노선별 json 파일에도 저장
+
+
+def _snapshot_file(routeid: str) -> Path:
+    return Path(REALTIME_SNAPSHOT_DIR) / f"{routeid}.json"
+
+
+def publish_snapshot(routeid: str, query_time: str, loc_list, records) -> dict:
+    routeid = str(routeid)
+    snapshot = {
+        "routeid": routeid,
+        "query_time": query_time,
+        "fetched_at": time.time(),
+        "items": loc_list,
+        "records": records,
+    }
+    cache.set(_SNAPSHOT_PREFIX + routeid, snapshot, timeout=REALTIME_SNAPSHOT_MAX_AGE * 2)
+
+    if REALTIME_SNAPSHOT_DIR:
+        path = _snapshot_file(routeid)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    return snapshot
+
+
+def _read_snapshot_file(routeid: str):
+    try:
+        with open(_snapshot_file(routeid), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _fresh_snapshot(snapshot, max_age):
+    max_age = REALTIME_SNAPSHOT_MAX_AGE if max_age is None else max_age
+    if snapshot is None or time.time() - snapshot["fetched_at"] > max_age:
+        return None
+    return snapshot
+
+
+def get_snapshot(routeid: str, max_age=None):
+    """신선한 스냅샷이 있으면 돌려주고, 없거나 오래됐으면 None"""
+    routeid = str(routeid)
+    snapshot = cache.get(_SNAPSHOT_PREFIX + routeid)
+    if snapshot is None and REALTIME_SNAPSHOT_DIR:
+        snapshot = _read_snapshot_file(routeid)
+    return _fresh_snapshot(snapshot, max_age)
+
+
+async def aget_snapshot(routeid: str, max_age=None):
+    """get_snapshot 의 비동기 버전 (cache.aget, 파일은 스레드 풀에서 읽음)"""
+    routeid = str(routeid)
+    snapshot = await cache.aget(_SNAPSHOT_PREFIX + routeid)
+    if snapshot is None and REALTIME_SNAPSHOT_DIR:
+        snapshot = await sync_to_async(_read_snapshot_file, thread_sensitive=False)(routeid)
+    return _fresh_snapshot(snapshot, max_age)
+
+
+def station_arrival_from_snapshot(snapshot: dict, stationid: str, routename: str,
+                                  sta_order, service_date=None):
+    """
+    스냅샷의 버스 위치로 station_realtime 응답 행을 만든다.
+    해당 정류장(sta_order) 에 가장 가까이 다가온 버스 한 대, 없으면 None.
+    """
+    best = None
+    best_seq = None
+    for item in snapshot["items"]:
+        try:
+            seq = int(item.get("stationSeq"))
+        except Exception:
+            continue
+        if seq <= int(sta_order) and (best_seq is None or seq > best_seq):
+            best, best_seq = item, seq
+
+    if best is None:
+        return None
+
+    query_time = snapshot["query_time"]
+    remain_raw = best.get("remainSeatCnt")
+    try:
+        remainseat = (
+            int(remain_raw)
+            if remain_raw not in (None, "", " ", -1)
+            else None
+        )
+    except Exception:
+        remainseat = None
+
+    return {
+        "service_date": service_date
+        or (query_time.split(" ")[0] if query_time else ""),
+        "arrival_time": query_time,
+        "vehid1": str(best.get("vehId") or ""),
+        "station_num": str(sta_order),
+        "remainseat_at_arrival": remainseat,
+        "routeid": snapshot["routeid"],
+        "routename": routename,
+        "stationid": stationid,
+        "crowded_level": crowded_level_of(best.get("crowded"), remainseat),
+    }
+
+
+# -----------------------------
+#  프로세스 내 캐시 + single-flight
+# -----------------------------
+_local_cache = {}     # routeid → (expires_at, result)
+_inflight = {}        # routeid → _Flight
+_local_lock = threading.Lock()
+
+
+class _Flight:
+    """같은 노선에 대해 진행 중인 upstream 호출 하나 (기다리는 요청들이 결과를 공유)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+def _local_get(routeid: str):
+    hit = _local_cache.get(routeid)
+    if hit is not None and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
+
+def _lock_timeout() -> int:
+    """
+    cache.add 락 TTL(초): 락을 잡은 워커의 upstream 호출보다 길게.
+    호출 도중 락이 풀리면 다른 워커도 호출하고, 먼저 끝난 쪽이 남의 락을 지우게 된다.
+    """
+    return math.ceil(upstream.max_call_seconds("bus_location")) + 1
+
+
+def _shared_fetch(routeid: str):
+    """
+    Django cache 확인 → 없으면 cache.add 락을 잡은 워커만 upstream 호출.
+    락을 못 잡으면 잠깐 기다렸다가 다른 워커가 채운 값을 사용한다.
+    """
+    key = _CACHE_PREFIX + routeid
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    lock_key = key + ":lock"
+    locked = cache.add(lock_key, 1, timeout=_lock_timeout())
+    if not locked:
+        deadline = time.monotonic() + BUS_LOCATION_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            result = cache.get(key)
+            if result is not None:
+                return result
+        # 락 잡은 워커가 늦거나 죽었으면 직접 호출
+
+    try:
+        result = fetch_bus_locations(routeid)
+        if result is not None:
+            cache.set(key, result, timeout=BUS_LOCATION_CACHE_TTL)
+        return result
+    finally:
+        if locked:  # 기다리다 직접 호출한 경우 락은 다른 워커 것
+            cache.delete(lock_key)
+
+
+def call_buslocation_api(routeid: str):
+    """
+    노선 실시간 위치 조회 (TTL 캐시 + 요청 합치기)
+    성공: (query_time, loc_list) / 실패: None  (실패는 캐시하지 않음)
+    """
+    routeid = str(routeid)
+
+    snapshot = get_snapshot(routeid)
+    if snapshot is not None:
+        return snapshot["query_time"], snapshot["items"]
+
+    result = _local_get(routeid)
+    if result is not None:
+        return result
+
+    with _local_lock:
+        result = _local_get(routeid)
+        if result is not None:
+            return result
+        flight = _inflight.get(routeid)
+        leader = flight is None
+        if leader:
+            flight = _inflight[routeid] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        return flight.result
+
+    try:
+        flight.result = _shared_fetch(routeid)
+        if flight.result is not None:
+            with _local_lock:
+                _local_cache[routeid] = (
+                    time.monotonic() + BUS_LOCATION_CACHE_TTL,
+                    flight.result,
+                )
+    finally:
+        with _local_lock:
+            _inflight.pop(routeid, None)
+        flight.done.set()
+
+    return flight.result
+
+
+# -----------------------------
+#  비동기 버전 (views_async.py)
+# -----------------------------
+# 같은 이벤트 루프 안에서 같은 노선 동시 miss 는 Future 하나를 같이 기다린다.
+# 프로세스 내 TTL 캐시(_local_cache) 와 Django cache 는 동기 버전과 공유.
+# Django cache 는 aget / aset 으로만 접근한다. (Redis 등 네트워크 backend 를 이벤트 루프에서 막지 않도록)
+_ainflight = {}   # (event loop, routeid) → asyncio.Future
+
+
+async def afetch_bus_locations(routeid: str):
+    try:
+        data = await upstream.aget_json("bus_location", {"routeId": routeid})
+    except Exception as e:
+        print("buslocationservice API error:", e)
+        return None
+
+    result = parse_bus_locations(data)
+    ingest.submit_locations(routeid, *result)
+    return result
+
+
+async def acall_buslocation_api(routeid: str):
+    """call_buslocation_api 의 비동기 버전"""
+    routeid = str(routeid)
+
+    snapshot = await aget_snapshot(routeid)
+    if snapshot is not None:
+        return snapshot["query_time"], snapshot["items"]
+
+    result = _local_get(routeid)
+    if result is not None:
+        return result
+
+    loop = asyncio.get_running_loop()
+    flight_key = (loop, routeid)
+    flight = _ainflight.get(flight_key)
+    if flight is not None:
+        return await asyncio.shield(flight)
+
+    flight = _ainflight[flight_key] = loop.create_future()
+    result = None
+    try:
+        key = _CACHE_PREFIX + routeid
+        result = await cache.aget(key)
+        if result is None:
+            result = await afetch_bus_locations(routeid)
+            if result is not None:
+                await cache.aset(key, result, timeout=BUS_LOCATION_CACHE_TTL)
+        if result is not None:
+            with _local_lock:
+                _local_cache[routeid] = (time.monotonic() + BUS_LOCATION_CACHE_TTL, result)
+    finally:
+        _ainflight.pop(flight_key, None)
+        flight.set_result(result)  # 실패하면 기다리던 요청들도 None (→ 502)
+
+    return result
+
+
+async def afetch_station_arrival(stationid: str, routeid: str, routename: str, sta_order, service_date):
+    arrival_json = await upstream.aget_json(
+        "bus_arrival",
+        {
+            "stationId": stationid,
+            "routeId": routeid,
+            "staOrder": sta_order,
+        },
+    )
+    return parse_station_arrival(
+        arrival_json, stationid, routeid, routename, sta_order, service_date
+    )
+
+
+# -----------------------------
+#  노선 메타데이터 (routeId → 노선 번호)
+# -----------------------------
+# routes.json 의 route_nm 으로 먼저 찾고, 없는 노선만 getBusRouteInfoItemv2 로
+# 백그라운드에서 채워서 Django cache 에 오래 보관한다.
+# → 실시간 GET 요청 경로에서는 upstream 호출이 위치 조회 한 번뿐
+_route_info_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route-info")
+_route_info_pending = set()
+
+
+def fetch_route_name(routeid: str) -> str:
+    """getBusRouteInfoItemv2 로 노선 번호 조회 (실패하면 "")"""
+    try:
+        info_json = upstream.get_json("route_info", {"routeId": routeid})
+        return str(
+            info_json.get("response", {})
+            .get("msgBody", {})
+            .get("busRouteInfoItem", {})
+            .get("routeName", "")
+        )
+    except Exception as e:
+        print("route info api error:", e)
+        return ""
+
+
+def _fill_route_name(routeid: str):
+    try:
+        name = fetch_route_name(routeid)
+        cache.set(
+            _ROUTE_NAME_PREFIX + routeid,
+            name,
+            timeout=ROUTE_INFO_CACHE_TTL if name else ROUTE_INFO_NEGATIVE_TTL,
+        )
+    finally:
+        with _local_lock:
+            _route_info_pending.discard(routeid)
+
+
+def get_route_name(routeid: str) -> str:
+    """
+    노선 번호 (예: "3302"). 모르는 노선이면 "" 를 돌려주고 백그라운드로 채운다.
+    """
+    routeid = str(routeid)
+
+    name = static_data.ROUTE_NAMES.get(routeid)
+    if name:
+        return name
+
+    name = cache.get(_ROUTE_NAME_PREFIX + routeid)
+    if name is not None:
+        return name
+
+    _schedule_route_name(routeid)
+    return ""
+
+
+async def aget_route_name(routeid: str) -> str:
+    """get_route_name 의 비동기 버전 (cache.aget)"""
+    routeid = str(routeid)
+
+    name = static_data.ROUTE_NAMES.get(routeid)
+    if name:
+        return name
+
+    name = await cache.aget(_ROUTE_NAME_PREFIX + routeid)
+    if name is not None:
+        return name
+
+    _schedule_route_name(routeid)
+    return ""
+
+
+def _schedule_route_name(routeid: str):
+    with _local_lock:
+        if routeid in _route_info_pending:
+            return
+        _route_info_pending.add(routeid)
+    _route_info_executor.submit(_fill_route_name, routeid)
@@ -0,0 +1,205 @@
+# route_planner.py
+"""
+경로 추천 (/api/recommend-route/) 용 RAPTOR 경로 탐색
+
+routes.json 에는 시간표가 없어서 소요 시간은 정류장 수로 추정한다.
+  - 정류장 한 칸 = MINUTES_PER_STOP 분, 환승 한 번 = TRANSFER_MINUTES 분 (갈아타는 시간 + 기다리는 시간)
+  - 환승은 같은 station_id 를 지나는 노선끼리만 (도보 환승 없음)
+
+색인(처음 탐색할 때 한 번, static_data 스냅샷 버전이 바뀌면 다시):
+  - station_id → 정수 번호
+  - 노선별 정류장 번호 배열 (sta_order 순)
+  - 정류장별 (노선 번호, 노선 안 위치) 목록
+
+탐색: 라운드 k = 버스 k 번 탄 경우. 라운드마다 직전 라운드에서 도착 시간이 좋아진 정류장을
+지나는 노선만 그 정류장 이후로 훑는다. 환승 횟수별로 더 빨라진 경우만 결과로 남긴다.
+(환승 0번 가장 빠른 경로, 환승 1번으로 더 빨라지면 그 경로, ...)
+"""
+
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+
+from . import static_data
+
+
+MINUTES_PER_STOP = getattr(settings, "BUSAPI_ROUTE_MINUTES_PER_STOP", 2.0)
+TRANSFER_MINUTES = getattr(settings, "BUSAPI_ROUTE_TRANSFER_MINUTES", 5.0)
+MAX_TRANSFERS = getattr(settings, "BUSAPI_ROUTE_MAX_TRANSFERS", 2)
+
+_INF = float("inf")
+
+_planner_lock = threading.Lock()
+_planner_cache = {"version": None, "planner": None}
+
+
+class Leg(NamedTuple):
+    route: int  # 노선 번호
+    board_pos: int  # 노선 안 위치
+    alight_pos: int
+    from_round: int  # 탑승 정류장 도착 시간을 만든 라운드
+
+
+class RoutePlanner:
+    """노선 정류장 배열 기반 RAPTOR (한 번 만들면 읽기 전용)"""
+
+    def __init__(self, routes: dict):
+        """routes: routeId → [{route_nm, sta_order, station_id, station_nm}, ...]"""
+        self.station_ids = []
+        self.station_names = []
+        self._station_index = {}
+
+        self.route_ids = []
+        self.route_names = []
+        self.route_stops = []  # 노선별 정류장 번호 tuple
+        self.route_orders = []  # 노선별 sta_order tuple
+
+        stop_routes = []  # 정류장 번호 → [(노선 번호, 위치), ...]
+        for route_id, stops in routes.items():
+            stops = sorted(
+                (s for s in stops if s.get("station_id") is not None),
+                key=lambda s: s.get("sta_order") or 0,
+            )
+            if len(stops) < 2:
+                continue
+
+            r = len(self.route_ids)
+            self.route_ids.append(str(route_id))
+            self.route_names.append(stops[0].get("route_nm"))
+
+            indexes = []
+            for pos, stop in enumerate(stops):
+                station_id = str(stop["station_id"])
+                i = self._station_index.get(station_id)
+                if i is None:
+                    i = self._station_index[station_id] = len(self.station_ids)
+                    self.station_ids.append(station_id)
+                    self.station_names.append(stop.get("station_nm"))
+                    stop_routes.append([])
+                indexes.append(i)
+                stop_routes[i].append((r, pos))
+
+            self.route_stops.append(tuple(indexes))
+            self.route_orders.append(tuple(s.get("sta_order") for s in stops))
+
+        self.stop_routes = [tuple(entries) for entries in stop_routes]
+
+    def has_station(self, station_id) -> bool:
+        return str(station_id) in self._station_index
+
+    def _raptor(self, origin: int, dest: int, max_transfers: int):
+        """라운드별 (도착 시간 리스트, 마지막 구간 리스트)"""
+        n = len(self.station_ids)
+        arrival = [_INF] * n
+        arrival[origin] = 0.0
+        rounds = [(arrival, [None] * n)]
+        best = list(arrival)  # 라운드 상관없이 정류장별 가장 빠른 도착 시간
+        marked = {origin}
+
+        for k in range(1, max_transfers + 2):
+            prev_arrival, prev_legs = rounds[-1]
+            arrival, legs = list(prev_arrival), list(prev_legs)
+            change = TRANSFER_MINUTES if k > 1 else 0.0
+
+            # 이번 라운드에 훑을 노선: 노선별로 표시된 정류장 중 가장 앞 위치부터
+            queue = {}
+            for i in marked:
+                for r, pos in self.stop_routes[i]:
+                    if pos < queue.get(r, _INF):
+                        queue[r] = pos
+            marked = set()
+
+            for r, start in queue.items():
+                stops = self.route_stops[r]
+                board_pos, board_time = -1, _INF
+                for pos in range(start, len(stops)):
+                    i = stops[pos]
+                    if board_pos >= 0:
+                        t = board_time + (pos - board_pos) * MINUTES_PER_STOP
+                        if t < best[i] and t < best[dest]:
+                            arrival[i] = best[i] = t
+                            legs[i] = Leg(r, board_pos, pos, k - 1)
+                            marked.add(i)
+                    # 직전 라운드 도착 시간으로 여기서 타는 게 더 이르면 여기서 탄다
+                    depart = prev_arrival[i] + change
+                    if depart < _INF and (
+                        board_pos < 0 or depart < board_time + (pos - board_pos) * MINUTES_PER_STOP
+                    ):
+                        board_pos, board_time = pos, depart
+
+            rounds.append((arrival, legs))
+            if not marked:
+                break
+        return rounds
+
+    def _itinerary(self, rounds, k: int, dest: int) -> dict:
+        # 도착 정류장에서 구간을 거꾸로 따라가며 탑승 정류장 → 그 도착 시간을 만든 라운드
+        legs = []
+        i = dest
+        while True:
+            leg = rounds[k][1][i]
+            if leg is None:
+                break
+            legs.append(leg)
+            i = self.route_stops[leg.route][leg.board_pos]
+            k = leg.from_round
+        legs.reverse()
+
+        out = []
+        for leg in legs:
+            r = leg.route
+            stops = leg.alight_pos - leg.board_pos
+            out.append({
+                "routeId": self.route_ids[r],
+                "routeName": self.route_names[r],
+                "board": self._stop(r, leg.board_pos),
+                "alight": self._stop(r, leg.alight_pos),
+                "stops": stops,
+                "minutes": stops * MINUTES_PER_STOP,
+            })
+        return {
+            "bus_numbers": [leg["routeName"] for leg in out],
+            "routeids": [leg["routeId"] for leg in out],
+            "transfers": len(out) - 1,
+            "duration_minutes": sum(leg["minutes"] for leg in out) + (len(out) - 1) * TRANSFER_MINUTES,
+            "legs": out,
+        }
+
+    def _stop(self, r: int, pos: int) -> dict:
+        i = self.route_stops[r][pos]
+        return {
+            "stationId": self.station_ids[i],
+            "name": self.station_names[i],
+            "staOrder": self.route_orders[r][pos],
+        }
+
+    def plan(self, origin_id, dest_id, max_transfers: int = MAX_TRANSFERS):
+        """
+        환승 횟수별로 더 빨라지는 경로들 (소요 시간 순)
+        [{"bus_numbers", "routeids", "transfers", "duration_minutes", "legs": [...]}, ...]
+        """
+        origin = self._station_index.get(str(origin_id))
+        dest = self._station_index.get(str(dest_id))
+        if origin is None or dest is None or origin == dest:
+            return []
+
+        rounds = self._raptor(origin, dest, max_transfers)
+        itineraries = []
+        for k in range(1, len(rounds)):
+            if rounds[k][0][dest] < rounds[k - 1][0][dest]:
+                itineraries.append(self._itinerary(rounds, k, dest))
+        itineraries.sort(key=lambda it: (it["duration_minutes"], it["transfers"]))
+        return itineraries
+
+
+def get_planner() -> RoutePlanner:
+    version = static_data.current_version()
+    planner = _planner_cache["planner"]
+    if planner is not None and _planner_cache["version"] == version:
+        return planner
+
+    with _planner_lock:
+        if _planner_cache["planner"] is None or _planner_cache["version"] != version:
+            _planner_cache.update(planner=RoutePlanner(static_data.ROUTES), version=version)
+        return _planner_cache["planner"]
@@ -0,0 +1,145 @@
+# static_data.py
+"""
+busapi/data/*.json 정적 노선/정류장 데이터
+
+STATION_BUS / ROUTES / ... 는 import 할 때가 아니라 처음 접근할 때 로드한다.
+(워커 시작이나 이 데이터를 쓰지 않는 manage.py 명령이 파싱 비용을 내지 않도록)
+  - compile_static_data 로 만든 스냅샷(static_snapshot)이 있으면 memory-map 해서 쓰고
+    (워커끼리 같은 페이지를 공유), CHECK_INTERVAL 마다 CURRENT 를 확인해서 바뀌었으면 재시작 없이 교체
+  - 없으면 JSON 을 읽어서 dict 로
+쓰는 쪽에서는 `from . import static_data` 후 함수 안에서 static_data.ROUTES 처럼 접근한다.
+(`from .static_data import ROUTES` 로 가져오면 그 시점의 버전에 고정됨)
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import NamedTuple
+
+from django.conf import settings
+
+
+DATA_DIR = Path(settings.BASE_DIR) / "busapi" / "data"
+
+# 처음 접근할 때 _load() 가 채우는 이름들
+#   STATION_BUS    : 정류장 → {name, busNums, busCount}
+#   ROUTES         : routeId → [ {route_nm, sta_order, station_id, station_nm}, ... ]
+#   ROUTE_NM_TO_IDS: 버스번호(route_nm) → routeId 리스트 (대부분 1개일 가능성이 큼)
+#   ROUTE_NAMES    : routeId → 버스번호(route_nm)
+#   STATION_ROUTES : 정류장 → ((routeId, routeName, staOrder), ...) 역인덱스
+_LAZY_NAMES = ("STATION_BUS", "ROUTES", "ROUTE_NM_TO_IDS", "ROUTE_NAMES", "STATION_ROUTES")
+_load_lock = threading.Lock()
+
+# 컴파일된 스냅샷 버전(CURRENT)을 다시 확인하는 간격(초)
+CHECK_INTERVAL = getattr(settings, "BUSAPI_STATIC_DATA_CHECK_INTERVAL", 5.0)
+
+# version: 스냅샷 버전 (JSON 에서 읽었으면 None)
+_state = {"version": None, "data": None, "checked_at": 0.0}
+
+
+# 정류장 → 노선 역인덱스
+#    요청마다 busNums → 노선 → 정류장 목록을 훑지 않도록 로드할 때 한 번 만든다.
+#    순환 노선처럼 한 노선이 같은 정류장을 두 번 지나면 staOrder 별로 따로 들어간다.
+class StationRoute(NamedTuple):
+    route_id: str
+    route_name: str
+    sta_order: int
+
+
+def build_station_routes(routes: dict, station_bus: dict):
+    index: dict[str, list[StationRoute]] = {}
+    for route_id, stops in routes.items():
+        for stop in stops:
+            route_nm = stop.get("route_nm")
+            station_id = stop.get("station_id")
+            if not route_nm or station_id is None:
+                continue
+            index.setdefault(str(station_id), []).append(
+                StationRoute(route_id, route_nm, stop.get("sta_order"))
+            )
+
+    # 정류장의 busNums 순서대로 (같은 노선 안에서는 staOrder 순)
+    def order(station_id):
+        bus_nums = station_bus.get(station_id, {}).get("busNums", [])
+        rank = {bus_nm: i for i, bus_nm in enumerate(bus_nums)}
+        return lambda r: (rank.get(r.route_name, len(rank)), r.sta_order is None, r.sta_order or 0)
+
+    return MappingProxyType({
+        station_id: tuple(sorted(entries, key=order(station_id)))
+        for station_id, entries in index.items()
+    })
+
+
+def derive(station_bus: dict, routes: dict) -> dict:
+    """stationBus.json / routes.json 내용 → _LAZY_NAMES 전체"""
+    route_nm_to_ids: dict[str, list[str]] = {}
+    route_names: dict[str, str] = {}
+    for route_id, stops in routes.items():
+        if not stops:
+            continue
+        route_nm = stops[0].get("route_nm")
+        if not route_nm:
+            continue
+        route_nm_to_ids.setdefault(route_nm, []).append(route_id)
+        route_names[route_id] = route_nm
+
+    return {
+        "STATION_BUS": station_bus,
+        "ROUTES": routes,
+        "ROUTE_NM_TO_IDS": route_nm_to_ids,
+        "ROUTE_NAMES": route_names,
+        "STATION_ROUTES": build_station_routes(routes, station_bus),
+    }
+
+
+def read_json(data_dir: Path = DATA_DIR):
+    """(stationBus.json, routes.json) 내용"""
+    with open(data_dir / "stationBus.json", encoding="utf-8") as f:
+        station_bus = json.load(f)
+
+    with open(data_dir / "routes.json", encoding="utf-8") as f:
+        routes = json.load(f)
+    return station_bus, routes
+
+
+def _load(version):
+    if version is not None:
+        from . import static_snapshot
+        try:
+            return static_snapshot.open_snapshot(version).mappings()
+        except (OSError, ValueError) as e:
+            print(f"[static data] snapshot {version} 을 열 수 없어서 JSON 사용: {e}")
+    return derive(*read_json())
+
+
+def _current() -> dict:
+    now = time.monotonic()
+    if _state["data"] is not None and now - _state["checked_at"] < CHECK_INTERVAL:
+        return _state["data"]
+
+    with _load_lock:
+        if _state["data"] is None or now - _state["checked_at"] >= CHECK_INTERVAL:
+            from . import static_snapshot
+            version = static_snapshot.current_version()
+            if _state["data"] is None or version != _state["version"]:
+                # 새 버전을 다 연 다음에 교체 (그동안 다른 스레드는 이전 버전을 그대로 사용)
+                _state.update(data=_load(version), version=version)
+                if version is not None:
+                    print(f"[static data] snapshot {version}")
+            _state["checked_at"] = now
+    return _state["data"]
+
+
+def current_version():
+    """사용 중인 스냅샷 버전 (JSON 이면 None)"""
+    _current()
+    return _state["version"]
+
+
+def __getattr__(name):
+    # 모듈 속성으로 없는 이름일 때만 불린다
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _current()[name]
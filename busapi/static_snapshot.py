@@ -0,0 +1,487 @@
+# static_snapshot.py
+"""
+busapi/data/*.json → 컴파일된 정적 노선 데이터 스냅샷 (워커들이 memory-map 해서 공유)
+
+    data/compiled/
+        CURRENT                        # 사용할 버전 (한 줄)
+        <버전: JSON 내용 해시 12자리>/
+            meta.json                  # 원본 해시, 개수, 만든 시각
+            strings_blob.npy           # uint8  문자열 표 (UTF-8, 중복 없이 한 번씩)
+            strings_offsets.npy        # int64  (N+1,)
+            station_ids.npy            # int64  정렬된 정류장 id
+            ...                        # 아래 ARRAYS 참고
+
+- 정류장/노선 id 는 정수 배열 + np.searchsorted, 이름은 문자열 표 인덱스
+- 노선별 정류장 목록, 정류장별 busNums, 정류장 → 노선 역인덱스는 CSR(offsets + 값 배열)
+- 컴파일할 때 검증하고, 다 쓴 뒤 다시 읽어서 JSON 과 같은지 확인한 다음에만 CURRENT 를 바꾼다.
+- 워커(static_data)는 CURRENT 가 바뀐 걸 보면 재시작 없이 새 스냅샷으로 교체
+
+    python manage.py compile_static_data
+
+저장 위치: settings.BUSAPI_STATIC_SNAPSHOT_DIR (기본 busapi/data/compiled/)
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from . import static_data
+from .version_store import VersionStore
+
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+KEEP_VERSIONS = 3  # 예전 스냅샷을 아직 열고 있는 워커가 있을 수 있어서 몇 개는 남겨 둔다
+
+ARRAYS = (
+    "strings_blob", "strings_offsets",
+    # 정류장 (station_ids 정렬 순서). stationBus.json 에 없고 routes.json 에만 나오는 정류장은 listed=False
+    "station_ids", "station_listed", "station_name", "station_bus_count",
+    "station_bus_offsets", "station_bus_names",
+    # 노선 (route_ids 정렬 순서), route_order: routes.json 에 나온 순서
+    "route_ids", "route_order", "route_name",
+    "route_stop_offsets", "stop_station", "stop_sta_order", "stop_name",
+    # 정류장 → 노선 역인덱스 (static_data.build_station_routes 와 같은 순서)
+    "station_route_offsets", "station_route_route", "station_route_sta_order",
+)
+
+
+def snapshot_dir() -> Path:
+    return Path(
+        getattr(settings, "BUSAPI_STATIC_SNAPSHOT_DIR", None)
+        or static_data.DATA_DIR / "compiled"
+    )
+
+
+# 버전 이름이 내용 해시라서 만든 순서는 meta.json 시각으로 정한다
+_store = VersionStore(
+    snapshot_dir,
+    is_version=lambda p: (p / META_FILE).exists(),
+    order=lambda p: (p / META_FILE).stat().st_mtime,
+)
+
+
+def current_version():
+    """CURRENT 에 적힌 버전 (없으면 None)"""
+    return _store.current_version()
+
+
+# -----------------------------
+#  읽기 (memory-map)
+# -----------------------------
+class _Strings:
+    """문자열 표. 자주 쓰는 문자열만 워커별로 디코딩해서 캐시"""
+
+    def __init__(self, blob, offsets):
+        self._view = memoryview(blob)
+        self._offsets = offsets
+        self.get = functools.lru_cache(maxsize=8192)(self._decode)
+
+    def _decode(self, i: int) -> str:
+        return str(self._view[self._offsets[i]:self._offsets[i + 1]], "utf-8")
+
+    def __getitem__(self, i) -> str:
+        return self.get(int(i))
+
+
+def _find(ids, key) -> int:
+    """정렬된 정수 id 배열에서 key(문자열) 위치, 없으면 -1"""
+    key = str(key)
+    if not key.isdigit() or key != str(int(key)):
+        return -1
+    value = int(key)
+    i = int(ids.searchsorted(value))
+    return i if i < len(ids) and int(ids[i]) == value else -1
+
+
+class _StationBus(Mapping):
+    """STATION_BUS: 정류장 id → {name, busNums, busCount}"""
+
+    def __init__(self, snap):
+        self._s = snap
+
+    def _index(self, station_id) -> int:
+        i = _find(self._s.station_ids, station_id)
+        return i if i >= 0 and self._s.station_listed[i] else -1
+
+    def __getitem__(self, station_id):
+        i = self._index(station_id)
+        if i < 0:
+            raise KeyError(station_id)
+        s = self._s
+        names = s.station_bus_names[s.station_bus_offsets[i]:s.station_bus_offsets[i + 1]].tolist()
+        return {
+            "name": s.strings[s.station_name[i]],
+            "busNums": [s.strings.get(n) for n in names],
+            "busCount": int(s.station_bus_count[i]),
+        }
+
+    def __contains__(self, station_id):
+        return self._index(station_id) >= 0
+
+    def __iter__(self):
+        for i in np.flatnonzero(self._s.station_listed):
+            yield str(self._s.station_ids[i])
+
+    def __len__(self):
+        return int(np.count_nonzero(self._s.station_listed))
+
+
+class _Routes(Mapping):
+    """ROUTES: 노선 id → [{route_nm, sta_order, station_id, station_nm}, ...]"""
+
+    def __init__(self, snap):
+        self._s = snap
+
+    def __getitem__(self, route_id):
+        i = _find(self._s.route_ids, route_id)
+        if i < 0:
+            raise KeyError(route_id)
+        s = self._s
+        route_nm = s.strings[s.route_name[i]] if s.route_name[i] >= 0 else None
+        start, end = s.route_stop_offsets[i], s.route_stop_offsets[i + 1]
+        # 슬라이스를 한 번에 파이썬 값으로 바꾼 뒤 조립 (원소마다 numpy 스칼라를 만들지 않도록)
+        return [
+            {
+                "route_nm": route_nm,
+                "sta_order": order,
+                "station_id": str(station_id),
+                "station_nm": s.strings.get(name),
+            }
+            for station_id, order, name in zip(
+                s.station_ids[s.stop_station[start:end]].tolist(),
+                s.stop_sta_order[start:end].tolist(),
+                s.stop_name[start:end].tolist(),
+            )
+        ]
+
+    def __contains__(self, route_id):
+        return _find(self._s.route_ids, route_id) >= 0
+
+    def __iter__(self):
+        for i in self._s.route_order:
+            yield str(self._s.route_ids[i])
+
+    def __len__(self):
+        return len(self._s.route_ids)
+
+
+class _RouteNames(Mapping):
+    """ROUTE_NAMES: 노선 id → 버스번호"""
+
+    def __init__(self, snap):
+        self._s = snap
+
+    def __getitem__(self, route_id):
+        i = _find(self._s.route_ids, route_id)
+        if i < 0 or self._s.route_name[i] < 0:
+            raise KeyError(route_id)
+        return self._s.strings[self._s.route_name[i]]
+
+    def __iter__(self):
+        for i in self._s.route_order:
+            if self._s.route_name[i] >= 0:
+                yield str(self._s.route_ids[i])
+
+    def __len__(self):
+        return int(np.count_nonzero(self._s.route_name >= 0))
+
+
+class _RouteNmToIds(Mapping):
+    """ROUTE_NM_TO_IDS: 버스번호 → [노선 id, ...] (버스번호 종류 수만큼의 작은 dict 를 처음 쓸 때 만든다)"""
+
+    def __init__(self, snap):
+        self._s = snap
+        self._index = None
+
+    def _get_index(self) -> dict:
+        if self._index is None:
+            index = {}
+            for i in self._s.route_order:
+                if self._s.route_name[i] >= 0:
+                    index.setdefault(self._s.strings[self._s.route_name[i]], []).append(i)
+            self._index = index
+        return self._index
+
+    def __getitem__(self, route_nm):
+        return [str(self._s.route_ids[i]) for i in self._get_index()[route_nm]]
+
+    def __iter__(self):
+        return iter(self._get_index())
+
+    def __len__(self):
+        return len(self._get_index())
+
+
+class _StationRoutes(Mapping):
+    """STATION_ROUTES: 정류장 id → (StationRoute, ...)"""
+
+    def __init__(self, snap):
+        self._s = snap
+
+    def __getitem__(self, station_id):
+        s = self._s
+        i = _find(s.station_ids, station_id)
+        start, end = (s.station_route_offsets[i], s.station_route_offsets[i + 1]) if i >= 0 else (0, 0)
+        if start == end:
+            raise KeyError(station_id)
+        routes = s.station_route_route[start:end]
+        return tuple(
+            static_data.StationRoute(str(route_id), s.strings.get(name), order)
+            for route_id, name, order in zip(
+                s.route_ids[routes].tolist(),
+                s.route_name[routes].tolist(),
+                s.station_route_sta_order[start:end].tolist(),
+            )
+        )
+
+    def __iter__(self):
+        counts = np.diff(self._s.station_route_offsets)
+        for i in np.flatnonzero(counts):
+            yield str(self._s.station_ids[i])
+
+    def __len__(self):
+        return int(np.count_nonzero(np.diff(self._s.station_route_offsets)))
+
+
+class StaticSnapshot:
+    """컴파일된 스냅샷 한 버전 (읽기 전용 memmap)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / META_FILE).read_text(encoding="utf-8"))
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported static snapshot format: {self.meta.get('format')}")
+        for name in ARRAYS:
+            # np.memmap 서브클래스는 인덱싱마다 오버헤드가 커서 같은 메모리를 보는 ndarray 로 바꿔 둔다
+            array = np.load(self.path / f"{name}.npy", mmap_mode="r")
+            setattr(self, name, array.view(np.ndarray))
+        self.strings = _Strings(self.strings_blob, self.strings_offsets)
+
+    @property
+    def version(self) -> str:
+        return self.meta["version"]
+
+    def mappings(self) -> dict:
+        """static_data._LAZY_NAMES 와 같은 이름의 읽기 전용 매핑들"""
+        return {
+            "STATION_BUS": _StationBus(self),
+            "ROUTES": _Routes(self),
+            "ROUTE_NM_TO_IDS": _RouteNmToIds(self),
+            "ROUTE_NAMES": _RouteNames(self),
+            "STATION_ROUTES": _StationRoutes(self),
+        }
+
+
+def open_snapshot(version: str) -> StaticSnapshot:
+    return StaticSnapshot(snapshot_dir() / version)
+
+
+# -----------------------------
+#  컴파일
+# -----------------------------
+def _check_id(kind: str, value) -> int:
+    value = str(value)
+    if not value.isdigit() or value != str(int(value)):
+        raise ValueError(f"{kind} id 가 정수 문자열이 아닙니다: {value!r}")
+    return int(value)
+
+
+def validate(station_bus: dict, routes: dict):
+    """스냅샷으로 표현할 수 없거나 앞뒤가 안 맞는 데이터면 ValueError"""
+    for station_id, info in station_bus.items():
+        _check_id("station", station_id)
+        if not isinstance(info.get("name"), str) or not isinstance(info.get("busNums"), list):
+            raise ValueError(f"stationBus.json[{station_id}]: name / busNums 가 없습니다.")
+
+    for route_id, stops in routes.items():
+        _check_id("route", route_id)
+        names = {stop.get("route_nm") for stop in stops}
+        if len(names) > 1:
+            raise ValueError(f"routes.json[{route_id}]: route_nm 이 정류장마다 다릅니다: {sorted(map(str, names))}")
+        if stops and not stops[0].get("route_nm"):
+            raise ValueError(f"routes.json[{route_id}]: route_nm 이 없습니다.")
+        for stop in stops:
+            _check_id("station", stop.get("station_id"))
+            if not isinstance(stop.get("sta_order"), int):
+                raise ValueError(f"routes.json[{route_id}]: sta_order 가 정수가 아닙니다: {stop.get('sta_order')!r}")
+            if not isinstance(stop.get("station_nm"), str):
+                raise ValueError(f"routes.json[{route_id}]: station_nm 이 없습니다.")
+
+
+def _build_arrays(station_bus: dict, routes: dict) -> dict:
+    strings, string_index = [], {}
+
+    def intern(value: str) -> int:
+        if value not in string_index:
+            string_index[value] = len(strings)
+            strings.append(value)
+        return string_index[value]
+
+    station_ids = sorted(
+        {int(s) for s in station_bus} | {int(stop["station_id"]) for stops in routes.values() for stop in stops}
+    )
+    station_pos = {str(s): i for i, s in enumerate(station_ids)}
+    stop_names = {}
+    for stops in routes.values():
+        for stop in stops:
+            stop_names.setdefault(stop["station_id"], stop["station_nm"])
+
+    station_listed = np.zeros(len(station_ids), dtype=bool)
+    station_name = np.zeros(len(station_ids), dtype=np.int32)
+    station_bus_count = np.zeros(len(station_ids), dtype=np.int32)
+    station_bus_offsets = np.zeros(len(station_ids) + 1, dtype=np.int32)
+    station_bus_names = []
+    for i, station_id in enumerate(str(s) for s in station_ids):
+        info = station_bus.get(station_id)
+        if info is not None:
+            station_listed[i] = True
+            station_name[i] = intern(info["name"])
+            station_bus_count[i] = info.get("busCount", len(info["busNums"]))
+            station_bus_names.extend(intern(n) for n in info["busNums"])
+        else:
+            station_name[i] = intern(stop_names[station_id])
+        station_bus_offsets[i + 1] = len(station_bus_names)
+
+    file_order = list(routes)
+    route_ids = sorted(int(r) for r in routes)
+    route_pos = {str(r): i for i, r in enumerate(route_ids)}
+    route_order = np.asarray([route_pos[r] for r in file_order], dtype=np.int32)
+    route_name = np.full(len(route_ids), -1, dtype=np.int32)
+    route_stop_offsets = np.zeros(len(route_ids) + 1, dtype=np.int32)
+    stop_station, stop_sta_order, stop_name = [], [], []
+    for i, route_id in enumerate(str(r) for r in route_ids):
+        stops = routes[route_id]
+        if stops:
+            route_name[i] = intern(stops[0]["route_nm"])
+        for stop in stops:
+            stop_station.append(station_pos[stop["station_id"]])
+            stop_sta_order.append(stop["sta_order"])
+            stop_name.append(intern(stop["station_nm"]))
+        route_stop_offsets[i + 1] = len(stop_station)
+
+    station_routes = static_data.build_station_routes(routes, station_bus)
+    station_route_offsets = np.zeros(len(station_ids) + 1, dtype=np.int32)
+    station_route_route, station_route_sta_order = [], []
+    for i, station_id in enumerate(str(s) for s in station_ids):
+        for entry in station_routes.get(station_id, ()):
+            station_route_route.append(route_pos[entry.route_id])
+            station_route_sta_order.append(entry.sta_order)
+        station_route_offsets[i + 1] = len(station_route_route)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    strings_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    strings_offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    return {
+        "strings_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "strings_offsets": strings_offsets,
+        "station_ids": np.asarray(station_ids, dtype=np.int64),
+        "station_listed": station_listed,
+        "station_name": station_name,
+        "station_bus_count": station_bus_count,
+        "station_bus_offsets": station_bus_offsets,
+        "station_bus_names": np.asarray(station_bus_names, dtype=np.int32),
+        "route_ids": np.asarray(route_ids, dtype=np.int64),
+        "route_order": route_order,
+        "route_name": route_name,
+        "route_stop_offsets": route_stop_offsets,
+        "stop_station": np.asarray(stop_station, dtype=np.int32),
+        "stop_sta_order": np.asarray(stop_sta_order, dtype=np.int32),
+        "stop_name": np.asarray(stop_name, dtype=np.int32),
+        "station_route_offsets": station_route_offsets,
+        "station_route_route": np.asarray(station_route_route, dtype=np.int32),
+        "station_route_sta_order": np.asarray(station_route_sta_order, dtype=np.int32),
+    }
+
+
+def _verify(snapshot: StaticSnapshot, expected: dict):
+    """스냅샷 매핑이 JSON 에서 만든 것과 같은지 (다르면 ValueError)"""
+    for name, mapping in snapshot.mappings().items():
+        want = expected[name]
+        if len(mapping) != len(want) or set(mapping) != set(want):
+            raise ValueError(f"{name}: key 가 원본과 다릅니다.")
+        for key, value in want.items():
+            got = mapping[key]
+            if (list(got) if name == "ROUTE_NM_TO_IDS" else got) != value:
+                raise ValueError(f"{name}[{key}]: 값이 원본과 다릅니다.")
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def compile_snapshot(data_dir: Path = None, force=False):
+    """
+    JSON → 스냅샷 버전 디렉토리를 만들고 CURRENT 로 지정한다.
+    반환: (버전, 새로 만들었는지). 같은 JSON 이면 이미 있는 버전을 다시 쓰지 않는다.
+    """
+    data_dir = Path(data_dir or static_data.DATA_DIR)
+    sources = {name: _sha256(data_dir / name) for name in ("stationBus.json", "routes.json")}
+    version = hashlib.sha256(
+        "".join(sources[name] for name in sorted(sources)).encode()
+    ).hexdigest()[:12]
+
+    root = snapshot_dir()
+    target = root / version
+    created = False
+    if force or not (target / META_FILE).exists():
+        station_bus, routes = static_data.read_json(data_dir)
+        validate(station_bus, routes)
+        arrays = _build_arrays(station_bus, routes)
+
+        root.mkdir(parents=True, exist_ok=True)
+        staging = root / f".staging-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            for name in ARRAYS:
+                np.save(staging / f"{name}.npy", arrays[name])
+            meta = {
+                "format": FORMAT_VERSION,
+                "version": version,
+                "sources": sources,
+                "stations": int(np.count_nonzero(arrays["station_listed"])),
+                "routes": len(arrays["route_ids"]),
+                "stops": len(arrays["stop_station"]),
+                "strings": len(arrays["strings_offsets"]) - 1,
+                "bytes": int(sum(a.nbytes for a in arrays.values())),
+                "created_at": time.time(),
+            }
+            (staging / META_FILE).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+            _verify(StaticSnapshot(staging), static_data.derive(station_bus, routes))
+
+            if target.exists():
+                shutil.rmtree(target)
+            os.rename(staging, target)
+            created = True
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    promote(version)
+    prune()
+    return version, created
+
+
+def promote(version: str):
+    """CURRENT 를 version 으로 원자적으로 교체 (각 워커는 다음 확인 때 전환)"""
+    _store.promote(version)
+
+
+def list_versions() -> list:
+    """만든 시각 순서"""
+    return _store.list_versions()
+
+
+def prune(keep: int = KEEP_VERSIONS):
+    """최근 keep 개 + 현재 버전만 남긴다. (지워도 이미 memory-map 한 워커는 계속 읽을 수 있음)"""
+    _store.prune(keep)
@@ -0,0 +1,212 @@
+# station_search.py
+"""
+정류장 이름 검색 (/api/stations/search/?q=...)
+
+    "성사고"  → 성사고등학교 (접두어)
+    "고등학교" → ...고등학교 (부분 일치)
+    "ㅅㅅㄱ"  → 성사고등학교 (초성)
+    "성ㅅㄱ"  → 성사고등학교 (글자 + 초성 섞어서)
+
+색인: 1글자 / 2글자 조각 → 정류장 번호 역인덱스 두 벌
+  - 이름 그대로 (공백 제거, 소문자)              : 초성이 없는 검색어
+  - 초성 문자열 (완성형 한글 → 초성 자모, 나머지 그대로): 초성이 들어간 검색어
+검색어 조각들의 교집합을 후보로 뽑고 후보만 다시 비교한다. (전체 이름을 훑지 않음)
+
+정렬: 이름 전체 일치 → 접두어 → 단어 시작 → 부분 일치, 같으면 지나는 노선이 많은 정류장, 짧은 이름 순
+색인은 처음 검색할 때 만들고, static_data 스냅샷 버전이 바뀌면 다시 만든다.
+"""
+
+import heapq
+import threading
+
+from . import static_data
+
+
+# 완성형 한글 음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSUNG_SET = frozenset(_CHOSUNG)
+
+MATCH_EXACT, MATCH_PREFIX, MATCH_WORD, MATCH_SUBSTRING = range(4)
+MATCH_NAMES = ("exact", "prefix", "word", "substring")
+
+_index_lock = threading.Lock()
+_index_cache = {"version": None, "index": None}
+
+
+def chosung_of(ch: str) -> str:
+    """'성' → 'ㅅ'. 완성형 한글이 아니면 그대로"""
+    code = ord(ch)
+    if _HANGUL_BASE <= code <= _HANGUL_LAST:
+        return _CHOSUNG[(code - _HANGUL_BASE) // 588]
+    return ch
+
+
+def normalize(text: str) -> str:
+    """공백 제거 + 소문자 (검색 비교용)"""
+    return "".join(str(text).split()).lower()
+
+
+def _char_matches(q: str, ch: str) -> bool:
+    # 검색어 글자가 초성 자모면 이름 글자의 초성과 비교
+    return q == ch or (q in _CHOSUNG_SET and chosung_of(ch) == q)
+
+
+def _find(query: str, name: str) -> int:
+    """name 에서 query 가 (초성 섞어서) 처음 맞는 위치, 없으면 -1"""
+    n = len(query)
+    for start in range(len(name) - n + 1):
+        if all(_char_matches(q, ch) for q, ch in zip(query, name[start:start + n])):
+            return start
+    return -1
+
+
+class StationIndex:
+    """정류장 이름 검색 색인 (한 번 만들면 읽기 전용)"""
+
+    def __init__(self, stations):
+        """stations: [(정류장 id, 이름, 지나는 노선 수), ...]"""
+        self.ids = []
+        self.names = []
+        self.route_counts = []
+        self.keys = []  # 공백 제거 + 소문자 이름
+        self.chosung_keys = []  # keys 의 초성 문자열
+        self.word_starts = []  # 원래 이름에서 공백 다음 글자들의 keys 상 위치
+
+        grams, chosung_grams = {}, {}
+        for i, (station_id, name, route_count) in enumerate(stations):
+            key = normalize(name)
+            self.ids.append(station_id)
+            self.names.append(name)
+            self.route_counts.append(route_count)
+            self.keys.append(key)
+
+            starts, pos = {0}, 0
+            for word in str(name).split():
+                starts.add(pos)
+                pos += len(word)
+            self.word_starts.append(frozenset(starts))
+
+            chosung = "".join(chosung_of(ch) for ch in key)
+            self.chosung_keys.append(chosung)
+            for text, index in ((key, grams), (chosung, chosung_grams)):
+                for size in (1, 2):
+                    for j in range(len(text) - size + 1):
+                        index.setdefault(text[j:j + size], set()).add(i)
+
+        # 조각(1~2글자) → 정류장 번호 tuple
+        self.grams = {gram: tuple(sorted(ids)) for gram, ids in grams.items()}
+        self.chosung_grams = {gram: tuple(sorted(ids)) for gram, ids in chosung_grams.items()}
+
+    @staticmethod
+    def _candidates(grams: dict, query: str):
+        if len(query) == 1:
+            return grams.get(query, ())
+        postings = [grams.get(query[j:j + 2], ()) for j in range(len(query) - 1)]
+        postings.sort(key=len)  # 짧은 목록부터 교집합
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def search(self, query: str, limit: int = 20):
+        """[(정류장 id, 이름, 매칭 종류), ...] 를 순위대로 최대 limit 개"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        jamo = sum(ch in _CHOSUNG_SET for ch in query)
+        if jamo == 0:
+            # 보통 검색어: 이름 조각 색인 + str.find
+            candidates = self._candidates(self.grams, query)
+            keys, locate = self.keys, str.find
+        elif jamo == len(query):
+            # 초성만: 초성 조각 색인 + 초성 문자열에서 str.find
+            candidates = self._candidates(self.chosung_grams, query)
+            keys, locate = self.chosung_keys, str.find
+        else:
+            # 글자 + 초성: 초성 조각 색인으로 후보를 뽑고 글자별로 비교
+            candidates = self._candidates(self.chosung_grams, "".join(chosung_of(ch) for ch in query))
+            keys, locate = self.keys, lambda key, q: _find(q, key)
+
+        ranked = []
+        for i in candidates:
+            key = keys[i]
+            pos = locate(key, query)
+            if pos < 0:
+                continue
+            if pos == 0 and len(key) == len(query):
+                kind = MATCH_EXACT
+            elif pos == 0:
+                kind = MATCH_PREFIX
+            elif pos in self.word_starts[i]:
+                kind = MATCH_WORD
+            else:
+                kind = MATCH_SUBSTRING
+            ranked.append((kind, -self.route_counts[i], len(key), self.names[i], i))
+
+        return [
+            (self.ids[i], self.names[i], MATCH_NAMES[kind])
+            for kind, _, _, _, i in heapq.nsmallest(limit, ranked)
+        ]
+
+
+def _stations():
+    """(정류장 id, 이름, 노선 수): stationBus.json 의 정류장 + routes.json 에만 있는 정류장"""
+    stations = {
+        str(station_id): info.get("name")
+        for station_id, info in static_data.STATION_BUS.items()
+        if info.get("name")
+    }
+    for stops in static_data.ROUTES.values():
+        for stop in stops:
+            station_id = str(stop.get("station_id"))
+            if station_id not in stations and stop.get("station_nm"):
+                stations[station_id] = stop["station_nm"]
+
+    station_routes = static_data.STATION_ROUTES
+    return [
+        (station_id, name, len({route.route_id for route in station_routes.get(station_id, ())}))
+        for station_id, name in sorted(stations.items())
+    ]
+
+
+def get_index() -> StationIndex:
+    version = static_data.current_version()
+    index = _index_cache["index"]
+    if index is not None and _index_cache["version"] == version:
+        return index
+
+    with _index_lock:
+        if _index_cache["index"] is None or _index_cache["version"] != version:
+            _index_cache.update(index=StationIndex(_stations()), version=version)
+        return _index_cache["index"]
+
+
+def search_stations(query: str, limit: int = 20):
+    """
+    [{"stationId", "name", "match", "routes": [{"routeId", "routeName", "staOrder"}, ...]}, ...]
+    """
+    station_routes = static_data.STATION_ROUTES
+    index = get_index()
+
+    results = []
+    for station_id, name, match in index.search(query, limit):
+        results.append({
+            "stationId": station_id,
+            "name": name,
+            "match": match,
+            "routes": [
+                {
+                    "routeId": route.route_id,
+                    "routeName": route.route_name,
+                    "staOrder": route.sta_order,
+                }
+                for route in station_routes.get(station_id, ())
+            ],
+        })
+    return results
+
@@ -1,3 +1,591 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import (
+    ingest, ml_predict, model_registry, realtime, route_planner, static_data, static_snapshot,
+    tree_engine, upstream, version_store, views, views_async,
+)
+from .models import bus_arrival_past
+from .route_planner import RoutePlanner
+from .station_search import StationIndex
+
+
+class PredictModelVersionTests(SimpleTestCase):
+    """predict_seat: model_version 은 예측에 실제로 쓴 모델 버전 (도중에 모델이 바뀌어도)"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.model_files = []
+        for seats, version in enumerate(("aaaaaaaaaaaa", "bbbbbbbbbbbb")):
+            model_file = Path(tmp.name) / version / model_registry.MODEL_FILE
+            model_file.parent.mkdir()
+            with mock.patch.object(ml_predict, "_serving_model_file", return_value=model_file):
+                ml_predict.save_prediction_table(
+                    ["234001736"], [[1, 2]], [np.full((ml_predict.SLOT_COUNT, 2), seats)], version
+                )
+            self.model_files.append(model_file)
+
+    def test_version_switch_during_request(self):
+        # 예측 테이블을 읽은 뒤 CURRENT 가 바뀐 경우: 그 다음 조회부터는 새 버전 파일
+        old, new = self.model_files
+        with mock.patch.object(ml_predict, "_serving_model_file", side_effect=[old] + [new] * 5):
+            response = self.client.get("/api/predict-seat/", {"routeid": "234001736", "select_time": "0"})
+
+        body = response.json()
+        self.assertEqual(body["model_version"], "aaaaaaaaaaaa")
+        self.assertEqual([row["remainseat_pred"] for row in body["predictions"]], [0, 0])
+
+
+class PredictSeatBatchValidationTests(SimpleTestCase):
+    """predict_seat_batch: 형식이 틀린 요청은 예측 전에 400"""
+
+    URL = "/api/predict-seat/batch/"
+
+    def _post(self, body):
+        return self.client.post(self.URL, json.dumps(body), content_type="application/json")
+
+    def test_invalid_bodies(self):
+        for body in (
+            ["234001736"],                                        # dict 가 아님
+            {"routeids": "234001736", "select_times": [0]},       # 문자열 → 한 글자씩 쪼개지면 안 됨
+            {"routeids": ["234001736"], "select_times": 3},
+            {"routeids": [{"id": 1}], "select_times": [0]},
+            {"routeids": ["234001736"], "select_times": [True]},
+            {"routeids": ["234001736"], "select_times": ["x"]},
+            {"routeids": ["234001736"], "select_times": [-1]},
+            {"routeids": ["234001736"], "select_times": [7]},     # SLOT_COUNT 이상
+        ):
+            with self.subTest(body=body):
+                response = self._post(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("routeids, select_times", response.json()["error"])
+
+        self.assertEqual(self.client.get(self.URL, {"routeids": "234001736", "select_times": "0,9"}).status_code, 400)
+        self.assertEqual(self._post({"routeids": ["234001736"]}).status_code, 400)
+
+    def test_valid_request(self):
+        grouped = {"234001736": {0: []}, "218000005": {0: []}}
+        with mock.patch.object(views, "predict_with_version", return_value=(grouped, "v1")) as batch:
+            response = self._post({"routeids": [234001736, " 218000005"], "select_times": ["0", 0]})
+
+        self.assertEqual(response.status_code, 200)
+        batch.assert_called_once_with(["234001736", "218000005"], [0, 0])
+        self.assertEqual(response.json()["select_times"], [0])
+
+
+class SharedFetchLockTests(SimpleTestCase):
+    """realtime._shared_fetch: 워커 간 cache.add 락"""
+
+    ROUTE = "234001736"
+
+    def setUp(self):
+        cache.clear()
+        self.lock_key = realtime._CACHE_PREFIX + self.ROUTE + ":lock"
+        fetch = mock.patch.object(realtime, "fetch_bus_locations", return_value=("t", []))
+        self.fetch = fetch.start()
+        self.addCleanup(fetch.stop)
+
+    @override_settings(BUSAPI_UPSTREAM={
+        "retries": 2, "backoff_factor": 0.2, "timeouts": {"bus_location": [1, 5]},
+    })
+    def test_lock_outlives_the_upstream_call(self):
+        # 연결 1초 × 3번 + read 5초 + backoff 0.6초 → 9초 + 여유 1초
+        with mock.patch.object(realtime.cache, "add", wraps=cache.add) as add:
+            realtime._shared_fetch(self.ROUTE)
+        self.assertEqual(add.call_args.kwargs["timeout"], 10)
+        self.assertIsNone(cache.get(self.lock_key))  # 자기 락은 지운다
+
+    def test_other_workers_lock_is_kept(self):
+        cache.add(self.lock_key, 1, timeout=60)
+        with mock.patch.object(realtime, "BUS_LOCATION_LOCK_WAIT", 0.1):
+            self.assertEqual(realtime._shared_fetch(self.ROUTE), ("t", []))
+        self.fetch.assert_called_once()  # 기다려도 값이 없으면 직접 호출
+        self.assertEqual(cache.get(self.lock_key), 1)
+
+
+class _StubUpstream(BaseHTTPRequestHandler):
+    """apis.data.go.kr/6410000 대신 응답하는 로컬 스텁 (routeId 별 응답 지연은 delays)"""
+
+    protocol_version = "HTTP/1.1"
+    delays = {}
+    calls = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        routeid = parse_qs(url.query).get("routeId", [""])[0]
+        endpoint = url.path.rsplit("/", 1)[-1]
+        cls = type(self)
+        with cls.lock:
+            cls.calls.append((endpoint, routeid))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(cls.delays.get(routeid, 0))
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+        if routeid == "BROKEN":
+            self._send(500, b"error")
+        elif endpoint == "getBusLocationListv2":
+            self._send(200, json.dumps({"msgHeader": {"queryTime": "2025-12-03 08:00:00.123"}, "msgBody": {
+                "busLocationList": [
+                    {"routeId": routeid, "stationSeq": 1, "vehId": 111, "remainSeatCnt": 30, "crowded": 0},
+                    {"routeId": routeid, "stationSeq": 5, "vehId": 112, "remainSeatCnt": 12, "crowded": 2},
+                ],
+            }}).encode())
+        else:
+            self._send(200, json.dumps({"response": {
+                "msgHeader": {"queryTime": "2025-12-03 08:00:00"},
+                "msgBody": {"busArrivalItem": {"vehId1": 7, "remainSeatCnt1": 20, "crowded1": 0}},
+            }}).encode())
+
+    def _send(self, status, data):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 마감 시간이 지나 클라이언트가 끊은 요청
+
+
+@unittest.skipUnless(importlib.util.find_spec("aiohttp"), "aiohttp 가 설치돼 있어야 함")
+class AsyncRealtimeViewTests(SimpleTestCase):
+    """views_async 를 로컬 스텁 upstream 에 붙여서: 동시 호출, 마감 시간, X-Missing-Routes"""
+
+    STATION_ROUTES = [
+        {"routeId": "R1", "routeName": "1", "staOrder": 3},
+        {"routeId": "SLOW", "routeName": "2", "staOrder": 4},
+        {"routeId": "R2", "routeName": "3", "staOrder": 5},
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubUpstream)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        stub = override_settings(BUSAPI_UPSTREAM=dict(settings.BUSAPI_UPSTREAM, base_url=base_url, retries=0))
+        stub.enable()
+        self.addCleanup(stub.disable)
+
+        _StubUpstream.delays = {}
+        _StubUpstream.calls = []
+        _StubUpstream.max_active = 0
+        cache.clear()
+        realtime._local_cache.clear()
+
+    async def _get(self, path, params):
+        try:
+            return await self.async_client.get(path, params)
+        finally:
+            await upstream.get_async_session().close()
+
+    @mock.patch.object(views_async, "STATION_REALTIME_DEADLINE", 1.0)
+    async def test_station_realtime_fan_out_and_deadline(self):
+        _StubUpstream.delays = {"R1": 0.3, "R2": 0.3, "SLOW": 3.0}
+        with mock.patch.object(views_async, "get_local_routes_via_station", return_value=self.STATION_ROUTES):
+            started = time.monotonic()
+            response = await self._get("/api/async/station/realtime/", {"stationid": "S1"})
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(response.status_code, 200)
+        # 노선 순서 유지, 마감 시간까지 못 온 노선은 빠지고 헤더로
+        self.assertEqual([row["routeid"] for row in response.json()], ["R1", "R2"])
+        self.assertEqual(response["X-Missing-Routes"], "SLOW")
+        # 세 노선을 동시에 호출 (차례로 부르면 0.3 + 0.3 + 마감까지 기다림)
+        self.assertEqual(_StubUpstream.max_active, 3)
+        self.assertLess(elapsed, 2.0)
+
+    async def test_station_realtime_all_routes_in_time(self):
+        with mock.patch.object(views_async, "get_local_routes_via_station", return_value=self.STATION_ROUTES):
+            response = await self._get("/api/async/station/realtime/", {"stationid": "S1"})
+
+        self.assertEqual([row["routeid"] for row in response.json()], ["R1", "SLOW", "R2"])
+        self.assertEqual(response.json()[0]["remainseat_at_arrival"], 20)
+        self.assertFalse(response.has_header("X-Missing-Routes"))
+
+    async def test_bus_realtime_coalesces_concurrent_requests(self):
+        _StubUpstream.delays = {"R1": 0.2}
+        try:
+            responses = await asyncio.gather(*(
+                self.async_client.get("/api/async/bus/realtime/", {"routeid": "R1"}) for _ in range(5)
+            ))
+        finally:
+            await upstream.get_async_session().close()
+
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        self.assertEqual([len(r.json()) for r in responses], [2] * 5)
+        # 같은 노선 동시 miss 는 upstream 호출 한 번
+        self.assertEqual([c for c in _StubUpstream.calls if c[0] == "getBusLocationListv2"], [("getBusLocationListv2", "R1")])
+
+    async def test_bus_realtime_upstream_error(self):
+        response = await self._get("/api/async/bus/realtime/", {"routeid": "BROKEN"})
+        self.assertEqual(response.status_code, 502)
+
+    async def test_no_sync_cache_calls_on_the_event_loop(self):
+        backend = caches["default"]
+
+        def off_loop(name):
+            method = getattr(backend, name)
+
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError(f"cache.{name} 를 이벤트 루프에서 호출")
+            return call
+
+        with mock.patch.multiple(backend, **{name: off_loop(name) for name in ("get", "set", "add", "delete")}), \
+                mock.patch.object(views_async, "get_local_routes_via_station", return_value=self.STATION_ROUTES):
+            bus = await self._get("/api/async/bus/realtime/", {"routeid": "R1"})
+            station = await self._get("/api/async/station/realtime/", {"stationid": "S1"})
+
+        self.assertEqual(bus.status_code, 200)
+        self.assertEqual(len(station.json()), 3)
+
+
+class IngestDeduplicationTests(TestCase):
+    """ingest.write_rows: (routeid, vehid1, station_num, timestamp) 가 같은 행은 한 번만"""
+
+    def _rows(self, query_time, locations):
+        return ingest.normalize_locations("234001736", query_time, locations)
+
+    def test_duplicates_are_skipped(self):
+        rows = self._rows("2025-12-03 08:00:00.123", [
+            {"vehId": "101", "stationSeq": "3", "remainSeatCnt": "20"},
+            {"vehId": "102", "stationSeq": "7", "remainSeatCnt": "5"},
+            {"vehId": "103", "stationSeq": "9", "remainSeatCnt": "-1"},  # 좌석 정보 없음 → 제외
+        ])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(ingest.write_rows(rows), 2)
+
+        # 이미 있는 두 행 + 같은 배치 안의 중복 + 새 행 하나
+        later = self._rows("2025-12-03 08:00:10", [{"vehId": "101", "stationSeq": "4", "remainSeatCnt": "18"}])
+        self.assertEqual(ingest.write_rows(rows + later + later), 1)
+        self.assertEqual(ingest.write_rows(rows + later), 0)
+
+        self.assertEqual(bus_arrival_past.objects.count(), 3)
+        self.assertEqual(
+            bus_arrival_past.objects.filter(vehid1=101).order_by("timestamp").last().timestamp,
+            datetime.datetime(2025, 12, 3, 8, 0, 10, tzinfo=datetime.timezone.utc),
+        )
+
+    def test_unique_key_is_enforced_by_the_database(self):
+        # 다른 워커가 같은 행을 먼저 넣은 경우: 버퍼 밖에서 들어온 행도 ON CONFLICT 로 건너뛴다
+        ts = datetime.datetime(2025, 12, 3, 8, 0, tzinfo=datetime.timezone.utc)
+        key = {"routeid": "234001736", "vehid1": 101, "station_num": 3, "timestamp": ts}
+        bus_arrival_past.objects.create(remainseatcnt1=20, **key)
+
+        rows = self._rows("2025-12-03 08:00:00", [{"vehId": "101", "stationSeq": "3", "remainSeatCnt": "19"}])
+        self.assertEqual(ingest.write_rows(rows), 0)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            bus_arrival_past.objects.create(remainseatcnt1=18, **key)
+        self.assertEqual(bus_arrival_past.objects.count(), 1)
+
+
+class ModelRegistryTests(SimpleTestCase):
+    """새 버전 승격(CURRENT 교체)과 rollback_model"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        registry = override_settings(BUSAPI_MODEL_REGISTRY_DIR=tmp.name)
+        registry.enable()
+        self.addCleanup(registry.disable)
+
+    def _commit(self, content_version):
+        with model_registry.staging() as staging_dir:
+            (staging_dir / model_registry.MODEL_FILE).write_bytes(content_version.encode())
+            return model_registry.commit(staging_dir, content_version, {"rmse": 1.0})
+
+    def test_promote_switches_active_model(self):
+        self.assertIsNone(model_registry.current_version())
+        v1 = self._commit("aaaaaaaaaaaa")
+        model_registry.promote(v1)
+        self.assertEqual(model_registry.current_version(), v1)
+
+        v2 = self._commit("bbbbbbbbbbbb")
+        self.assertEqual(model_registry.current_version(), v1)  # commit 만으로는 바뀌지 않음
+        model_registry.promote(v2)
+        self.assertEqual(model_registry.current_version(), v2)
+        self.assertEqual(model_registry.active_model_file(), model_registry.model_file(v2))
+        self.assertEqual(model_registry.read_meta(v2)["model_version"], "bbbbbbbbbbbb")
+        self.assertEqual(model_registry.list_versions(), [v1, v2])  # staging 디렉토리는 안 보임
+
+        with self.assertRaises(FileNotFoundError):
+            model_registry.promote("no-such-version")
+        self.assertEqual(model_registry.current_version(), v2)
+
+    def test_rollback(self):
+        v1 = self._commit("aaaaaaaaaaaa")
+        v2 = self._commit("bbbbbbbbbbbb")
+        model_registry.promote(v2)
+        self.assertEqual(model_registry.previous_version(), v1)
+
+        call_command("rollback_model", stdout=io.StringIO())
+        self.assertEqual(model_registry.current_version(), v1)
+
+        with self.assertRaises(CommandError):
+            call_command("rollback_model", stdout=io.StringIO())  # v1 이전 버전 없음
+
+        call_command("rollback_model", to=v2, stdout=io.StringIO())
+        self.assertEqual(model_registry.current_version(), v2)
+
+
+class VersionStoreTests(SimpleTestCase):
+    """CURRENT 캐시: mtime / 크기가 같아도 os.replace 로 바뀐 파일이면 다시 읽는다"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.store = version_store.VersionStore(lambda: self.root)
+
+    def test_replaced_pointer_with_same_mtime_and_size(self):
+        self.store.promote("v1")
+        self.assertEqual(self.store.current_version(), "v1")
+        st = os.stat(self.store.current_path())
+
+        self.store.promote("v2")
+        os.utime(self.store.current_path(), ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(self.store.current_version(), "v2")
+
+    def test_list_and_prune(self):
+        for name in ("v1", "v2", "v3", ".staging-x"):
+            (self.root / name).mkdir()
+        self.store.promote("v1")
+        self.assertEqual(self.store.list_versions(), ["v1", "v2", "v3"])
+
+        self.store.prune(keep=1)
+        self.assertEqual(self.store.list_versions(), ["v1", "v3"])  # 현재 버전은 남긴다
+
+
+class StaticSnapshotTests(SimpleTestCase):
+    """compile_static_data: JSON 이 바뀌면 새 버전 + CURRENT 교체, --to 로 롤백"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        snapshots = override_settings(BUSAPI_STATIC_SNAPSHOT_DIR=str(self.tmp / "compiled"))
+        snapshots.enable()
+        self.addCleanup(snapshots.disable)
+
+    def _data_dir(self, name, station_bus, routes):
+        path = self.tmp / name
+        path.mkdir()
+        (path / "stationBus.json").write_text(json.dumps(station_bus, ensure_ascii=False), encoding="utf-8")
+        (path / "routes.json").write_text(json.dumps(routes, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def test_compile_and_rollback(self):
+        stop = {"route_nm": "7000", "sta_order": 1, "station_id": "200000001", "station_nm": "A"}
+        station_bus = {"200000001": {"name": "A", "busNums": ["7000"], "busCount": 1}}
+        old = self._data_dir("old", station_bus, {"234000001": [stop]})
+        new = self._data_dir("new", station_bus, {"234000001": [stop, dict(stop, sta_order=2)]})
+
+        v1, created = static_snapshot.compile_snapshot(old)
+        self.assertTrue(created)
+        self.assertEqual(static_snapshot.compile_snapshot(old), (v1, False))
+
+        v2, _ = static_snapshot.compile_snapshot(new)
+        self.assertEqual(static_snapshot.current_version(), v2)
+        self.assertEqual(static_snapshot.list_versions(), [v1, v2])
+        routes = static_snapshot.open_snapshot(v2).mappings()["ROUTES"]
+        self.assertEqual(routes["234000001"], static_data.derive(*static_data.read_json(new))["ROUTES"]["234000001"])
+
+        call_command("compile_static_data", to=v1, stdout=io.StringIO())
+        self.assertEqual(static_snapshot.current_version(), v1)
+        with self.assertRaises(CommandError):
+            call_command("compile_static_data", to="no-such-version", stdout=io.StringIO())
+
+
+@unittest.skipUnless(importlib.util.find_spec("xgboost"), "xgboost 가 설치돼 있어야 함")
+class CompiledModelParityTests(SimpleTestCase):
+    """tree_engine 의 heap 배열 평가기가 XGBRegressor.predict 와 같은 값을 내는지"""
+
+    FEATURE_COLS = ["station_num", "slot_center_min", "routeid_A", "routeid_B"]
+
+    def _data(self, rng, n):
+        X = np.column_stack([
+            rng.integers(1, 60, n),
+            rng.integers(330, 540, n),
+            rng.integers(0, 2, n),
+            rng.integers(0, 2, n),
+        ]).astype(np.float32)
+        y = 45 - X[:, 0] * 0.5 - (X[:, 1] - 330) / 10 + X[:, 2] * 5 + rng.normal(0, 1, n)
+        # 정류장 번호가 빠진 행은 좌석이 아주 많거나(앞쪽) 아주 적게(뒤쪽) 만들어서
+        # 분기마다 NaN 기본 방향이 왼쪽/오른쪽 둘 다 학습되게 한다
+        missing = rng.random(n) < 0.15
+        y[missing] = np.where(X[missing, 1] < 430, 80.0, -20.0)
+        X[missing, 0] = np.nan
+        return X, y
+
+    def _compile(self, model):
+        arrays = tree_engine.compile_booster(model.get_booster())
+        compiled = tree_engine.CompiledModel(arrays, self.FEATURE_COLS, [], {}, "test")
+        return arrays, compiled
+
+    def test_matches_xgboost_with_missing_values(self):
+        from xgboost import XGBRegressor
+
+        rng = np.random.default_rng(0)
+        X, y = self._data(rng, 3000)
+        model = XGBRegressor(n_estimators=60, max_depth=5, learning_rate=0.3, min_child_weight=20)
+        model.fit(X, y)
+        arrays, compiled = self._compile(model)
+
+        # 실제 분기 노드(threshold 가 유한)에 NaN 이 오른쪽으로 가는 분기가 있어야 의미 있는 비교
+        real_split = np.isfinite(arrays["threshold"])
+        self.assertTrue((~arrays["default_left"][real_split]).any())
+        self.assertTrue(arrays["default_left"][real_split].any())
+
+        X_test, _ = self._data(rng, 2000)
+        # 학습 때 NaN 이 없던 feature 에도 NaN (기본 방향만으로 내려가야 함)
+        X_test[rng.random(len(X_test)) < 0.1, 1] = np.nan
+        X_test[rng.random(len(X_test)) < 0.1, 2] = np.nan
+
+        expected = model.predict(X_test)
+        np.testing.assert_allclose(
+            compiled.predict_matrix(X_test), expected, rtol=0, atol=tree_engine.PARITY_TOLERANCE
+        )
+        self.assertLessEqual(tree_engine.check_parity(model, compiled, X_test), tree_engine.PARITY_TOLERANCE)
+
+    def test_shallow_leaves_are_padded(self):
+        # 깊이가 다른 트리가 섞여도 (얕은 리프는 threshold=+inf 로 복제) 같은 값
+        from xgboost import XGBRegressor
+
+        rng = np.random.default_rng(1)
+        X, y = self._data(rng, 1500)
+        model = XGBRegressor(n_estimators=30, max_depth=6, learning_rate=0.5, gamma=50.0)
+        model.fit(X, y)
+        arrays, compiled = self._compile(model)
+        self.assertTrue(np.isinf(arrays["threshold"]).any())
+
+        np.testing.assert_allclose(
+            compiled.predict_matrix(X), model.predict(X), rtol=0, atol=tree_engine.PARITY_TOLERANCE
+        )
+
+
+class StationSearchRankingTests(SimpleTestCase):
+    """StationIndex.search: 전체 일치 → 접두어 → 단어 시작 → 부분 일치, 같으면 노선 많은 순"""
+
+    def setUp(self):
+        self.index = StationIndex([
+            ("1", "성사고등학교", 2),
+            ("2", "성사동", 5),
+            ("3", "고양 성사역", 1),
+            ("4", "대성사거리", 9),
+            ("5", "원당역", 3),
+        ])
+
+    def ids(self, query, limit=20):
+        return [station_id for station_id, _, _ in self.index.search(query, limit)]
+
+    def test_match_kind_order(self):
+        results = self.index.search("성사")
+        self.assertEqual([r[0] for r in results], ["2", "1", "3", "4"])
+        self.assertEqual([r[2] for r in results], ["prefix", "prefix", "word", "substring"])
+
+    def test_exact_match_first(self):
+        self.assertEqual(self.index.search("성사동")[0], ("2", "성사동", "exact"))
+
+    def test_chosung_and_mixed_queries(self):
+        self.assertEqual(self.ids("ㅅㅅ"), ["2", "1", "3", "4"])
+        self.assertEqual(self.ids("ㅅㅅㄱ"), ["1", "4"])
+        self.assertEqual(self.ids("성ㅅㄱ"), ["1", "4"])
+
+    def test_whitespace_case_and_limit(self):
+        self.assertEqual(self.ids("  고양성사 "), ["3"])
+        self.assertEqual(self.ids("성사", limit=2), ["2", "1"])
+        self.assertEqual(self.ids("없는정류장"), [])
+        self.assertEqual(self.ids("   "), [])
+
+
+def _route(route_nm, station_ids):
+    return [
+        {"route_nm": route_nm, "sta_order": i, "station_id": station_id, "station_nm": f"정류장{station_id}"}
+        for i, station_id in enumerate(station_ids, start=1)
+    ]
+
+
+@mock.patch.object(route_planner, "MINUTES_PER_STOP", 2.0)
+@mock.patch.object(route_planner, "TRANSFER_MINUTES", 5.0)
+class RoutePlannerTests(SimpleTestCase):
+    """RoutePlanner.plan: 환승 횟수별로 더 빨라지는 경로, 소요 시간 = 정류장 수 × 2분 + 환승 × 5분"""
+
+    def setUp(self):
+        self.planner = RoutePlanner({
+            "R1": _route("1", ["A", "B", "C", "D"]),
+            "R2": _route("2", ["C", "E", "F"]),
+            # A → F 직행이지만 8 정류장 (16분) > R1 2 정류장 + 환승 + R2 2 정류장 (13분)
+            "R3": _route("3", ["A", "X1", "X2", "X3", "X4", "X5", "X6", "X7", "F"]),
+        })
+
+    def test_transfer_beats_slow_direct_route(self):
+        itineraries = self.planner.plan("A", "F")
+        self.assertEqual(
+            [(it["bus_numbers"], it["transfers"], it["duration_minutes"]) for it in itineraries],
+            [(["1", "2"], 1, 13.0), (["3"], 0, 16.0)],
+        )
+        legs = itineraries[0]["legs"]
+        self.assertEqual(
+            [(leg["routeId"], leg["board"]["stationId"], leg["alight"]["stationId"], leg["stops"]) for leg in legs],
+            [("R1", "A", "C", 2), ("R2", "C", "F", 2)],
+        )
+
+    def test_max_transfers(self):
+        itineraries = self.planner.plan("A", "F", max_transfers=0)
+        self.assertEqual([(it["routeids"], it["duration_minutes"]) for it in itineraries], [(["R3"], 16.0)])
+
+    def test_direct_only_when_transfer_is_not_faster(self):
+        # A → C 는 R1 직행 (4분) 만
+        itineraries = self.planner.plan("A", "C")
+        self.assertEqual([(it["routeids"], it["transfers"], it["duration_minutes"]) for it in itineraries],
+                         [(["R1"], 0, 4.0)])
+
+    def test_unreachable_and_unknown_stations(self):
+        self.assertEqual(self.planner.plan("F", "A"), [])  # 노선이 모두 한 방향
+        self.assertEqual(self.planner.plan("A", "없는정류장"), [])
+        self.assertEqual(self.planner.plan("A", "A"), [])
+        self.assertFalse(self.planner.has_station("없는정류장"))
@@ -0,0 +1,204 @@
+# training_jobs.py
+"""
+모델 학습을 웹 워커 밖(별도 프로세스)에서 실행하는 작업 큐
+
+- submit_training() 은 작업 id 를 바로 돌려주고, 학습은 ProcessPoolExecutor 에서 실행
+- 작업 상태는 JSON 파일로 저장 → 어느 워커/프로세스에서든 get_job() 으로 조회
+    queued → running → done / failed  (rmse, duration, rows 등)
+- 학습은 한 번에 하나만: lock 파일(O_EXCL)을 먼저 잡은 작업만 실행되고,
+  이미 진행 중인 작업이 있으면 새로 만들지 않고 그 작업을 돌려준다.
+
+저장 위치: settings.BUSAPI_TRAIN_JOB_DIR (기본 busapi/train_jobs/)
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+
+
+STALE_LOCK_SECONDS = getattr(settings, "BUSAPI_TRAIN_JOB_TIMEOUT", 6 * 60 * 60)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def job_dir() -> Path:
+    path = Path(
+        getattr(settings, "BUSAPI_TRAIN_JOB_DIR", None)
+        or Path(settings.BASE_DIR) / "busapi" / "train_jobs"
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _job_path(job_id: str) -> Path:
+    return job_dir() / f"{job_id}.json"
+
+
+def _lock_path() -> Path:
+    return job_dir() / "train.lock"
+
+
+def _write_job(job: dict):
+    path = _job_path(job["job_id"])
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(job, ensure_ascii=False, default=str), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _update_job(job_id: str, **fields) -> dict:
+    job = get_job(job_id) or {"job_id": job_id}
+    job.update(fields)
+    _write_job(job)
+    return job
+
+
+def get_job(job_id: str):
+    """작업 상태 dict (없으면 None)"""
+    # job_id 는 uuid hex 만 허용 (경로 조작 방지)
+    if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+        return None
+    try:
+        return json.loads(_job_path(job_id).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _acquire_lock(job_id: str):
+    """
+    학습 lock 을 잡으면 None, 이미 진행 중인 작업이 있으면 그 작업 dict 를 돌려준다.
+    끝난 작업의 lock 이거나 STALE_LOCK_SECONDS 보다 오래된 lock 은 정리하고 다시 시도.
+    """
+    lock = _lock_path()
+    for _ in range(2):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                holder = lock.read_text(encoding="utf-8").strip()
+                age = time.time() - lock.stat().st_mtime
+            except OSError:
+                continue  # 그 사이 해제됨
+
+            job = get_job(holder)
+            active = job is not None and job.get("status") in ("queued", "running")
+            if active and age < STALE_LOCK_SECONDS:
+                return job
+
+            try:
+                lock.unlink()
+            except FileNotFoundError:
+                pass
+            continue
+
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(job_id)
+        return None
+
+    return get_job(lock.read_text(encoding="utf-8").strip())
+
+
+def _release_lock(job_id: str):
+    lock = _lock_path()
+    try:
+        if lock.read_text(encoding="utf-8").strip() == job_id:
+            lock.unlink()
+    except OSError:
+        pass
+
+
+def _init_worker():
+    # spawn 으로 뜬 새 프로세스라 Django 설정부터 다시 로드
+    import django
+    django.setup()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # fork 하면 웹 프로세스의 DB 커넥션/스레드를 물려받으므로 spawn 사용
+            _executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def _run_job(job_id: str, incremental: bool, aggregate_in_db: bool = True):
+    """(학습 프로세스) 실제 학습. 상태 파일을 직접 갱신한다."""
+    from .ml_train import train_model_and_save, train_model_incremental
+
+    started = time.time()
+    _update_job(job_id, status="running", started_at=started)
+    report = {}
+    try:
+        if incremental:
+            train_model_incremental(report=report)
+        else:
+            train_model_and_save(aggregate_in_db=aggregate_in_db, report=report)
+    except Exception as e:
+        _update_job(
+            job_id,
+            status="failed",
+            error=str(e),
+            traceback=traceback.format_exc(),
+            finished_at=time.time(),
+            duration=time.time() - started,
+        )
+    else:
+        _update_job(
+            job_id,
+            status="done",
+            finished_at=time.time(),
+            duration=time.time() - started,
+            **report,
+        )
+    finally:
+        _release_lock(job_id)
+
+
+def submit_training(incremental: bool = False, aggregate_in_db: bool = True):
+    """
+    학습 작업을 등록하고 (작업 dict, 새로 만들었는지) 를 돌려준다.
+    진행 중인 작업이 있으면 새로 만들지 않고 (그 작업, False).
+    aggregate_in_db=False: 전체 학습을 SQL 집계 대신 원본 행 + pandas 로 (train_model_and_save 참고)
+    """
+    job_id = uuid.uuid4().hex
+    active = _acquire_lock(job_id)
+    if active is not None:
+        return active, False
+
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "mode": "incremental" if incremental else "full",
+        "aggregate_in_db": aggregate_in_db,
+        "submitted_at": time.time(),
+    }
+    _write_job(job)
+
+    try:
+        future = _get_executor().submit(_run_job, job_id, incremental, aggregate_in_db)
+    except Exception as e:
+        _release_lock(job_id)
+        job = _update_job(job_id, status="failed", error=str(e))
+        return job, True
+
+    def _on_done(f):
+        # 학습 프로세스가 비정상 종료된 경우 (상태 파일을 못 쓴 채로 죽음)
+        if f.exception() is not None:
+            _update_job(job_id, status="failed", error=str(f.exception()))
+            _release_lock(job_id)
+
+    future.add_done_callback(_on_done)
+    return job, True
@@ -0,0 +1,240 @@
+# tree_engine.py
+"""
+학습된 XGBoost booster → numpy 배열 트리 + 벡터화 평가기
+
+웹 서버에서는 xgboost / pandas 없이 numpy 만으로 예측한다.
+(학습 쪽에서 export_compiled_model 로 bus_model_trees.npz 를 만들고, ml_predict 가 이걸 우선 사용)
+
+트리는 깊이 D 의 완전 이진 트리(heap 배열)로 펼쳐서 저장한다.
+노드 i 의 자식은 2i+1 (x < threshold) / 2i+2 이고, D 보다 얕은 리프는 threshold=+inf 로
+왼쪽 자식에 같은 리프를 복제해 둔다. → 평가 때 자식 배열 조회 없이 D 단계 산술 연산만 하면 된다.
+
+npz 구성 (T: 트리 수, W = 2^D - 1 분기 노드, L = 2^D 리프)
+  feature      : (T*W,) int32    분기 feature 인덱스
+  threshold    : (T*W,) float32  x < threshold 이면 왼쪽
+  default_left : (T*W,) bool     feature 값이 NaN 일 때 왼쪽으로 갈지
+  value        : (T*L,) float32  리프 값
+  n_trees, depth, base_score
+  feature_cols, routeid_columns, route_ids/station_offsets/station_nums, model_version
+  route_encoding, route_code_ids/route_code_values  (route_encoding="code" 일 때 노선 코드표)
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+COMPILED_SUFFIX = "_trees.npz"
+PARITY_TOLERANCE = 1e-3  # XGBRegressor.predict 와의 최대 허용 오차 (좌석 수)
+MAX_DEPTH = 12            # heap 배열 크기가 2^D 라 이보다 깊은 트리는 내보내지 않음
+
+
+def _parse_base_score(raw) -> float:
+    # xgboost 2.x: "1.7108744E1", 3.x: "[1.7108744E1]"
+    return float(str(raw).strip("[]"))
+
+
+def compile_booster(booster) -> dict:
+    """booster.save_raw("json") 을 읽어서 heap 배열 트리 dict 를 만든다."""
+    model = json.loads(booster.save_raw("json"))
+    learner = model["learner"]
+    gbm = learner["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"unsupported booster: {gbm['name']}")
+
+    trees = gbm["model"]["trees"]
+    if any(t != 0 for tree in trees for t in tree.get("split_type", [])):
+        raise ValueError("categorical splits are not supported")
+
+    def tree_depth(tree, node=0):
+        left = tree["left_children"][node]
+        if left < 0:
+            return 0
+        right = tree["right_children"][node]
+        return 1 + max(tree_depth(tree, left), tree_depth(tree, right))
+
+    depth = max((tree_depth(tree) for tree in trees), default=0)
+    if depth > MAX_DEPTH:
+        raise ValueError(f"tree depth {depth} > {MAX_DEPTH}")
+
+    n_trees = len(trees)
+    width, leaves = 2 ** depth - 1, 2 ** depth
+    feature = np.zeros((n_trees, width), dtype=np.int32)
+    threshold = np.full((n_trees, width), np.inf, dtype=np.float32)
+    default_left = np.ones((n_trees, width), dtype=bool)
+    value = np.zeros((n_trees, leaves), dtype=np.float32)
+
+    for t, tree in enumerate(trees):
+        left, right = tree["left_children"], tree["right_children"]
+        cond, split, dleft = tree["split_conditions"], tree["split_indices"], tree["default_left"]
+        stack = [(0, 0, 0)]  # (원래 노드, heap 위치, 깊이)
+        while stack:
+            node, pos, d = stack.pop()
+            if d == depth:
+                value[t, pos - width] = cond[node]
+                continue
+            if left[node] < 0:
+                # 얕은 리프: threshold=+inf 로 두고 두 자식 자리에 같은 리프를 내려보낸다
+                stack.append((node, 2 * pos + 1, d + 1))
+                stack.append((node, 2 * pos + 2, d + 1))
+                continue
+            feature[t, pos] = split[node]
+            threshold[t, pos] = cond[node]
+            default_left[t, pos] = bool(dleft[node])
+            stack.append((left[node], 2 * pos + 1, d + 1))
+            stack.append((right[node], 2 * pos + 2, d + 1))
+
+    return {
+        "feature": feature.ravel(),
+        "threshold": threshold.ravel(),
+        "default_left": default_left.ravel(),
+        "value": value.ravel(),
+        "n_trees": np.int32(n_trees),
+        "depth": np.int32(depth),
+        "base_score": np.float32(_parse_base_score(learner["learner_model_param"]["base_score"])),
+    }
+
+
+ARRAY_KEYS = ("feature", "threshold", "default_left", "value", "n_trees", "depth", "base_score")
+
+
+class CompiledModel:
+    """bus_model_trees.npz 한 개 (읽기 전용)"""
+
+    def __init__(self, arrays: dict, feature_cols, routeid_columns, route_stations, model_version,
+                 route_codes=None):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.default_left = arrays["default_left"]
+        self.value = arrays["value"]
+        self.n_trees = int(arrays["n_trees"])
+        self.depth = int(arrays["depth"])
+        self.base_score = float(arrays["base_score"])
+
+        self._width = 2 ** self.depth - 1
+        self._tree_offsets = (np.arange(self.n_trees, dtype=np.int32) * self._width)[:, None]
+        self._leaf_offsets = (np.arange(self.n_trees, dtype=np.int32) * 2 ** self.depth)[:, None]
+
+        self.feature_cols = list(feature_cols)
+        self.routeid_columns = list(routeid_columns)
+        self.route_stations = route_stations
+        self.model_version = model_version
+
+        self.route_codes = route_codes
+
+        index = {col: i for i, col in enumerate(self.feature_cols)}
+        self._station_col = index["station_num"]
+        self._slot_col = index["slot_center_min"]
+        self._code_col = index.get("route_code")
+        self._route_col = {col[len("routeid_"):]: index[col] for col in self.routeid_columns}
+
+    def features(self, routeids, station_nums, slot_center_mins) -> np.ndarray:
+        """predict_rows 와 같은 one-hot feature 행렬 (float32, pandas 없이)"""
+        n = len(station_nums)
+        X = np.zeros((n, len(self.feature_cols)), dtype=np.float32)
+        X[:, self._station_col] = station_nums
+        X[:, self._slot_col] = slot_center_mins
+
+        if self.route_codes is not None:
+            # 정수 노선 코드 (학습에 없던 노선은 NaN)
+            X[:, self._code_col] = np.fromiter(
+                (self.route_codes.get(str(r), np.nan) for r in routeids), dtype=np.float32, count=n
+            )
+            return X
+
+        cols = np.fromiter(
+            (self._route_col.get(str(r), -1) for r in routeids), dtype=np.int64, count=n
+        )
+        known = cols >= 0
+        X[np.nonzero(known)[0], cols[known]] = 1.0
+        return X
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """XGBRegressor.predict 와 같은 값 (트리 × 행 을 한 번에 한 단계씩 내려감)"""
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+        columns = np.ascontiguousarray(X.T).ravel()  # feature 별로 연속 → x = columns[f*n + row]
+        rows = np.arange(n, dtype=np.int32)[None, :]
+        has_nan = bool(np.isnan(columns).any())
+
+        node = np.zeros((self.n_trees, n), dtype=np.int32)
+        for _ in range(self.depth):
+            idx = node + self._tree_offsets
+            x = np.take(columns, np.take(self.feature, idx) * n + rows)
+            go_right = x >= np.take(self.threshold, idx)
+            if has_nan:
+                go_right = np.where(np.isnan(x), ~np.take(self.default_left, idx), go_right)
+            node = node * 2 + 1 + go_right
+
+        leaf = node - self._width + self._leaf_offsets
+        return np.take(self.value, leaf).sum(axis=0, dtype=np.float64) + self.base_score
+
+    def predict(self, routeids, station_nums, slot_center_mins) -> np.ndarray:
+        return self.predict_matrix(self.features(routeids, station_nums, slot_center_mins))
+
+
+def compiled_path_for(model_file: Path) -> Path:
+    """.../bus_model.pkl → .../bus_model_trees.npz"""
+    model_file = Path(model_file)
+    return model_file.with_name(model_file.stem + COMPILED_SUFFIX)
+
+
+def save_compiled(path: Path, arrays: dict, payload: dict, model_version: str) -> Path:
+    route_codes = payload.get("route_codes") or {}
+    route_stations = payload.get("route_stations", {})
+    route_ids = sorted(route_stations)
+    offsets = np.zeros(len(route_ids) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(route_stations[r]) for r in route_ids])
+    station_nums = np.asarray(
+        [s for r in route_ids for s in route_stations[r]], dtype=np.int32
+    )
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            **arrays,
+            feature_cols=np.asarray(payload["feature_cols"]),
+            routeid_columns=np.asarray(payload["routeid_columns"]),
+            route_ids=np.asarray(route_ids, dtype=str),
+            station_offsets=offsets,
+            station_nums=station_nums,
+            model_version=np.asarray(model_version),
+            route_encoding=np.asarray(payload.get("route_encoding", "onehot")),
+            route_code_ids=np.asarray(list(route_codes), dtype=str),
+            route_code_values=np.asarray(list(route_codes.values()), dtype=np.int32),
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_compiled(path: Path) -> CompiledModel:
+    with np.load(path, allow_pickle=False) as npz:
+        arrays = {k: npz[k] for k in ARRAY_KEYS}
+        offsets = npz["station_offsets"]
+        station_nums = npz["station_nums"]
+        route_stations = {
+            str(rid): station_nums[offsets[i]:offsets[i + 1]].tolist()
+            for i, rid in enumerate(npz["route_ids"])
+        }
+        route_codes = None
+        if "route_encoding" in npz and str(npz["route_encoding"]) == "code":
+            route_codes = dict(zip(npz["route_code_ids"].tolist(), npz["route_code_values"].tolist()))
+        return CompiledModel(
+            arrays,
+            npz["feature_cols"].tolist(),
+            npz["routeid_columns"].tolist(),
+            route_stations,
+            str(npz["model_version"]),
+            route_codes=route_codes,
+        )
+
+
+def check_parity(model, compiled: CompiledModel, X) -> float:
+    """같은 feature 행렬에 대한 XGBRegressor.predict 와 compiled 예측의 최대 절대 오차"""
+    expected = np.asarray(model.predict(X), dtype=np.float64)
+    actual = compiled.predict_matrix(np.asarray(X, dtype=np.float32))
+    return float(np.max(np.abs(expected - actual))) if len(expected) else 0.0
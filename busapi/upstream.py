@@ -0,0 +1,194 @@
+# upstream.py
+"""
+경기도 버스 공공데이터 API (apis.data.go.kr/6410000) 공용 HTTP 클라이언트
+
+- 프로세스당 requests.Session 하나를 만들어 keep-alive 커넥션 풀을 공유
+- 엔드포인트별 timeout, GET 재시도(backoff) 는 settings.BUSAPI_UPSTREAM 으로 조정
+  (read timeout 은 재시도하지 않는다: 호출 하나가 timeout 한 번 안에 끝나야
+   station_realtime 데드라인(STATION_REALTIME_DEADLINE) 이 지난 뒤 스레드를 붙잡고 있지 않음)
+- 비동기 뷰(views_async.py) 용으로 이벤트 루프당 aiohttp.ClientSession 하나 (aget_json)
+"""
+
+import asyncio
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+
+# 공공데이터포털 서비스 키
+# SERVICE_KEY = "52f50a9dca9673918e8d195dab87644394bf9c85a814c758daedb44634df54c6"
+SERVICE_KEY = getattr(
+    settings,
+    "BUSAPI_SERVICE_KEY",
+    "1cfef036ae8826960c98fdb06e237c675fcbbc27a26106b8865eec77ed9f1cf8",
+)
+
+# 엔드포인트 이름 → base_url 뒤에 붙는 경로
+ENDPOINTS = {
+    "bus_location": "buslocationservice/v2/getBusLocationListv2",
+    "route_info": "busrouteservice/v2/getBusRouteInfoItemv2",
+    "bus_arrival": "busarrivalservice/v2/getBusArrivalItemv2",
+}
+
+DEFAULT_CONFIG = {
+    "base_url": "https://apis.data.go.kr/6410000",
+    "pool_connections": 4,      # 호스트별 커넥션 풀 개수
+    "pool_maxsize": 32,         # 풀 하나당 최대 커넥션 (station_realtime 동시 호출 수 이상)
+    "async_max_connections": 1000,  # 비동기 클라이언트 최대 동시 커넥션
+    "retries": 2,               # GET 재시도 횟수 (연결 오류 / 429 / 5xx, read timeout 은 재시도 안 함)
+    "backoff_factor": 0.2,      # 재시도 간격: 0.2s, 0.4s, ...
+    "default_timeout": 5,       # 초 또는 [connect, read]
+    "timeouts": {},             # 엔드포인트별 timeout (예: {"route_info": 3})
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_config() -> dict:
+    config = dict(DEFAULT_CONFIG)
+    config.update(getattr(settings, "BUSAPI_UPSTREAM", {}))
+    return config
+
+
+def _build_session(config: dict) -> requests.Session:
+    retry = Retry(
+        total=config["retries"],
+        connect=config["retries"],
+        read=0,
+        status=config["retries"],
+        backoff_factor=config["backoff_factor"],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config["pool_connections"],
+        pool_maxsize=config["pool_maxsize"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(get_config())
+    return _session
+
+
+def endpoint_url(endpoint: str, config: dict = None) -> str:
+    config = config or get_config()
+    return f"{config['base_url'].rstrip('/')}/{ENDPOINTS[endpoint]}"
+
+
+def endpoint_timeout(endpoint: str, config: dict = None):
+    config = config or get_config()
+    timeout = config["timeouts"].get(endpoint, config["default_timeout"])
+    return tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+
+
+def max_call_seconds(endpoint: str, config: dict = None) -> float:
+    """
+    get_json 호출 하나가 걸릴 수 있는 최대 시간(초)
+    = 연결 timeout × (재시도 + 1) + read timeout 한 번 + backoff 합
+    """
+    config = config or get_config()
+    timeout = endpoint_timeout(endpoint, config)
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    backoff = sum(config["backoff_factor"] * 2 ** i for i in range(config["retries"]))
+    return connect * (config["retries"] + 1) + read + backoff
+
+
+def get_json(endpoint: str, params: dict) -> dict:
+    """
+    endpoint("bus_location" / "route_info" / "bus_arrival") 를 GET 으로 호출해서 JSON 을 돌려준다.
+    serviceKey, format=json 은 자동으로 붙는다. 통신/파싱 오류는 그대로 예외로 올린다.
+    """
+    config = get_config()
+    r = get_session().get(
+        endpoint_url(endpoint, config),
+        params={"serviceKey": SERVICE_KEY, "format": "json", **params},
+        timeout=endpoint_timeout(endpoint, config),
+    )
+    return r.json()
+
+
+# -----------------------------
+#  비동기 클라이언트 (ASGI)
+# -----------------------------
+# 이벤트 루프당 aiohttp.ClientSession 하나 (커넥션 풀 공유, 상한: async_max_connections)
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+_async_sessions = weakref.WeakKeyDictionary()  # event loop → aiohttp.ClientSession
+
+
+def _aiohttp():
+    # aiohttp 는 import 가 무거워서(~150ms) 비동기 뷰가 처음 호출될 때 import 한다.
+    try:
+        import aiohttp
+    except ImportError:  # 비동기 뷰를 쓰지 않으면 없어도 됨
+        raise RuntimeError("비동기 upstream 호출에는 aiohttp 패키지가 필요합니다.")
+    return aiohttp
+
+
+def _aiohttp_timeout(timeout):
+    aiohttp = _aiohttp()
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+def _is_read_timeout(aiohttp, error) -> bool:
+    if not isinstance(error, asyncio.TimeoutError):
+        return False
+    # aiohttp 3.10 부터 연결 timeout 이 따로 구분됨 (그 전 버전은 timeout 이면 전부 재시도 안 함)
+    connect_timeout = getattr(aiohttp, "ConnectionTimeoutError", None)
+    return connect_timeout is None or not isinstance(error, connect_timeout)
+
+
+def get_async_session():
+    """현재 이벤트 루프에서 공유하는 aiohttp.ClientSession (keep-alive 커넥션 풀)"""
+    aiohttp = _aiohttp()
+
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        config = get_config()
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=config["async_max_connections"]),
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def aget_json(endpoint: str, params: dict) -> dict:
+    """get_json 의 비동기 버전 (같은 설정의 timeout / 재시도 backoff)"""
+    aiohttp = _aiohttp()
+    config = get_config()
+    session = get_async_session()
+    url = endpoint_url(endpoint, config)
+    timeout = _aiohttp_timeout(endpoint_timeout(endpoint, config))
+    params = {"serviceKey": SERVICE_KEY, "format": "json", **params}
+
+    attempt = 0
+    while True:
+        try:
+            async with session.get(url, params=params, timeout=timeout) as r:
+                if r.status not in _RETRY_STATUS or attempt >= config["retries"]:
+                    return await r.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            # 동기 클라이언트와 같이 read timeout 은 재시도하지 않음 (연결 timeout 만)
+            if attempt >= config["retries"] or _is_read_timeout(aiohttp, e):
+                raise
+        await asyncio.sleep(config["backoff_factor"] * (2 ** attempt))
+        attempt += 1
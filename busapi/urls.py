@@ -1,11 +1,15 @@
 from django.urls import path
 from .views import (
     run_training,
+    training_status,
     predict_seat,
+    predict_seat_batch,
     bus_realtime,
     station_realtime,
+    station_search,
     recommend_route,
 )
+from .views_async import bus_realtime_async, station_realtime_async
 from .views_auth import signup, login_view, logout_view, current_user
 from .views_user_data import favorites, favorite_detail, saved_routes, saved_route_detail
 
@@ -16,12 +20,21 @@ urlpatterns = [
     path('auth/me/', current_user),
 
     path('predict-seat/', predict_seat, name='predict_seat'),
+    path('predict-seat/batch/', predict_seat_batch, name='predict_seat_batch'),
     path('train/', run_training, name='run_training'),
+    path('train/status/<str:job_id>/', training_status, name='training_status'),
 
     # 실시간 데이터 API
     path('bus/realtime/', bus_realtime, name='bus_realtime'),
     path('station/realtime/', station_realtime, name='station_realtime'),
 
+    # 정류장 이름 검색 (접두어 / 초성)
+    path('stations/search/', station_search, name='station_search'),
+
+    # 실시간 데이터 API (ASGI 비동기 버전)
+    path('async/bus/realtime/', bus_realtime_async, name='bus_realtime_async'),
+    path('async/station/realtime/', station_realtime_async, name='station_realtime_async'),
+
     # 경로 추천
     path('recommend-route/', recommend_route, name='recommend_route'),
 
@@ -0,0 +1,96 @@
+# version_store.py
+"""
+CURRENT 포인터 + 버전 디렉토리 (model_registry, static_snapshot 가 같이 쓴다)
+
+    <root>/
+        CURRENT                 # 사용할 버전 이름 (한 줄)
+        [<subdir>/]<버전>/       # 한 번 만든 뒤 다시 쓰지 않는 디렉토리
+        [<subdir>/].staging-*/  # 쓰는 중인 디렉토리 (목록에서 제외)
+
+- promote: CURRENT 를 tmp 파일 + os.replace 로 원자적으로 교체
+- current_version: CURRENT 의 stat 이 그대로면 파일을 다시 읽지 않는다
+"""
+
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+
+CURRENT_FILE = "CURRENT"
+
+
+class VersionStore:
+    """
+    root: 저장 위치를 돌려주는 함수 (settings 를 호출할 때 읽도록)
+    subdir: 버전 디렉토리가 root 바로 아래가 아니면 그 하위 디렉토리 이름
+    is_version: 버전 디렉토리로 칠지 (기본: 디렉토리면 전부)
+    order: list_versions 정렬 key (기본: 이름)
+    """
+
+    def __init__(self, root, subdir="", is_version=None, order=None):
+        self._root = root
+        self._subdir = subdir
+        self._is_version = is_version
+        self._order = order
+        self._cache = {"signature": None, "version": None}
+        self._lock = threading.Lock()
+
+    def root(self) -> Path:
+        return Path(self._root())
+
+    def versions_dir(self) -> Path:
+        return self.root() / self._subdir if self._subdir else self.root()
+
+    def version_dir(self, version: str) -> Path:
+        return self.versions_dir() / version
+
+    def current_path(self) -> Path:
+        return self.root() / CURRENT_FILE
+
+    def current_version(self):
+        """CURRENT 에 적힌 버전 (없으면 None). 파일이 그대로면 stat 한 번으로 끝"""
+        path = self.current_path()
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        # os.replace 로 바뀌면 inode 가 달라진다 (mtime 은 같은 tick 안에 두 번 바뀌면 그대로일 수 있음)
+        # 경로도 넣어서 저장 위치(settings)가 바뀌면 다시 읽는다
+        signature = (str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._cache["signature"] == signature:
+            return self._cache["version"]
+
+        with self._lock:
+            version = path.read_text(encoding="utf-8").strip() or None
+            self._cache.update(signature=signature, version=version)
+        return version
+
+    def promote(self, version: str):
+        """CURRENT 를 version 으로 원자적으로 교체"""
+        path = self.current_path()
+        tmp = path.with_name(f"{CURRENT_FILE}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+
+    def list_versions(self) -> list:
+        """order 순서 (기본: 이름 오름차순)"""
+        try:
+            dirs = [
+                p for p in self.versions_dir().iterdir()
+                if p.is_dir() and not p.name.startswith(".")
+                and (self._is_version is None or self._is_version(p))
+            ]
+        except FileNotFoundError:
+            return []
+        return [p.name for p in sorted(dirs, key=self._order or (lambda p: p.name))]
+
+    def prune(self, keep: int):
+        """최근 keep 개 + 현재 버전만 남기고 오래된 버전 삭제"""
+        versions = self.list_versions()
+        current = self.current_version()
+        for version in versions[:-keep] if keep > 0 else versions:
+            if version != current:
+                shutil.rmtree(self.version_dir(version), ignore_errors=True)
@@ -3,79 +3,70 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_GET
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import user_passes_test
-import pandas as pd
 from .models import bus_arrival_past
-import requests
+from . import upstream
+from .realtime import (
+    call_buslocation_api,
+    get_route_name,
+    get_snapshot,
+    match_station_locations,
+    normalize_bus_locations,
+    parse_station_arrival,
+    station_arrival_from_snapshot,
+)
+from . import static_data
+from .route_planner import get_planner
+from .station_search import search_stations
+from .training_jobs import get_job, submit_training
 import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from django.conf import settings
-from pathlib import Path
-
-
-# 공공데이터포털 서비스 키
-# SERVICE_KEY = "52f50a9dca9673918e8d195dab87644394bf9c85a814c758daedb44634df54c6"
-SERVICE_KEY = "1cfef036ae8826960c98fdb06e237c675fcbbc27a26106b8865eec77ed9f1cf8"
 
 
 USE_FAKE_REALTIME = False  # 🔥 개발용 플래그 (실제 운영 시 False 로 바꾸거나 이 블록 삭제)
 
 
-# ... 기존 import들 위/아래 아무 데나 괜찮지만, 함수 정의보다 위에
-DATA_DIR = Path(settings.BASE_DIR) / "busapi" / "data"
-
-# 1) 정류장 → {name, busNums, busCount}
-with open(DATA_DIR / "stationBus.json", encoding="utf-8") as f:
-    STATION_BUS = json.load(f)
-
-# 2) routeId → [ {route_nm, sta_order, station_id, station_nm}, ... ]
-with open(DATA_DIR / "routes.json", encoding="utf-8") as f:
-    ROUTES = json.load(f)
-
-# 3) 버스번호(route_nm) → routeId 리스트 (대부분 1개일 가능성이 큼)
-ROUTE_NM_TO_IDS: dict[str, list[str]] = {}
-for route_id, stops in ROUTES.items():
-    if not stops:
-        continue
-    route_nm = stops[0].get("route_nm")
-    if not route_nm:
-        continue
-    ROUTE_NM_TO_IDS.setdefault(route_nm, []).append(route_id)
-
-
 def get_local_route_stops(routeid: str):
     """local routes.json 에서 해당 노선의 정류장 목록을 가져온다."""
-    return ROUTES.get(str(routeid), [])
+    return static_data.ROUTES.get(str(routeid), [])
 
 
 def get_local_routes_via_station(stationid: str):
     """
-    local stationBus.json + routes.json 으로
-    '이 정류장을 지나는 노선들의 (routeId, routeName, staOrder)' 리스트를 만든다.
+    '이 정류장을 지나는 노선들의 (routeId, routeName, staOrder)' 리스트
+    (static_data.STATION_ROUTES 역인덱스에서 바로 찾는다. 순환 노선은 staOrder 별로 하나씩)
     """
-    stationid = str(stationid)
+    return [
+        {
+            "routeId": route.route_id,
+            "routeName": route.route_name,
+            "staOrder": route.sta_order,
+        }
+        for route in static_data.STATION_ROUTES.get(str(stationid), ())
+    ]
 
-    station_info = STATION_BUS.get(stationid)
-    if not station_info:
-        return []
 
-    bus_nums = station_info.get("busNums", [])
-    results = []
+STATION_SEARCH_MAX_LIMIT = 50
 
-    for bus_nm in bus_nums:
-        route_ids = ROUTE_NM_TO_IDS.get(bus_nm, [])
-        for rid in route_ids:
-            stops = ROUTES.get(rid, [])
-            for stop in stops:
-                if str(stop.get("station_id")) == stationid:
-                    results.append(
-                        {
-                            "routeId": rid,
-                            "routeName": bus_nm,
-                            "staOrder": stop.get("sta_order"),
-                        }
-                    )
-                    break  # 이 routeId 에서는 해당 station은 한 번만 나오면 됨
 
-    return results
+@require_GET
+def station_search(request):
+    """
+    GET /api/stations/search/?q=성사고&limit=20
+    정류장 이름 검색 (접두어 / 부분 일치 / 초성 "ㅅㅅㄱ"), 순위순으로 정류장과 지나는 노선 목록
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"error": "q 파라미터가 필요합니다."}, status=400)
+
+    try:
+        limit = int(request.GET.get("limit", 20))
+    except ValueError:
+        return JsonResponse({"error": "limit 은 정수여야 합니다."}, status=400)
+    limit = max(1, min(limit, STATION_SEARCH_MAX_LIMIT))
+
+    results = search_stations(query, limit)
+    return JsonResponse({"q": query, "count": len(results), "results": results}, status=200)
 
 
 # 🔥 BusSearch / StationSearch 에서 쓸 "가짜 노선 실시간 데이터"
@@ -144,26 +135,58 @@ FAKE_ROUTE_234001736 = [
 # -----------------------------
 #  ML 관련 (그대로 유지)
 # -----------------------------
-try:
-    from .ml_train import train_model_and_save
-except ImportError:
-    train_model_and_save = None
+# ml_predict(numpy) 는 예측 요청이 처음 들어올 때 import 한다.
+# (워커 시작과 manage.py 명령마다 import 비용을 내지 않도록. 학습 쪽 xgboost 등은 학습 프로세스에서만)
+def _ml_predict():
+    try:
+        from . import ml_predict
+    except ImportError:
+        return None
+    return ml_predict
+
 
-try:
-    from .ml_predict import predict_remaining_seats
-except ImportError:
-    def predict_remaining_seats(routeid_int, select_time_int):
-        return []
+def predict_with_version(routeids, select_times):
+    """(예측 결과, 그 예측에 쓴 모델 버전). 버전을 따로 조회하면 도중에 모델이 바뀌었을 때 어긋난다."""
+    ml_predict = _ml_predict()
+    return ml_predict.predict_with_version(routeids, select_times) if ml_predict else ({}, None)
 
 
 @user_passes_test(lambda u: u.is_superuser)
 def run_training(request):
+    """
+    학습을 백그라운드 프로세스 작업으로 등록하고 작업 id 를 바로 돌려준다.
+    ?incremental=1 : 지난 학습 이후 들어온 데이터만 반영해서 이어서 학습
+    ?db_aggregate=0 : (전체 학습) 슬롯 집계를 SQL 대신 원본 행을 읽어서 pandas 로
+    이미 진행 중인 학습이 있으면 새로 만들지 않고 그 작업을 돌려준다. (409)
+    진행 상황은 /api/train/status/<job_id>/ 로 조회
+    """
+    incremental = request.GET.get("incremental") in ("1", "true")
+    aggregate_in_db = request.GET.get("db_aggregate") not in ("0", "false")
+    if incremental and not aggregate_in_db:
+        return JsonResponse(
+            {"ok": False, "error": "db_aggregate=0 은 전체 학습에서만 쓸 수 있습니다."},
+            status=400,
+        )
     try:
-        rmse = train_model_and_save()  # 모델 학습
-        return JsonResponse({"ok": True, "rmse": rmse})
+        job, created = submit_training(incremental=incremental, aggregate_in_db=aggregate_in_db)
     except Exception as e:
         return JsonResponse({"ok": False, "error": str(e)}, status=500)
 
+    return JsonResponse(
+        {"ok": created, "job_id": job["job_id"], "status": job.get("status")},
+        status=202 if created else 409,
+    )
+
+
+@user_passes_test(lambda u: u.is_superuser)
+def training_status(request, job_id):
+    """GET /api/train/status/<job_id>/ → queued/running/done/failed, rmse, duration, rows"""
+    job = get_job(job_id)
+    if job is None:
+        return JsonResponse({"error": "job not found"}, status=404)
+    job.pop("traceback", None)
+    return JsonResponse(job, status=200)
+
 
 def predict_seat(request):
     routeid = request.GET.get("routeid")
@@ -185,7 +208,8 @@ def predict_seat(request):
         )
 
     try:
-        predictions = predict_remaining_seats(routeid_str, select_time_int)
+        grouped, model_version = predict_with_version([routeid_str], [select_time_int])
+        predictions = grouped.get(routeid_str, {}).get(select_time_int, [])
     except Exception as e:
         import traceback
         print("error during prediction")
@@ -200,6 +224,111 @@ def predict_seat(request):
             "routeid": routeid_str,
             "select_time": select_time_int,
             "predictions": predictions,
+            "model_version": model_version,
+        },
+        status=200,
+    )
+
+
+PREDICT_BATCH_MAX_ROUTES = 20
+
+
+def _batch_format_error(slot_count):
+    return JsonResponse(
+        {"error": f"routeids, select_times 는 문자열/정수 목록이어야 합니다. (select_times: 0 ~ {slot_count - 1})"},
+        status=400,
+    )
+
+
+def _is_id_list(values) -> bool:
+    return isinstance(values, list) and all(
+        isinstance(v, (str, int)) and not isinstance(v, bool) for v in values
+    )
+
+
+def _parse_batch_params(routeids, select_times, slot_count):
+    """(routeids, select_times) 를 검사해서 ([str], [int]) 로, 형식이 틀리면 None"""
+    if not _is_id_list(routeids) or not _is_id_list(select_times):
+        return None
+    routeids = [str(r).strip() for r in routeids]
+    try:
+        select_times = [int(t) for t in select_times]
+    except ValueError:
+        return None
+    if not all(routeids) or not all(0 <= t < slot_count for t in select_times):
+        return None
+    return routeids, select_times
+
+
+@csrf_exempt
+def predict_seat_batch(request):
+    """
+    GET  /api/predict-seat/batch/?routeids=234001736,218000005&select_times=0,1,2
+    POST /api/predict-seat/batch/
+        body: { "routeids": ["234001736", ...], "select_times": [0, 1, 2] }
+
+    → {
+        "routeids": [...],
+        "select_times": [...],
+        "predictions": { routeid: { select_time: [ predict_seat 와 같은 행들 ] } },
+        "model_version": "..."
+      }
+    """
+    ml_predict = _ml_predict()
+    slot_count = ml_predict.SLOT_COUNT if ml_predict else 0
+
+    if request.method == "POST":
+        try:
+            body = json.loads(request.body.decode())
+        except Exception:
+            return JsonResponse({"error": "invalid json body"}, status=400)
+        if not isinstance(body, dict):
+            return _batch_format_error(slot_count)
+        routeids = body.get("routeids")
+        select_times = body.get("select_times")
+    else:
+        routeids = [r for r in request.GET.get("routeids", "").split(",") if r]
+        select_times = [t for t in request.GET.get("select_times", "").split(",") if t]
+
+    if routeids in (None, []) or select_times in (None, []):
+        return JsonResponse(
+            {"error": "routeids, select_times 파라미터가 필요합니다."},
+            status=400,
+        )
+
+    params = _parse_batch_params(routeids, select_times, slot_count)
+    if params is None:
+        return _batch_format_error(slot_count)
+    routeids, select_times = params
+
+    if len(routeids) > PREDICT_BATCH_MAX_ROUTES:
+        return JsonResponse(
+            {"error": f"routeids 는 최대 {PREDICT_BATCH_MAX_ROUTES}개까지 가능합니다."},
+            status=400,
+        )
+
+    try:
+        grouped, model_version = predict_with_version(routeids, select_times)
+    except Exception as e:
+        import traceback
+        print("error during batch prediction")
+        print(traceback.format_exc())
+        return JsonResponse(
+            {"error": f"prediction error: {e}"},
+            status=500,
+        )
+
+    predictions = {
+        routeid: {str(slot): rows for slot, rows in by_slot.items()}
+        for routeid, by_slot in grouped.items()
+    }
+
+    return JsonResponse(
+        {
+            "routeids": list(dict.fromkeys(routeids)),
+            "select_times": list(dict.fromkeys(select_times)),
+            "predictions": predictions,
+            "model_version": model_version,
         },
         status=200,
     )
@@ -234,46 +363,6 @@ def bus_realtime(request):
         }
     """
 
-    # --------------------
-    # 공통: 노선 실시간 위치 API (한 번만 호출)
-    # --------------------
-    def call_buslocation_api(routeid: str):
-        URL_LOC = "https://apis.data.go.kr/6410000/buslocationservice/v2/getBusLocationListv2"
-        try:
-            r = requests.get(
-                URL_LOC,
-                params={
-                    "serviceKey": SERVICE_KEY,
-                    "routeId": routeid,
-                    "format": "json",
-                },
-                timeout=5,
-            )
-            data = r.json()
-        except Exception as e:
-            print("buslocationservice API error:", e)
-            return None
-
-        # ✅ 공식 예시: 최상단에 msgHeader / msgBody 가 바로 있음
-        # 혹시 다른 버전(response 래퍼)도 대응하고 싶으면 분기 처리
-        if "response" in data:
-            # 다른 API들과 같은 패턴일 수도 있어서 방어적으로 처리
-            resp = data.get("response", {})
-            header = resp.get("msgHeader", {}) or {}
-            body = resp.get("msgBody", {}) or {}
-        else:
-            header = data.get("msgHeader", {}) or {}
-            body = data.get("msgBody", {}) or {}
-
-        query_time = header.get("queryTime", "")
-        loc_list = body.get("busLocationList", []) or []
-
-        # 한 대만 있으면 dict, 여러 대면 list → 항상 list 로 맞추기
-        if isinstance(loc_list, dict):
-            loc_list = [loc_list]
-
-        return query_time, loc_list
-
     # --------------------
     # 1) GET (노선 전체 버스 위치 목록)
     # --------------------
@@ -287,29 +376,16 @@ def bus_realtime(request):
                 status=400,
             )
 
-        # 노선 이름 가져오기 (한 번만)
-        URL_ROUTE_INFO = "https://apis.data.go.kr/6410000/busrouteservice/v2/getBusRouteInfoItemv2"
-        route_name = ""
-        try:
-            r_info = requests.get(
-                URL_ROUTE_INFO,
-                params={
-                    "serviceKey": SERVICE_KEY,
-                    "routeId": routeid,
-                    "format": "json",
-                },
-                timeout=5,
-            )
-            info_json = r_info.json()
-            route_name = str(
-                info_json.get("response", {})
-                .get("msgBody", {})
-                .get("busRouteInfoItem", {})
-                .get("routeName", "")
-            )
-        except Exception as e:
-            print("route info api error:", e)
-            route_name = ""
+        # poll_realtime 스냅샷이 있으면 upstream 호출 없이 그대로 응답
+        snapshot = get_snapshot(routeid)
+        if snapshot is not None:
+            out = snapshot["records"]
+            if service_date:
+                out = [dict(rec, service_date=service_date) for rec in out]
+            return JsonResponse(out, safe=False, status=200)
+
+        # 노선 이름은 로컬 메타데이터에서 (upstream 호출은 위치 조회 한 번뿐)
+        route_name = get_route_name(routeid)
 
         result = call_buslocation_api(routeid)
         if result is None:
@@ -320,59 +396,9 @@ def bus_realtime(request):
 
         query_time, loc_list = result
 
-        out = []
-        for item in loc_list:
-            try:
-                station_seq = int(item.get("stationSeq"))
-            except Exception:
-                station_seq = None
-
-            remain_raw = item.get("remainSeatCnt")
-            try:
-                remainseat = (
-                    int(remain_raw)
-                    if remain_raw not in (None, "", " ", -1)
-                    else None
-                )
-            except Exception:
-                remainseat = None
-
-            crowded_raw = item.get("crowded")
-            try:
-                crowded_level = int(crowded_raw)
-                if crowded_level not in (1, 2, 3, 4):
-                    raise ValueError
-            except Exception:
-                # 좌석수 기반 추정
-                if remainseat is None:
-                    crowded_level = 2
-                else:
-                    if remainseat >= 35:
-                        crowded_level = 1
-                    elif remainseat >= 25:
-                        crowded_level = 2
-                    elif remainseat >= 10:
-                        crowded_level = 3
-                    else:
-                        crowded_level = 4
-
-            service_date_out = service_date or (
-                query_time.split(" ")[0] if query_time else ""
-            )
-
-            out.append(
-                {
-                    "service_date": service_date_out,
-                    "arrival_time": query_time,
-                    "vehid1": str(item.get("vehId") or ""),
-                    "station_num": str(station_seq) if station_seq is not None else "",
-                    "remainseat_at_arrival": remainseat,
-                    "routeid": str(item.get("routeId") or routeid),
-                    "routename": route_name,
-                    "stationid": str(item.get("stationId") or ""),
-                    "crowded_level": crowded_level,
-                }
-            )
+        out = normalize_bus_locations(
+            routeid, query_time, loc_list, route_name, service_date
+        )
 
         return JsonResponse(out, safe=False, status=200)
 
@@ -401,76 +427,7 @@ def bus_realtime(request):
 
     query_time, loc_list = result
 
-    # (stationId, stationSeq) 기준으로 인덱싱
-    index = {}
-    for item in loc_list:
-        s_id = str(item.get("stationId"))
-        try:
-            s_seq = int(item.get("stationSeq"))
-        except Exception:
-            continue
-        key = (s_id, s_seq)
-        index.setdefault(key, []).append(item)
-
-    total_stops = len(stations) if stations else 1
-
-    results = []
-
-    for s in stations:
-        station_id = s.get("stationId")
-        sta_order = s.get("staOrder")
-
-        if not station_id or sta_order is None:
-            results.append(
-                {
-                    "stationId": station_id,
-                    "staOrder": sta_order,
-                    "raw": None,
-                }
-            )
-            continue
-
-        key = (str(station_id), int(sta_order))
-        items_here = index.get(key)
-        raw = None
-
-        if items_here:
-            item0 = items_here[0]
-            try:
-                seq = int(item0.get("stationSeq") or sta_order)
-            except Exception:
-                seq = int(sta_order)
-
-            # BusSearch 에서 쓰던 locationNo1 형식 맞추기:
-            #   totalStops - 1 - locationNo1 = 타임라인 index
-            # → 우리가 그냥 "해당 정류장 index" 에 꽂히도록 역산
-            location_no1 = max(total_stops - 1 - (seq - 1), 0)
-
-            remain_raw = item0.get("remainSeatCnt")
-            try:
-                remain_seat = (
-                    int(remain_raw)
-                    if remain_raw not in (None, "", " ", -1)
-                    else None
-                )
-            except Exception:
-                remain_seat = None
-
-            raw = {
-                "vehId1": str(item0.get("vehId") or ""),
-                "locationNo1": location_no1,
-                "remainSeatCnt1": remain_seat,
-                "crowded1": item0.get("crowded"),
-                "queryTime": query_time,
-            }
-
-        results.append(
-            {
-                "stationId": station_id,
-                "staOrder": sta_order,
-                "raw": raw,
-            }
-        )
+    results = match_station_locations(stations, query_time, loc_list)
 
     return JsonResponse(
         {
@@ -484,6 +441,36 @@ def bus_realtime(request):
 # -----------------------------
 #  station_realtime (정류장 화면용)
 # -----------------------------
+# 정류장 화면 전체 응답 마감 시간(초) / 노선별 동시 호출 수
+STATION_REALTIME_DEADLINE = getattr(settings, "STATION_REALTIME_DEADLINE", 6.0)
+STATION_REALTIME_MAX_WORKERS = getattr(settings, "STATION_REALTIME_MAX_WORKERS", 16)
+
+_ARRIVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=STATION_REALTIME_MAX_WORKERS,
+    thread_name_prefix="bus-arrival",
+)
+
+
+def fetch_station_arrival(stationid: str, routeid: str, routename: str, sta_order, service_date):
+    """
+    getBusArrivalItemv2 를 한 노선에 대해 호출해서 station_realtime 응답 행 하나를 만든다.
+    - 도착 예정 버스가 없으면 None
+    - 통신 오류는 예외로 올려서 호출한 쪽에서 '응답 못 받은 노선' 으로 처리
+    """
+    arrival_json = upstream.get_json(
+        "bus_arrival",
+        {
+            "stationId": stationid,
+            "routeId": routeid,
+            "staOrder": sta_order,
+        },
+    )
+
+    return parse_station_arrival(
+        arrival_json, stationid, routeid, routename, sta_order, service_date
+    )
+
+
 @csrf_exempt
 @require_GET
 
@@ -519,106 +506,68 @@ def station_realtime(request):
     if not local_routes:
         return JsonResponse([], safe=False, status=200)
 
-    URL_ARRIVAL = (
-        "https://apis.data.go.kr/6410000/busarrivalservice/v2/getBusArrivalItemv2"
-    )
-
-    results = []
-
-    for route in local_routes:
+    # poll_realtime 스냅샷이 있는 노선은 바로 응답하고,
+    # 나머지 노선만 도착정보 API 를 동시에 호출해서 전체 마감 시간까지 온 것만 응답
+    records = {}  # local_routes 인덱스 → 응답 행 (도착 예정 버스 없으면 None)
+    futures = {}
+    for i, route in enumerate(local_routes):
         routeid = str(route.get("routeId"))
-        routename = str(route.get("routeName"))
         sta_order = route.get("staOrder")
 
         if not routeid or sta_order is None:
             continue
 
-        try:
-            r2 = requests.get(
-                URL_ARRIVAL,
-                params={
-                    "serviceKey": SERVICE_KEY,
-                    "stationId": stationid,
-                    "routeId": routeid,
-                    "staOrder": sta_order,
-                    "format": "json",
-                },
-                timeout=5,
+        snapshot = get_snapshot(routeid)
+        if snapshot is not None:
+            records[i] = station_arrival_from_snapshot(
+                snapshot, stationid, str(route.get("routeName")), sta_order, service_date
             )
-            arrival_json = r2.json()
-        except Exception:
             continue
 
-        resp = arrival_json.get("response", {})
-        header = resp.get("msgHeader", {}) or {}
-        body_item = resp.get("msgBody", {}).get("busArrivalItem")
-
-        if not body_item:
-            continue
-
-        query_time = header.get("queryTime", "")
-
-        vehid1 = str(
-            body_item.get("vehId1")
-            or body_item.get("vehid1")
-            or ""
+        future = _ARRIVAL_EXECUTOR.submit(
+            fetch_station_arrival,
+            stationid,
+            routeid,
+            str(route.get("routeName")),
+            sta_order,
+            service_date,
         )
+        futures[future] = (i, routeid)
 
-        remain_raw = body_item.get("remainSeatCnt1")
-        try:
-            remainseat = (
-                int(remain_raw)
-                if remain_raw not in (None, "", " ")
-                else None
-            )
-        except Exception:
-            remainseat = None
+    done, not_done = wait(futures, timeout=STATION_REALTIME_DEADLINE)
 
-        crowded_raw = body_item.get("crowded1")
+    missing_routes = [futures[f][1] for f in not_done]
 
+    for future, (i, routeid) in futures.items():
+        if future not in done:
+            continue
         try:
-            crowded_level = int(crowded_raw)
-            if crowded_level not in (1, 2, 3, 4):
-                raise ValueError
-        except Exception:
-            if remainseat is None:
-                crowded_level = 2
-            else:
-                if remainseat >= 35:
-                    crowded_level = 1
-                elif remainseat >= 25:
-                    crowded_level = 2
-                elif remainseat >= 10:
-                    crowded_level = 3
-                else:
-                    crowded_level = 4
-
-        results.append(
-            {
-                "service_date": service_date
-                or (query_time.split(" ")[0] if query_time else ""),
-                "arrival_time": query_time,
-                "vehid1": vehid1,
-                "station_num": str(sta_order),
-                "remainseat_at_arrival": remainseat,
-                "routeid": routeid,
-                "routename": routename,
-                "stationid": stationid,
-                "crowded_level": crowded_level,
-            }
-        )
+            records[i] = future.result()
+        except Exception as e:
+            print("bus arrival api error:", routeid, e)
+            missing_routes.append(routeid)
+
+    # 원래 노선 순서를 유지
+    results = [records[i] for i in sorted(records) if records[i] is not None]
 
-    return JsonResponse(results, safe=False, status=200)
+    response = JsonResponse(results, safe=False, status=200)
+    if missing_routes:
+        # body 형식(list)은 그대로 두고, 응답 못 받은 노선은 헤더로 알려줌
+        response["X-Missing-Routes"] = ",".join(missing_routes)
+    return response
 
 
 # -----------------------------
-#  recommend_route (임시 더미)
+#  recommend_route (route_planner 의 RAPTOR 경로 탐색)
 # -----------------------------
 @csrf_exempt
 @require_GET
 def recommend_route(request):
     """
-    경로 추천 API (아직 더미)
+    경로 추천 API
+    origin_stationid → dest_stationid 로 가는 버스 경로 (route_planner, 환승은 같은 정류장에서)
+    fast_option: "최단시간" (기본) / "최소환승" → recommended_route 를 고르는 기준
+    itineraries: 환승 횟수별로 더 빨라지는 경로들 (소요 시간 순)
     """
     origin_stationid = request.GET.get("origin_stationid")
     dest_stationid = request.GET.get("dest_stationid")
@@ -634,6 +583,20 @@ def recommend_route(request):
         )
 
     try:
+        planner = get_planner()
+        for stationid in (origin_stationid, dest_stationid):
+            if not planner.has_station(stationid):
+                return JsonResponse(
+                    {"ok": False, "error": f"노선 데이터에 없는 정류장입니다: {stationid}"},
+                    status=404,
+                )
+
+        itineraries = planner.plan(origin_stationid, dest_stationid)
+        if fast_option == "최소환승":
+            best = min(itineraries, key=lambda it: (it["transfers"], it["duration_minutes"]), default=None)
+        else:
+            best = itineraries[0] if itineraries else None
+
         data = {
             "ok": True,
             "origin_stationid": origin_stationid,
@@ -643,13 +606,17 @@ def recommend_route(request):
             "time_type": time_type,
             "fast_option": fast_option,
             "recommended_route": {
-                "bus_numbers": [],
-                "routeid": None,
-                "duration_minutes": None,
+                "bus_numbers": best["bus_numbers"] if best else [],
+                "routeid": best["routeids"][0] if best else None,
+                "duration_minutes": best["duration_minutes"] if best else None,
                 "congestion_level": None,
+                "transfers": best["transfers"] if best else None,
+                "legs": best["legs"] if best else [],
             },
-            "message": "경로 추천 기능은 현재 개발 중입니다.",
+            "itineraries": itineraries,
         }
+        if best is None:
+            data["message"] = "갈 수 있는 버스 경로가 없습니다."
 
         return JsonResponse(data, status=200)
     except Exception as e:
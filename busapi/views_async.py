@@ -0,0 +1,169 @@
+# api/views_async.py
+"""
+실시간 API 의 비동기(ASGI) 버전
+
+views.bus_realtime / views.station_realtime 과 요청·응답 형식이 같고,
+upstream 호출을 aiohttp 로 기다리는 동안 워커 스레드를 잡고 있지 않는다.
+(uvicorn/daphne 등 ASGI 서버: DjangoProject.asgi:application)
+
+로컬 스텁 서버로 테스트할 때는 settings.BUSAPI_UPSTREAM["base_url"] 을 스텁 주소로 바꾸면 된다.
+"""
+
+import asyncio
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+
+from .realtime import (
+    acall_buslocation_api,
+    afetch_station_arrival,
+    aget_route_name,
+    aget_snapshot,
+    match_station_locations,
+    normalize_bus_locations,
+    station_arrival_from_snapshot,
+)
+from .views import STATION_REALTIME_DEADLINE, get_local_routes_via_station
+
+
+@csrf_exempt
+async def bus_realtime_async(request):
+    """
+    GET  /api/async/bus/realtime/?routeid=234001736
+    POST /api/async/bus/realtime/   (body 는 views.bus_realtime POST 와 동일)
+    """
+    if request.method == "GET":
+        routeid = request.GET.get("routeid")
+        service_date = request.GET.get("service_date")
+
+        if not routeid:
+            return JsonResponse(
+                {"error": "routeid 파라미터가 필요합니다."},
+                status=400,
+            )
+
+        snapshot = await aget_snapshot(routeid)
+        if snapshot is not None:
+            out = snapshot["records"]
+            if service_date:
+                out = [dict(rec, service_date=service_date) for rec in out]
+            return JsonResponse(out, safe=False, status=200)
+
+        route_name = await aget_route_name(routeid)
+
+        result = await acall_buslocation_api(routeid)
+        if result is None:
+            return JsonResponse(
+                {"error": "buslocation api error"},
+                status=502,
+            )
+
+        query_time, loc_list = result
+        out = normalize_bus_locations(
+            routeid, query_time, loc_list, route_name, service_date
+        )
+        return JsonResponse(out, safe=False, status=200)
+
+    try:
+        body = json.loads(request.body.decode())
+    except Exception:
+        return JsonResponse({"error": "invalid json body"}, status=400)
+
+    route_id = body.get("routeId")
+    stations = body.get("stations", [])
+
+    if not route_id or not stations:
+        return JsonResponse({"error": "missing params"}, status=400)
+
+    result = await acall_buslocation_api(route_id)
+    if result is None:
+        return JsonResponse(
+            {"error": "buslocation api error"},
+            status=502,
+        )
+
+    query_time, loc_list = result
+
+    return JsonResponse(
+        {
+            "routeId": route_id,
+            "results": match_station_locations(stations, query_time, loc_list),
+        },
+        status=200,
+    )
+
+
+@csrf_exempt
+@require_GET
+async def station_realtime_async(request):
+    """
+    GET /api/async/station/realtime/?stationid=...
+    노선별 도착정보를 asyncio 로 동시에 기다리고, 마감 시간이 지나면 온 것만 응답.
+    응답 못 받은 노선은 X-Missing-Routes 헤더로 알려준다. (views.station_realtime 과 동일)
+    """
+    stationid = request.GET.get("stationid")
+    service_date = request.GET.get("service_date")
+
+    if not stationid:
+        return JsonResponse(
+            {"error": "stationid 파라미터가 필요합니다."},
+            status=400,
+        )
+
+    local_routes = get_local_routes_via_station(stationid)
+    if not local_routes:
+        return JsonResponse([], safe=False, status=200)
+
+    routes = [
+        (i, str(route.get("routeId")), route)
+        for i, route in enumerate(local_routes)
+        if route.get("routeId") and route.get("staOrder") is not None
+    ]
+    snapshots = await asyncio.gather(*(aget_snapshot(routeid) for _, routeid, _ in routes))
+
+    records = {}  # local_routes 인덱스 → 응답 행 (도착 예정 버스 없으면 None)
+    tasks = {}
+    for (i, routeid, route), snapshot in zip(routes, snapshots):
+        sta_order = route.get("staOrder")
+
+        if snapshot is not None:
+            records[i] = station_arrival_from_snapshot(
+                snapshot, stationid, str(route.get("routeName")), sta_order, service_date
+            )
+            continue
+
+        task = asyncio.ensure_future(
+            afetch_station_arrival(
+                stationid,
+                routeid,
+                str(route.get("routeName")),
+                sta_order,
+                service_date,
+            )
+        )
+        tasks[task] = (i, routeid)
+
+    missing_routes = []
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=STATION_REALTIME_DEADLINE)
+        for task in pending:
+            task.cancel()
+            missing_routes.append(tasks[task][1])
+
+        for task in done:
+            i, routeid = tasks[task]
+            try:
+                records[i] = task.result()
+            except Exception as e:
+                print("bus arrival api error:", routeid, e)
+                missing_routes.append(routeid)
+
+    # 원래 노선 순서를 유지
+    results = [records[i] for i in sorted(records) if records[i] is not None]
+
+    response = JsonResponse(results, safe=False, status=200)
+    if missing_routes:
+        response["X-Missing-Routes"] = ",".join(missing_routes)
+    return response